@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -391,6 +392,93 @@ CACHE_TTL = {
     'collections': 60 * 5,  # 5 minutes
 }
 
+# How long each worker keeps its in-memory scoring catalog before rebuilding it
+RECOMMENDATION_CATALOG_TTL = int(os.getenv('RECOMMENDATION_CATALOG_TTL', 60 * 5))
+
+# `manage.py test` run: background jobs and shared on-disk state default off
+TESTING = sys.argv[1:2] == ['test']
+
+# Catalog snapshot memory-mapped by every worker on the host (core.catalog_snapshot); it
+# backs the scoring catalog and the facet index instead of a private copy per worker
+CATALOG_SNAPSHOT = {
+    'ENABLED': os.environ.get('CATALOG_SNAPSHOT_ENABLED', str(not TESTING)).lower() == 'true',
+    'DIR': os.environ.get('CATALOG_SNAPSHOT_DIR'),  # Defaults to <tmp>/missland-catalog-<database and settings key>
+    'CHECK_INTERVAL': 2,  # Seconds between checks for a newer snapshot
+    'KEEP': 2,  # Snapshot files kept on disk (older ones are deleted once replaced)
+}
+
+# How long each worker keeps its collaborative filtering matrix before reloading it
+COLLABORATIVE_MATRIX_TTL = int(os.getenv('COLLABORATIVE_MATRIX_TTL', 60 * 10))
+
+# Background flushing of the write-behind buffers below. When off, nothing is flushed
+# on a timer or at exit; buffers are only flushed explicitly (tests, management commands)
+WRITE_BEHIND = {
+    'BACKGROUND_FLUSH': os.getenv('WRITE_BEHIND_BACKGROUND_FLUSH', str(not TESTING)).lower() == 'true',
+}
+
+# Write-behind buffer for tracking events (clicks, try-ons, searches)
+INTERACTION_BUFFER = {
+    'USE_CACHE': USE_REDIS,  # Share one Redis list across workers instead of per-process memory
+    'FLUSH_INTERVAL': 5,  # Seconds between background flushes
+    'MAX_EVENTS': 500,  # Flush early once this many events are buffered in process
+    'DEDUPE_WINDOW': 30,  # Seconds within which repeated identical events are dropped
+}
+
+# Write-behind buffer for post views_count / saves_count increments
+POST_COUNTERS = {
+    'USE_CACHE': USE_REDIS,  # Accumulate with HINCRBY in Redis instead of per-process memory
+    'FLUSH_INTERVAL': 10,  # Seconds between batched UPDATEs
+}
+
+# Trending ranking built from hourly engagement rollups
+TRENDING = {
+    'WINDOW_HOURS': 24 * 7,  # Engagement older than this is ignored
+    'HALF_LIFE_HOURS': 24,  # Engagement loses half its weight every this many hours
+    'REFRESH_INTERVAL': 60 * 15,  # Seconds the cached ranking is served before recomputing
+    'RETENTION_DAYS': 30,  # Rollup rows older than this are pruned by refresh_trending
+}
+
+# Per-user For You feed snapshots
+FOR_YOU_FEED = {
+    'BLOCK_SIZE': 100,  # Posts ranked per lazy extension of the snapshot
+    'MAX_POSTS': 2000,  # The feed ends after this many posts
+    'SESSION_TIMEOUT': 60 * 30,  # Seconds of inactivity after which a new snapshot is started
+    'MIN_INTEREST_SIMILARITY': 0.9,  # Re-rank the unserved tail once interests drift below this cosine
+}
+
+# Per-user Bloom filters of posts already seen (clicked or served in a feed)
+SEEN_FILTER = {
+    'BITS': 2048,  # Size of each of the two rotating filters (256 bytes)
+    'HASHES': 4,  # Bits set per post
+    'CAPACITY': 200,  # Posts per filter before rotating; keeps false positives near 1%
+    'TIMEOUT': 60 * 60 * 24 * 30,  # Seconds a user's filters are kept after the last update
+}
+
+# Explore search box autocomplete (core.suggest)
+SEARCH_SUGGESTIONS = {
+    'LIMIT': 8,  # Completions returned by default
+    'MAX_LIMIT': 20,  # Completions kept per trie node, and the largest ?limit accepted
+    'TITLE_TOKENS': 2000,  # Most frequent post title words added to the trie
+    'MIN_TITLE_COUNT': 2,  # ...if at least this many posts use them
+}
+
+# Lazy exponential decay of interest scores (core.interests)
+INTEREST_DECAY = {
+    'HALF_LIFE_DAYS': 14,  # An interest counts half as much after this many days; changing it rescales stored scores
+    'MIN_SCORE': 0.5,  # Decayed interests below this are ignored
+}
+
+# Bounded search tracking (core.search_terms)
+SEARCH_TRACKING = {
+    'USER_TERMS': 20,  # Free-text search words kept per user (Space-Saving summary)
+    'SKETCH_WIDTH': 2048,  # Counters per Count-Min row; one 32 KB sketch per hour
+    'SKETCH_DEPTH': 4,
+    'CANDIDATES': 200,  # Queries tracked per hour as trending candidates
+    'WINDOW_HOURS': 24,  # Hours of searches considered for trending
+    'HALF_LIFE_HOURS': 6,  # Weight of an hour's searches halves every HALF_LIFE_HOURS
+    'TRENDING_TTL': 60,  # Seconds trending searches are cached
+}
+
 # Session cache
 SESSION_ENGINE = 'core.session_backend'
 SESSION_CACHE_ALIAS = 'default'
@@ -51,6 +51,10 @@ CACHES = {
     }
 }
 
+# Buffer tracking events in Redis so every gunicorn worker shares one queue
+INTERACTION_BUFFER = {**INTERACTION_BUFFER, 'USE_CACHE': True}
+POST_COUNTERS = {**POST_COUNTERS, 'USE_CACHE': True}
+
 # CORS Settings for IP-only deployment
 CORS_ALLOWED_ORIGINS = [
     "http://46.249.102.155",
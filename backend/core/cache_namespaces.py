@@ -0,0 +1,87 @@
+"""
+Versioned cache namespaces.
+
+Every namespace keeps a generation counter in the cache and folds it into
+the keys it builds (e.g. "recommendations:user:7:v3:feed:100"). Invalidating
+a namespace is a single atomic increment: entries written under the old
+generation are simply never read again and expire on their own TTL, so no
+wildcard deletes or keyspace scans are needed.
+"""
+
+import time
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+
+VERSION_TIMEOUT = None  # Generation counters never expire on their own
+
+
+def _initial_version() -> int:
+    # Seeding with the clock keeps a re-created counter (e.g. after an
+    # eviction) ahead of any generation that may still have live entries
+    return int(time.time() * 1000)
+
+
+def versions_persist() -> bool:
+    """
+    Whether the cache keeps generation counters. A dummy cache stores
+    nothing, so every version() call returns a new generation; callers that
+    compare versions to detect changes should fall back to a TTL instead.
+    """
+    return not isinstance(caches['default'], DummyCache)
+
+
+class CacheNamespace:
+    """
+    A group of cache keys that can be invalidated together.
+
+    Usage:
+        namespace = CacheNamespace('posts')
+        value = cache.get(namespace.key('filtered', params))
+        namespace.invalidate()
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.version_key = f"{name}:version"
+
+    def version(self) -> int:
+        """Return the current generation, creating the counter if needed."""
+        version = cache.get(self.version_key)
+        if version is None:
+            version = _initial_version()
+            if not cache.add(self.version_key, version, timeout=VERSION_TIMEOUT):
+                # Another process created it first; use theirs
+                version = cache.get(self.version_key, version)
+        return version
+
+    def key(self, *parts) -> str:
+        """Build a key inside the current generation of this namespace."""
+        return ':'.join([self.name, f"v{self.version()}", *(str(part) for part in parts)])
+
+    def invalidate(self):
+        """Move the namespace to a new generation in O(1)."""
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            # The counter does not exist (never used, evicted, or a dummy cache)
+            cache.set(self.version_key, _initial_version(), timeout=VERSION_TIMEOUT)
+
+
+# ===== NAMESPACES USED BY THE APP =====
+
+# Global post listings (filtered explore feed, etc.)
+POSTS = CacheNamespace('posts')
+
+# Post catalog contents; bumped whenever a post is created, edited or deleted
+CATALOG = CacheNamespace('catalog')
+
+
+def user_recommendations(user_id: int) -> CacheNamespace:
+    """Per-user recommendation results (For You feed, collaborative picks)."""
+    return CacheNamespace(f"recommendations:user:{user_id}")
+
+
+def similar_posts(post_id: int) -> CacheNamespace:
+    """Per-post "more like this" results."""
+    return CacheNamespace(f"similar:post:{post_id}")
@@ -0,0 +1,375 @@
+"""
+Catalog snapshot shared by all worker processes through one memory-mapped file.
+
+Gunicorn runs several worker processes per host. Without a snapshot, each of
+them loads the post catalog from the database and keeps private copies of
+the scoring matrix (core.scoring) and the facet index (core.facets). Instead,
+one worker writes everything both structures need to a versioned binary
+file:
+- post IDs, newest first;
+- the ELLPACK feature matrix with its column table;
+- views, saves and precomputed popularity;
+- creation times;
+- shape, pattern and size codes;
+- base color bitmasks.
+Every worker maps the file read-only, so the page cache holds one copy per
+host whatever the number of workers.
+
+Publishing is atomic. A new file is written under a fresh name, fsynced, and
+then the CURRENT pointer file is replaced with os.replace. Workers re-read
+CURRENT at most every CATALOG_SNAPSHOT['CHECK_INTERVAL'] seconds and switch
+to the new file on their next access. Requests still holding the old mapping
+finish with it, since unlinked files stay readable while they are mapped.
+
+A snapshot is rebuilt in these cases:
+- the CATALOG namespace has moved (posts were created, edited or deleted)
+  and the snapshot is at least MIN_REBUILD_INTERVAL old (until then, edits
+  are not visible through it, see CatalogSnapshot.is_stale);
+- the snapshot is older than RECOMMENDATION_CATALOG_TTL, which refreshes the
+  engagement counters.
+The first worker to notice takes a non-blocking file lock and builds. The
+others keep serving the previous snapshot, or their own in-process
+structures if none exists yet.
+
+File layout: MAGIC, the header length (uint64 little endian), the JSON
+header, then the arrays. Each array is aligned to ALIGNMENT bytes, at an
+offset the header records.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from django.conf import settings
+
+from .cache_namespaces import CATALOG, versions_persist
+from .facets import MIN_REBUILD_INTERVAL, FacetIndex
+from .scoring import PostCatalog
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'MLCATSNP'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+POINTER_NAME = 'CURRENT'
+LOCK_NAME = 'build.lock'
+
+ATTRIBUTE_FIELDS = ('shape', 'pattern', 'size')
+MAX_BASE_COLORS = 64  # One bit each in the uint64 color mask
+
+
+def _config(name: str, default):
+    return getattr(settings, 'CATALOG_SNAPSHOT', {}).get(name, default)
+
+
+def snapshot_dir() -> str:
+    """
+    Directory holding the snapshots (per host, shared by its workers). The
+    default is keyed on the database and settings module, so other checkouts
+    or test runs on the same host never publish into it.
+    """
+    directory = _config('DIR', None)
+    if directory:
+        return directory
+    database = settings.DATABASES['default']
+    key = hashlib.blake2b(
+        f"{database.get('HOST', '')}:{database['NAME']}:{settings.SETTINGS_MODULE}".encode(), digest_size=6
+    ).hexdigest()
+    return os.path.join(tempfile.gettempdir(), f'missland-catalog-{key}')
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+# --- Writing ---
+
+def write_snapshot(directory: str, rows: Sequence[Sequence], catalog_version: Optional[int] = None) -> str:
+    """
+    Write a snapshot and make it the current one.
+
+    Args:
+        directory: Snapshot directory (created if missing)
+        rows: (id, shape, pattern, size, colors, base_colors, views_count,
+            saves_count, created_at) tuples, newest post first
+        catalog_version: CATALOG namespace version the rows were read at
+
+    Returns:
+        Path of the new snapshot file
+    """
+    catalog = PostCatalog.from_rows((*row[:5], *row[6:]) for row in rows)
+
+    values = {}
+    arrays = {
+        'ids': catalog.ids,
+        'features': catalog.features,
+        'views': catalog.views,
+        'saves': catalog.saves,
+        'popularity': PostCatalog.popularity(catalog.views, catalog.saves),
+        'created_us': catalog.created_us,
+    }
+    for position, field in enumerate(ATTRIBUTE_FIELDS, start=1):
+        values[field] = sorted({row[position].lower() for row in rows if row[position]})
+        code_of = {value: code for code, value in enumerate(values[field], start=1)}
+        arrays[f'{field}_codes'] = np.fromiter(
+            (code_of[row[position].lower()] if row[position] else 0 for row in rows), dtype=np.uint16, count=len(rows)
+        )
+
+    values['color'] = sorted({color for row in rows for color in row[5] or []})
+    if len(values['color']) > MAX_BASE_COLORS:
+        raise ValueError(f"More than {MAX_BASE_COLORS} base colors do not fit the color mask")
+    bit_of = {color: 1 << bit for bit, color in enumerate(values['color'])}
+    arrays['color_mask'] = np.fromiter(
+        (sum(bit_of[color] for color in set(row[5] or [])) for row in rows), dtype=np.uint64, count=len(rows)
+    )
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        layout[name] = [array.dtype.str, list(array.shape), offset]
+        offset += array.nbytes
+    header = json.dumps({
+        'format': FORMAT_VERSION,
+        'catalog_version': catalog_version,
+        'built_at': time.time(),
+        'count': len(rows),
+        'columns': catalog.columns,
+        'values': values,
+        'arrays': layout,
+    }).encode()
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    os.makedirs(directory, exist_ok=True)
+    name = f"catalog-{time.time_ns()}.bin"
+    path = os.path.join(directory, name)
+    with open(f"{path}.tmp", 'wb') as snapshot_file:
+        snapshot_file.write(MAGIC + len(header).to_bytes(8, 'little') + header)
+        for array_name, array in arrays.items():
+            snapshot_file.seek(data_start + layout[array_name][2])
+            snapshot_file.write(np.ascontiguousarray(array).tobytes())
+        # Empty trailing arrays write nothing, but their offsets must still lie inside the file
+        snapshot_file.truncate(data_start + _align(offset))
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    os.replace(f"{path}.tmp", path)
+
+    _write_pointer(directory, name)
+    _remove_old_snapshots(directory, keep=_config('KEEP', 2))
+    return path
+
+
+def build_snapshot(directory: Optional[str] = None) -> str:
+    """Read the catalog from the database and publish it as the current snapshot."""
+    from .models import Post
+
+    catalog_version = CATALOG.version()
+    rows = list(Post.objects.order_by('-created_at', '-id').values_list(
+        'id', 'shape', 'pattern', 'size', 'colors', 'base_colors', 'views_count', 'saves_count', 'created_at'
+    ).iterator(chunk_size=5000))
+    return write_snapshot(directory or snapshot_dir(), rows, catalog_version)
+
+
+def _write_pointer(directory: str, name: str):
+    temporary = os.path.join(directory, f"{POINTER_NAME}.{os.getpid()}.tmp")
+    with open(temporary, 'w') as pointer_file:
+        pointer_file.write(name)
+    os.replace(temporary, os.path.join(directory, POINTER_NAME))
+
+
+def _read_pointer(directory: str) -> Optional[str]:
+    try:
+        with open(os.path.join(directory, POINTER_NAME)) as pointer_file:
+            return pointer_file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _remove_old_snapshots(directory: str, keep: int):
+    # Names embed the build time, so they sort oldest first
+    snapshots = sorted(name for name in os.listdir(directory)
+                       if name.startswith('catalog-') and name.endswith('.bin'))
+    for name in snapshots[:-keep] if keep > 0 else snapshots:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+# --- Reading ---
+
+class CatalogSnapshot:
+    """
+    A mapped snapshot file. The scoring catalog and facet index are built
+    lazily on top of the mapped arrays; both only read them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as snapshot_file:
+            self._mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        header_length = int.from_bytes(self._mmap[len(MAGIC):len(MAGIC) + 8], 'little')
+        header_start = len(MAGIC) + 8
+        header = json.loads(self._mmap[header_start:header_start + header_length])
+        if header['format'] != FORMAT_VERSION:
+            raise ValueError(f"{path} has snapshot format {header['format']}, expected {FORMAT_VERSION}")
+
+        self.catalog_version = header['catalog_version']
+        self.built_at = header['built_at']
+        self.columns = [tuple(column) if column is not None else None for column in header['columns']]
+        self.values: Dict[str, List[str]] = header['values']
+
+        data_start = _align(header_start + header_length)
+        self.arrays: Dict[str, np.ndarray] = {}
+        for name, (dtype, shape, offset) in header['arrays'].items():
+            count = int(np.prod(shape))
+            self.arrays[name] = np.frombuffer(
+                self._mmap, dtype=np.dtype(dtype), count=count, offset=data_start + offset
+            ).reshape(shape)
+
+        self._catalog: Optional[PostCatalog] = None
+        self._facet_index: Optional[FacetIndex] = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.arrays['ids'])
+
+    @property
+    def catalog(self) -> PostCatalog:
+        if self._catalog is None:
+            with self._lock:
+                if self._catalog is None:
+                    arrays = self.arrays
+                    self._catalog = PostCatalog(
+                        arrays['ids'], arrays['features'], self.columns, arrays['views'], arrays['saves'],
+                        arrays['created_us'], popularity=arrays['popularity'],
+                    )
+        return self._catalog
+
+    @property
+    def facet_index(self) -> FacetIndex:
+        if self._facet_index is None:
+            with self._lock:
+                if self._facet_index is None:
+                    self._facet_index = FacetIndex.from_positions(
+                        self.arrays['ids'], self.arrays['created_us'], self._facet_positions(),
+                        version=self.catalog_version,
+                    )
+        return self._facet_index
+
+    def _facet_positions(self) -> Dict[str, Dict[str, np.ndarray]]:
+        positions = {}
+        for field in ATTRIBUTE_FIELDS:
+            codes = self.arrays[f'{field}_codes']
+            positions[field] = {
+                value: np.flatnonzero(codes == code) for code, value in enumerate(self.values[field], start=1)
+            }
+        color_mask = self.arrays['color_mask']
+        positions['color'] = {
+            color: np.flatnonzero(color_mask & np.uint64(1 << bit)) for bit, color in enumerate(self.values['color'])
+        }
+        return positions
+
+    def is_stale(self) -> bool:
+        """
+        A snapshot behind the CATALOG version is only replaced once it is
+        MIN_REBUILD_INTERVAL seconds old, so a burst of post edits costs one
+        rebuild. Until then it is served as is, even in the worker that made
+        the change: facet filters and scoring can miss the edit for up to
+        MIN_REBUILD_INTERVAL + CHECK_INTERVAL seconds, like the per-process
+        facet index (core.facets).
+        """
+        age = time.time() - self.built_at
+        if age >= getattr(settings, 'RECOMMENDATION_CATALOG_TTL', 300):
+            return True
+        if not versions_persist():
+            # The version changes on every read without a shared cache; rely on the TTL alone
+            return False
+        return self.catalog_version != CATALOG.version() and age >= MIN_REBUILD_INTERVAL
+
+
+_snapshot: Optional[CatalogSnapshot] = None
+_checked_at = 0.0
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot() -> Optional[CatalogSnapshot]:
+    """
+    Return the current shared snapshot, mapping a newer one or rebuilding a
+    stale one when due. None when snapshots are disabled or none could be
+    loaded yet, in which case callers build their own structures.
+    """
+    global _snapshot, _checked_at
+    if not _config('ENABLED', True):
+        return None
+
+    interval = _config('CHECK_INTERVAL', 2)
+    if _snapshot is not None and time.monotonic() - _checked_at < interval:
+        return _snapshot
+
+    with _snapshot_lock:
+        if _snapshot is not None and time.monotonic() - _checked_at < interval:
+            return _snapshot
+        try:
+            _snapshot = _refresh(_snapshot)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Catalog snapshot unavailable, using per-process structures: {e}")
+        _checked_at = time.monotonic()
+        return _snapshot
+
+
+def _refresh(current: Optional[CatalogSnapshot]) -> Optional[CatalogSnapshot]:
+    directory = snapshot_dir()
+    name = _read_pointer(directory)
+    if current is not None and name == os.path.basename(current.path):
+        snapshot = current
+    elif name:
+        try:
+            snapshot = CatalogSnapshot(os.path.join(directory, name))
+        except (OSError, ValueError) as e:
+            # A missing or unreadable current file is treated as stale, so it gets replaced
+            logger.warning(f"Rebuilding unreadable catalog snapshot {name}: {e}")
+            snapshot = None
+    else:
+        snapshot = None
+
+    if snapshot is None or snapshot.is_stale():
+        name = _build_once(directory, seen_name=name)
+        if name is not None and (snapshot is None or name != os.path.basename(snapshot.path)):
+            snapshot = CatalogSnapshot(os.path.join(directory, name))
+    return snapshot
+
+
+def _build_once(directory: str, seen_name: Optional[str]) -> Optional[str]:
+    """
+    Build a snapshot unless another worker is already doing so (or just did).
+
+    Returns:
+        Name of the current snapshot afterwards
+    """
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, LOCK_NAME), 'a') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return seen_name
+        try:
+            name = _read_pointer(directory)
+            if name == seen_name:
+                start = time.monotonic()
+                name = os.path.basename(build_snapshot(directory))
+                logger.info(f"Built catalog snapshot {name} in {time.monotonic() - start:.2f}s")
+            return name
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -37,8 +37,8 @@ def extract_filters_from_response(response_text: str) -> dict:
     filters = {}
     if keywords.get('shape'):
         filters['shape'] = keywords['shape']
-    if keywords.get('color'):
-        filters['colors'] = [keywords['color']]  # Note: colors is an array
+    if keywords.get('colors'):
+        filters['colors'] = keywords['colors']  # Every color the answer mentions
     if keywords.get('pattern'):
         filters['pattern'] = keywords['pattern']
     if keywords.get('size'):
@@ -0,0 +1,275 @@
+"""
+Sparse user x post interaction model for collaborative filtering.
+
+Saves (collection memberships) and try-ons are held as a CSR matrix keyed by
+user plus its CSC transpose keyed by post, so "users who saved these posts"
+and "posts those users saved" are a handful of array slices instead of a
+many-way join. Changes made in this worker are kept in small delta sets on
+top of the last bulk snapshot until the next rebuild folds them in.
+
+Rebuilds run outside requests: schedule the rebuild_interaction_matrix
+command (e.g. every few minutes from cron); a worker that finds no fresh
+snapshot also starts one on a background thread.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+SNAPSHOT_CACHE_KEY = 'collaborative:matrix'
+SNAPSHOT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Held while one process rebuilds the matrix, so workers don't all rebuild at once
+REBUILD_LOCK_KEY = 'collaborative:rebuild_lock'
+REBUILD_LOCK_TIMEOUT = 60 * 10
+
+logger = logging.getLogger(__name__)
+
+
+def _compress(rows: np.ndarray, cols: np.ndarray, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Build an (indptr, indices) pair for pairs already sorted by `rows`."""
+    counts = np.bincount(np.searchsorted(keys, rows), minlength=len(keys))
+    indptr = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, cols
+
+
+class InteractionMatrix:
+    """
+    User x post interaction matrix.
+
+    Rows and columns are addressed by database ID; `user_ids` and `post_ids`
+    are the sorted IDs that own a row/column in the snapshot.
+    """
+
+    _ARRAYS = ('user_ids', 'user_indptr', 'user_indices', 'post_ids', 'post_indptr', 'post_indices')
+
+    def __init__(self, user_ids: np.ndarray, post_ids: np.ndarray):
+        pairs = np.unique(np.column_stack([
+            np.asarray(user_ids, dtype=np.int64), np.asarray(post_ids, dtype=np.int64)
+        ]).reshape(-1, 2), axis=0)
+
+        # CSR by user (np.unique sorted the pairs by user, then post)
+        self.user_ids = np.unique(pairs[:, 0])
+        self.user_indptr, self.user_indices = _compress(pairs[:, 0], pairs[:, 1], self.user_ids)
+
+        # CSC by post
+        by_post = pairs[np.lexsort((pairs[:, 0], pairs[:, 1]))]
+        self.post_ids = np.unique(by_post[:, 1])
+        self.post_indptr, self.post_indices = _compress(by_post[:, 1], by_post[:, 0], self.post_ids)
+
+        self._added_items: Dict[int, Set[int]] = defaultdict(set)
+        self._removed_items: Dict[int, Set[int]] = defaultdict(set)
+        self._added_users: Dict[int, Set[int]] = defaultdict(set)
+        self._removed_users: Dict[int, Set[int]] = defaultdict(set)
+        self.built_at = time.monotonic()
+
+    @property
+    def nnz(self) -> int:
+        return len(self.user_indices)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self._ARRAYS)
+
+    @staticmethod
+    def _slice(keys, indptr, indices, key) -> np.ndarray:
+        position = np.searchsorted(keys, key)
+        if position < len(keys) and keys[position] == key:
+            return indices[indptr[position]:indptr[position + 1]]
+        return indices[:0]
+
+    @staticmethod
+    def _apply_delta(base: np.ndarray, added: Set[int], removed: Set[int]) -> np.ndarray:
+        if not added and not removed:
+            return base
+        merged = (set(base.tolist()) - removed) | added
+        return np.fromiter(merged, dtype=np.int64, count=len(merged))
+
+    def items(self, user_id: int) -> np.ndarray:
+        """Post IDs the user has interacted with."""
+        base = self._slice(self.user_ids, self.user_indptr, self.user_indices, user_id)
+        return self._apply_delta(base, self._added_items.get(user_id, set()), self._removed_items.get(user_id, set()))
+
+    def users(self, post_id: int) -> np.ndarray:
+        """User IDs that have interacted with the post."""
+        base = self._slice(self.post_ids, self.post_indptr, self.post_indices, post_id)
+        return self._apply_delta(base, self._added_users.get(post_id, set()), self._removed_users.get(post_id, set()))
+
+    def add(self, user_id: int, post_id: int):
+        self._removed_items[user_id].discard(post_id)
+        self._removed_users[post_id].discard(user_id)
+        self._added_items[user_id].add(post_id)
+        self._added_users[post_id].add(user_id)
+
+    def discard(self, user_id: int, post_id: int):
+        self._added_items[user_id].discard(post_id)
+        self._added_users[post_id].discard(user_id)
+        self._removed_items[user_id].add(post_id)
+        self._removed_users[post_id].add(user_id)
+
+    def co_occurrences(self, post_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Item-item co-occurrence counts for a post.
+
+        Returns:
+            (post_ids, counts): every other post saved by at least one user
+            who saved `post_id`, with the number of such users
+        """
+        users = self.users(post_id)
+        if not len(users):
+            return users, users
+        neighbours = np.concatenate([self.items(user_id) for user_id in users.tolist()])
+        post_ids, counts = np.unique(neighbours, return_counts=True)
+        keep = post_ids != post_id
+        return post_ids[keep], counts[keep]
+
+    def similar_users(self, user_id: int, min_common: int = 2, limit: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Users sharing at least `min_common` posts with the user.
+
+        Returns:
+            (user_ids, common_counts), most overlap first
+        """
+        items = self.items(user_id)
+        if not len(items):
+            return items, items
+        co_users = np.concatenate([self.users(post_id) for post_id in items.tolist()])
+        user_ids, common = np.unique(co_users, return_counts=True)
+        keep = (user_ids != user_id) & (common >= min_common)
+        user_ids, common = user_ids[keep], common[keep]
+        order = np.lexsort((user_ids, -common))[:limit]
+        return user_ids[order], common[order]
+
+    def recommend(self, user_id: int, limit: int = 50, min_common: int = 2, neighbours: int = 20) -> List[int]:
+        """
+        Posts saved by the user's nearest neighbours that the user has not
+        saved, ranked by how much overlap the recommending users have.
+        """
+        similar, common = self.similar_users(user_id, min_common=min_common, limit=neighbours)
+        if not len(similar):
+            return []
+
+        rows = [self.items(other_id) for other_id in similar.tolist()]
+        candidates = np.concatenate(rows)
+        votes = np.repeat(common.astype(np.float64), [len(row) for row in rows])
+
+        post_ids, inverse = np.unique(candidates, return_inverse=True)
+        scores = np.bincount(inverse, weights=votes)
+        keep = ~np.isin(post_ids, self.items(user_id))
+        post_ids, scores = post_ids[keep], scores[keep]
+
+        order = np.lexsort((-post_ids, -scores))[:limit]
+        return post_ids[order].tolist()
+
+    def to_snapshot(self) -> dict:
+        snapshot = {name: getattr(self, name) for name in self._ARRAYS}
+        snapshot['published_at'] = time.time()
+        return snapshot
+
+    @classmethod
+    def from_snapshot(cls, snapshot: dict) -> 'InteractionMatrix':
+        matrix = cls.__new__(cls)
+        for name in cls._ARRAYS:
+            setattr(matrix, name, snapshot[name])
+        matrix._added_items = defaultdict(set)
+        matrix._removed_items = defaultdict(set)
+        matrix._added_users = defaultdict(set)
+        matrix._removed_users = defaultdict(set)
+        matrix.built_at = time.monotonic()
+        return matrix
+
+    @classmethod
+    def from_database(cls) -> 'InteractionMatrix':
+        """Build the matrix from collection memberships and try-ons."""
+        from .models import Collection, TryOn
+
+        saves = Collection.posts.through.objects.order_by().values_list('collection__user_id', 'post_id')
+        try_ons = TryOn.objects.order_by().values_list('user_id', 'post_id')
+        pairs = np.fromiter(
+            (value for pair in saves.union(try_ons).iterator() for value in pair),
+            dtype=np.int64
+        ).reshape(-1, 2)
+        return cls(pairs[:, 0], pairs[:, 1])
+
+
+_matrix: Optional[InteractionMatrix] = None
+_matrix_lock = threading.Lock()
+_rebuilding = threading.Event()
+
+
+def rebuild_interaction_matrix() -> InteractionMatrix:
+    """Rebuild the matrix from the database and publish it for other workers."""
+    global _matrix
+    matrix = InteractionMatrix.from_database()
+    cache.set(SNAPSHOT_CACHE_KEY, matrix.to_snapshot(), timeout=SNAPSHOT_CACHE_TIMEOUT)
+    _matrix = matrix
+    return matrix
+
+
+def _rebuild_in_background():
+    """
+    Rebuild and publish the matrix on a daemon thread, unless this process
+    or another one holding the cache lock is already doing it.
+    """
+    if _rebuilding.is_set() or not cache.add(REBUILD_LOCK_KEY, True, timeout=REBUILD_LOCK_TIMEOUT):
+        return
+    _rebuilding.set()
+
+    def run():
+        from django.db import close_old_connections
+        try:
+            rebuild_interaction_matrix()
+        except Exception as e:
+            logger.error(f"Interaction matrix rebuild failed: {e}")
+        finally:
+            cache.delete(REBUILD_LOCK_KEY)
+            _rebuilding.clear()
+            close_old_connections()
+
+    threading.Thread(target=run, name='interaction-matrix-rebuild', daemon=True).start()
+
+
+def get_interaction_matrix() -> Optional[InteractionMatrix]:
+    """
+    Return this worker's matrix, reloading it from the published snapshot
+    once it is older than COLLABORATIVE_MATRIX_TTL seconds.
+
+    The matrix is never built from the database on the calling (request)
+    thread: the rebuild_interaction_matrix command publishes it, and a
+    missing or outdated snapshot is rebuilt in the background meanwhile.
+    Until then the previous matrix is kept, or None is returned on a cold
+    start.
+    """
+    global _matrix
+    ttl = getattr(settings, 'COLLABORATIVE_MATRIX_TTL', 600)
+    matrix = _matrix
+    if matrix is not None and time.monotonic() - matrix.built_at < ttl:
+        return matrix
+
+    with _matrix_lock:
+        if _matrix is None or time.monotonic() - _matrix.built_at >= ttl:
+            snapshot = cache.get(SNAPSHOT_CACHE_KEY)
+            if snapshot is None or time.time() - snapshot['published_at'] >= ttl:
+                _rebuild_in_background()
+            if snapshot is not None:
+                _matrix = InteractionMatrix.from_snapshot(snapshot)
+        return _matrix
+
+
+def record_interaction(user_id: int, post_id: int):
+    """Apply a new save or try-on to this worker's matrix, if it is loaded."""
+    if _matrix is not None:
+        _matrix.add(user_id, post_id)
+
+
+def remove_interaction(user_id: int, post_id: int):
+    """Drop a user/post pair once the user no longer saves or tried on the post."""
+    if _matrix is not None:
+        _matrix.discard(user_id, post_id)
@@ -114,6 +114,14 @@ COLOR_SIMPLIFICATION_MAP = {
 
 }
 
+
+def simplify_colors(colors) -> list:
+    """Map a post's color variants to its sorted, de-duplicated base colors."""
+    if not isinstance(colors, list):
+        return []
+    return sorted({COLOR_SIMPLIFICATION_MAP.get(color, color) for color in colors if isinstance(color, str)})
+
+
 # Color families for similarity checking
 COLOR_FAMILIES = [
     {'red', 'maroon', 'crimson', 'burgundy'},
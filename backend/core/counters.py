@@ -0,0 +1,184 @@
+"""
+Buffered engagement counters for posts.
+
+Page views and saves used to issue an `UPDATE ... SET views_count =
+views_count + 1` per request, which serialises every request for a popular
+post on the same row lock. Increments are now accumulated (with HINCRBY in
+Redis, or in this worker's memory) and a periodic flusher applies them with
+one UPDATE per batch of posts.
+"""
+
+import logging
+import threading
+from collections import Counter
+from typing import Dict
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+
+from .trending import record_engagement
+from .write_behind import PeriodicFlusher, redis_connection
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ('views_count', 'saves_count')
+
+# PostEngagementHourly column each counter is rolled up into
+ROLLUP_FIELDS = {'views_count': 'views', 'saves_count': 'saves'}
+
+REDIS_KEY_PREFIX = 'counters:post'
+
+FLUSH_BATCH_SIZE = 500
+
+
+def _config(name: str, default):
+    return getattr(settings, 'POST_COUNTERS', {}).get(name, default)
+
+
+class PostCounterBuffer:
+    """
+    Pending per-post counter deltas.
+
+    Usage:
+        post_counters.increment(post.id, 'views_count')
+        post_counters.flush()  # normally done by the background flusher
+    """
+
+    def __init__(self):
+        self._pending: Dict[str, Counter] = {field: Counter() for field in COUNTER_FIELDS}
+        self._lock = threading.Lock()
+        self._flusher = PeriodicFlusher('post-counters', self.flush, _config('FLUSH_INTERVAL', 10))
+
+    def _redis(self):
+        return redis_connection() if _config('USE_CACHE', False) else None
+
+    @property
+    def shared(self) -> bool:
+        """Whether deltas are buffered in Redis, visible to every process, rather than in this one."""
+        return self._redis() is not None
+
+    @staticmethod
+    def _redis_key(field: str) -> str:
+        return f"{REDIS_KEY_PREFIX}:{field}"
+
+    def increment(self, post_id: int, field: str, amount: int = 1):
+        """
+        Add `amount` (may be negative) to a post counter.
+
+        Args:
+            post_id: ID of the post
+            field: 'views_count' or 'saves_count'
+            amount: Delta to apply
+        """
+        if field not in COUNTER_FIELDS:
+            raise ValueError(f"Unknown post counter: {field}")
+
+        redis = self._redis()
+        if redis is not None:
+            redis.hincrby(self._redis_key(field), post_id, amount)
+        else:
+            with self._lock:
+                self._pending[field][post_id] += amount
+
+        self._flusher.ensure_started()
+
+    def increment_many(self, field: str, deltas: Dict[int, int]):
+        """
+        Add several per-post deltas to one counter in a single round trip.
+
+        Args:
+            field: 'views_count' or 'saves_count'
+            deltas: {post_id: delta}
+        """
+        if field not in COUNTER_FIELDS:
+            raise ValueError(f"Unknown post counter: {field}")
+        deltas = {post_id: amount for post_id, amount in deltas.items() if amount}
+        if not deltas:
+            return
+
+        redis = self._redis()
+        if redis is not None:
+            pipeline = redis.pipeline(transaction=False)
+            for post_id, amount in deltas.items():
+                pipeline.hincrby(self._redis_key(field), post_id, amount)
+            pipeline.execute()
+        else:
+            with self._lock:
+                self._pending[field].update(deltas)
+
+        self._flusher.ensure_started()
+
+    def drain(self) -> Dict[str, Dict[int, int]]:
+        """Remove and return every pending delta, grouped by counter field."""
+        with self._lock:
+            pending, self._pending = self._pending, {field: Counter() for field in COUNTER_FIELDS}
+
+        redis = self._redis()
+        if redis is not None:
+            # MULTI/EXEC, so increments landing mid-drain go to the next flush
+            pipeline = redis.pipeline()
+            for field in COUNTER_FIELDS:
+                pipeline.hgetall(self._redis_key(field))
+                pipeline.delete(self._redis_key(field))
+            results = pipeline.execute()
+            for field, values in zip(COUNTER_FIELDS, results[::2]):
+                for post_id, amount in values.items():
+                    pending[field][int(post_id)] += int(amount)
+
+        return {field: {post_id: amount for post_id, amount in deltas.items() if amount}
+                for field, deltas in pending.items()}
+
+    def flush(self) -> int:
+        """
+        Write pending deltas to the database. If the write fails the deltas
+        are put back so the next flush can retry them.
+
+        Returns:
+            Number of posts updated
+        """
+        deltas = self.drain()
+        post_ids = sorted(set().union(*(field_deltas.keys() for field_deltas in deltas.values())))
+        if not post_ids:
+            return 0
+
+        try:
+            with transaction.atomic():
+                apply_counter_deltas(post_ids, deltas)
+                record_engagement(_rollup_deltas(deltas))
+        except Exception:
+            for field, field_deltas in deltas.items():
+                for post_id, amount in field_deltas.items():
+                    self.increment(post_id, field, amount)
+            raise
+
+        logger.debug(f"Flushed counters for {len(post_ids)} posts")
+        return len(post_ids)
+
+
+def _rollup_deltas(deltas: Dict[str, Dict[int, int]]) -> Dict[int, Dict[str, int]]:
+    rollup: Dict[int, Dict[str, int]] = {}
+    for field, field_deltas in deltas.items():
+        for post_id, amount in field_deltas.items():
+            rollup.setdefault(post_id, {})[ROLLUP_FIELDS[field]] = amount
+    return rollup
+
+
+def apply_counter_deltas(post_ids, deltas: Dict[str, Dict[int, int]]):
+    """Apply deltas with one UPDATE ... CASE statement per batch of posts."""
+    from .models import Post
+
+    with transaction.atomic():
+        # Sorted IDs keep row lock order consistent across concurrent flushes
+        for start in range(0, len(post_ids), FLUSH_BATCH_SIZE):
+            batch = post_ids[start:start + FLUSH_BATCH_SIZE]
+            updates = {}
+            for field, field_deltas in deltas.items():
+                whens = [When(pk=post_id, then=Value(field_deltas[post_id]))
+                         for post_id in batch if post_id in field_deltas]
+                if whens:
+                    updates[field] = F(field) + Case(*whens, default=Value(0), output_field=models.IntegerField())
+            Post.objects.filter(pk__in=batch).update(**updates)
+
+
+post_counters = PostCounterBuffer()
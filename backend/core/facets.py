@@ -0,0 +1,166 @@
+"""
+In-memory bitmap index over the explore filter attributes.
+
+Posts are numbered newest first, and every shape, pattern, size and base
+color value keeps a bitmap (a Python int, bit i = i-th newest post) of the
+posts that have it. Any filter combination is then a handful of AND/OR
+operations on a few kilobytes of integers, the matching posts come out
+already in feed order, and counts for every filter option are popcounts.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from .cache_namespaces import CATALOG, versions_persist
+from .scoring import to_epoch_us
+
+FACET_FIELDS = ('shape', 'pattern', 'size', 'color')
+
+# Minimum seconds between rebuilds, so a burst of post edits (or a cache that
+# cannot hold the version counter, like DummyCache) doesn't rebuild per request
+MIN_REBUILD_INTERVAL = 5
+
+# A filter constraint: (field, values) matches posts having any of the values.
+# Constraints are combined with AND.
+Constraint = Tuple[str, Set[str]]
+
+
+class FacetIndex:
+    """Per-value bitmaps of post positions, newest post first."""
+
+    def __init__(self, rows: Iterable[tuple], version: Optional[int] = None):
+        """Build from (id, shape, pattern, size, base_colors, created_at) rows, newest first."""
+        ids, created_us = [], []
+        positions: Dict[str, Dict[str, List[int]]] = {field: {} for field in FACET_FIELDS}
+        for position, (post_id, shape, pattern, size, base_colors, created_at) in enumerate(rows):
+            ids.append(post_id)
+            created_us.append(to_epoch_us(created_at))
+            for field, value in (('shape', shape), ('pattern', pattern), ('size', size)):
+                if value:
+                    positions[field].setdefault(value.lower(), []).append(position)
+            for color in base_colors or []:
+                positions['color'].setdefault(color, []).append(position)
+        self._build(np.asarray(ids, dtype=np.int64), np.asarray(created_us, dtype=np.int64), positions, version)
+
+    @classmethod
+    def from_positions(cls, ids: np.ndarray, created_us: np.ndarray, positions: Dict[str, Dict[str, np.ndarray]],
+                       version: Optional[int] = None) -> 'FacetIndex':
+        """
+        Build from post IDs and creation times (newest first) and, per field
+        and value, the positions of the posts having it (e.g. from a catalog
+        snapshot).
+        """
+        index = cls.__new__(cls)
+        index._build(ids, created_us, positions, version)
+        return index
+
+    def _build(self, ids: np.ndarray, created_us: np.ndarray, positions, version: Optional[int]):
+        self.ids = ids
+        self.created_us = created_us
+        self.bitmaps = {
+            field: {value: self._to_bitmap(value_positions) for value, value_positions in values.items()}
+            for field, values in positions.items()
+        }
+        self.all = (1 << len(ids)) - 1
+        self.version = version
+        self.built_at = time.monotonic()
+
+    def _to_bitmap(self, positions: List[int]) -> int:
+        bits = np.zeros(len(self.ids), dtype=np.uint8)
+        bits[positions] = 1
+        return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+
+    @classmethod
+    def load(cls) -> 'FacetIndex':
+        from .models import Post
+
+        version = CATALOG.version()
+        rows = Post.objects.order_by('-created_at', '-id').values_list(
+            'id', 'shape', 'pattern', 'size', 'base_colors', 'created_at'
+        ).iterator(chunk_size=5000)
+        return cls(rows, version=version)
+
+    def _constraint_bitmap(self, field: str, values: Set[str]) -> int:
+        field_bitmaps = self.bitmaps[field]
+        bitmap = 0
+        for value in values:
+            bitmap |= field_bitmaps.get(value.lower(), 0)
+        return bitmap
+
+    def match(self, constraints: List[Constraint]) -> int:
+        """Bitmap of the posts satisfying every constraint."""
+        bitmap = self.all
+        for field, values in constraints:
+            bitmap &= self._constraint_bitmap(field, values)
+        return bitmap
+
+    def _positions(self, bitmap: int) -> np.ndarray:
+        raw = np.frombuffer(bitmap.to_bytes((len(self.ids) + 7) // 8, 'little'), dtype=np.uint8)
+        return np.flatnonzero(np.unpackbits(raw, bitorder='little')[:len(self.ids)])
+
+    def post_ids(self, bitmap: int) -> List[int]:
+        """Post IDs in a bitmap, newest first."""
+        if not bitmap:
+            return []
+        return self.ids[self._positions(bitmap)].tolist()
+
+    def listing(self, bitmap: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(post IDs, created_at in epoch microseconds) of the posts in a bitmap, newest first."""
+        positions = self._positions(bitmap) if bitmap else np.zeros(0, dtype=np.int64)
+        return self.ids[positions], self.created_us[positions]
+
+    def counts(self, constraints: List[Constraint]) -> Dict[str, Dict[str, int]]:
+        """
+        Number of matching posts for every option of every facet. Each
+        facet is counted against the other facets' constraints only, so the
+        counts show what selecting that option would return.
+        """
+        counts = {}
+        for field in FACET_FIELDS:
+            base = self.match([constraint for constraint in constraints if constraint[0] != field])
+            counts[field] = {
+                value: (base & bitmap).bit_count()
+                for value, bitmap in sorted(self.bitmaps[field].items())
+            }
+        return counts
+
+
+_index: Optional[FacetIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_facet_index() -> FacetIndex:
+    """
+    Return the facet index of the shared snapshot (see core.catalog_snapshot),
+    or else this process's own index, rebuilt after any post has been
+    created, edited or deleted (tracked by the CATALOG namespace).
+    """
+    from .catalog_snapshot import get_snapshot
+
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        return snapshot.facet_index
+
+    global _index
+    version = CATALOG.version()
+    if not _is_stale(_index, version):
+        return _index
+
+    with _index_lock:
+        if _is_stale(_index, version):
+            _index = FacetIndex.load()
+        return _index
+
+
+def _is_stale(index: Optional[FacetIndex], version: int) -> bool:
+    if index is None:
+        return True
+    age = time.monotonic() - index.built_at
+    if not versions_persist():
+        # The version changes on every read without a shared cache; rely on the catalog TTL
+        return age >= getattr(settings, 'RECOMMENDATION_CATALOG_TTL', 300)
+    return index.version != version and age >= MIN_REBUILD_INTERVAL
@@ -0,0 +1,134 @@
+"""
+Per-user For You feed snapshots.
+
+The For You feed used to be a fixed top-100 list cached for five minutes:
+it ended after 100 posts, and each expiry re-ranked everything, reshuffling
+the pages under a scrolling user. A snapshot instead keeps the ordered post
+IDs ranked so far for the user's session. Positions already handed out
+never move; when a client reads close to the end, the next block is ranked
+lazily with everything already in the snapshot excluded and posts seen in
+earlier sessions pushed to the back. Interest updates only re-rank the
+unserved tail, and only once they have drifted enough to matter.
+"""
+
+import math
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .seen_filter import SeenFilter
+
+SNAPSHOT_KEY_PREFIX = 'feed:snapshot:user'
+
+
+def _config(name: str, default):
+    return getattr(settings, 'FOR_YOU_FEED', {}).get(name, default)
+
+
+def interest_similarity(first: Dict[str, float], second: Dict[str, float]) -> float:
+    """Cosine similarity of two interest score dictionaries (1.0 = same direction)."""
+    if not first and not second:
+        return 1.0
+    dot = sum(score * second.get(tag, 0.0) for tag, score in first.items())
+    norms = math.sqrt(sum(s * s for s in first.values())) * math.sqrt(sum(s * s for s in second.values()))
+    return dot / norms if norms else 0.0
+
+
+class FeedSnapshot:
+    """
+    Lazily extended, ordered list of post IDs for one user's feed session.
+
+    Slicing reads positions, ranking more blocks on demand:
+        snapshot = FeedSnapshot.for_user(user)
+        post_ids = snapshot[48:72]
+    """
+
+    def __init__(self, user_id: int, tag_scores: Dict[str, float], post_ids: Optional[List[int]] = None,
+                 served: int = 0, exhausted: bool = False):
+        self.user_id = user_id
+        self.tag_scores = tag_scores
+        self.post_ids = post_ids or []
+        self.served = served
+        self.exhausted = exhausted
+
+    @staticmethod
+    def cache_key(user_id: int) -> str:
+        return f"{SNAPSHOT_KEY_PREFIX}:{user_id}"
+
+    @classmethod
+    def for_user(cls, user, restart: bool = False) -> 'FeedSnapshot':
+        """
+        Load the user's snapshot, starting a new one when there is none (or
+        `restart` is set) and re-ranking its tail if interests have drifted.
+        """
+        from .recommendations import RecommendationEngine
+
+        tag_scores = RecommendationEngine.get_interest_scores(user)
+        stored = None if restart else cache.get(cls.cache_key(user.id))
+        if stored is None:
+            return cls(user.id, tag_scores)
+
+        snapshot = cls(user.id, **stored)
+        if interest_similarity(snapshot.tag_scores, tag_scores) < _config('MIN_INTEREST_SIMILARITY', 0.9):
+            snapshot.rerank(tag_scores)
+        return snapshot
+
+    def rerank(self, tag_scores: Dict[str, float]):
+        """Keep the served prefix and drop the rest, to be ranked again for `tag_scores`."""
+        self.tag_scores = tag_scores
+        self.post_ids = self.post_ids[:self.served]
+        self.exhausted = False
+
+    def extend(self) -> int:
+        """
+        Rank the next block of posts, excluding every post already in the
+        snapshot.
+
+        Returns:
+            Number of posts added
+        """
+        from .recommendations import RecommendationEngine
+
+        max_posts = _config('MAX_POSTS', 2000)
+        block_size = min(_config('BLOCK_SIZE', 100), max_posts - len(self.post_ids))
+        if self.exhausted or block_size <= 0:
+            self.exhausted = True
+            return 0
+
+        # Rank twice the block so posts seen in earlier sessions can be pushed out of it
+        candidates = RecommendationEngine.rank_post_ids(self.tag_scores, block_size * 2, exclude_ids=self.post_ids)
+        block = SeenFilter.load(self.user_id).demote(candidates)[:block_size]
+        self.post_ids.extend(block)
+        if len(block) < block_size:
+            self.exhausted = True
+        return len(block)
+
+    def __len__(self) -> int:
+        return len(self.post_ids)
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self.post_ids[item]
+
+        changed = False
+        stop = item.stop if item.stop is not None else _config('MAX_POSTS', 2000)
+        while len(self.post_ids) < stop and not self.exhausted:
+            self.extend()
+            changed = True
+
+        page = self.post_ids[item]
+        if page:
+            self.served = max(self.served, min(stop, len(self.post_ids)))
+            changed = True
+        if changed:
+            self.save()
+        return page
+
+    def save(self):
+        cache.set(self.cache_key(self.user_id), {
+            'tag_scores': self.tag_scores,
+            'post_ids': self.post_ids,
+            'served': self.served,
+            'exhausted': self.exhausted,
+        }, timeout=_config('SESSION_TIMEOUT', 60 * 30))
@@ -0,0 +1,70 @@
+"""
+Postgres-specific fields and indexes that still migrate on other backends.
+
+Production runs on Postgres. Tests and quick local runs may use SQLite, where
+these fall back to portable equivalents instead of failing at migrate time:
+- PortableArrayField stores the list as JSON text;
+- PortableGinIndex becomes a plain B-tree index.
+Array lookups (e.g. __overlap) only exist on Postgres; array_overlap() builds
+the equivalent filter for either backend.
+"""
+
+import json
+from typing import Iterable
+
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.db import connection
+from django.db.models import Index, Q
+
+
+def _is_postgres(conn) -> bool:
+    return conn.vendor == 'postgresql'
+
+
+class PortableArrayField(ArrayField):
+    """ArrayField on Postgres, a JSON-encoded text column elsewhere."""
+
+    def db_type(self, connection):
+        return super().db_type(connection) if _is_postgres(connection) else 'text'
+
+    def cast_db_type(self, connection):
+        return super().cast_db_type(connection) if _is_postgres(connection) else 'text'
+
+    def get_placeholder(self, value, compiler, connection):
+        return super().get_placeholder(value, compiler, connection) if _is_postgres(connection) else '%s'
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if _is_postgres(connection) or value is None:
+            return value
+        return json.dumps(list(value))
+
+    def from_db_value(self, value, expression, connection):
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
+
+
+class PortableGinIndex(GinIndex):
+    """GIN index on Postgres, a plain index elsewhere."""
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if _is_postgres(schema_editor.connection):
+            return super().create_sql(model, schema_editor, using=using, **kwargs)
+        return Index.create_sql(self, model, schema_editor, **kwargs)
+
+
+def array_overlap(field_name: str, values: Iterable[str]) -> Q:
+    """
+    Filter for rows whose array field shares at least one element with
+    `values`: a GIN-indexed && on Postgres, JSON element matches elsewhere.
+    """
+    values = sorted(values)
+    if _is_postgres(connection):
+        return Q(**{f'{field_name}__overlap': values})
+    query = Q()
+    for value in values:
+        # Elements are stored JSON-quoted, so '"pink"' cannot match inside another color
+        query |= Q(**{f'{field_name}__icontains': json.dumps(value)})
+    return query
@@ -0,0 +1,214 @@
+"""
+Write-behind buffer for user interaction tracking.
+
+The tracking endpoints only append an event here. A periodic flusher merges
+the buffered events per user, drops rapid duplicates (e.g. double clicks),
+and applies the resulting interest deltas as atomic per-tag upserts (see
+core.interests), so concurrent events never overwrite each other and no
+request pays for a database write.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from .interests import add_interests
+from .keyword_extractor import extract_nail_keywords
+from .search_terms import leftover_terms, normalize_query, record_searches, update_user_terms
+from .trending import record_engagement, truncate_to_hour
+from .write_behind import PeriodicFlusher, redis_connection
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY = 'interactions:buffer'
+
+SEARCH_TERM_WEIGHT = 0.5
+
+
+def _config(name: str, default):
+    return getattr(settings, 'INTERACTION_BUFFER', {}).get(name, default)
+
+
+class InteractionBuffer:
+    """
+    Holds tracking events until the next flush.
+
+    Events live in this worker's memory, or in a shared Redis list when
+    INTERACTION_BUFFER['USE_CACHE'] is on and the cache is Redis.
+    """
+
+    def __init__(self):
+        self._events: List[dict] = []
+        self._lock = threading.Lock()
+        self._flusher = PeriodicFlusher('interaction-buffer', self.flush, _config('FLUSH_INTERVAL', 5))
+
+    def _redis(self):
+        return redis_connection() if _config('USE_CACHE', False) else None
+
+    def record(self, user_id: int, interaction_type: str, post_id: Optional[int] = None,
+               query: Optional[str] = None):
+        """
+        Buffer one interaction.
+
+        Args:
+            user_id: ID of the acting user
+            interaction_type: 'view', 'save', 'try_on' or 'search'
+            post_id: Post interacted with (post interactions)
+            query: Raw search text (search interactions)
+        """
+        event = {'user_id': user_id, 'type': interaction_type, 'post_id': post_id,
+                 'query': query, 'ts': time.time()}
+
+        redis = self._redis()
+        if redis is not None:
+            redis.rpush(REDIS_KEY, json.dumps(event))
+        else:
+            with self._lock:
+                self._events.append(event)
+                pending = len(self._events)
+            if pending >= _config('MAX_EVENTS', 500):
+                self.flush()
+
+        self._flusher.ensure_started()
+
+    def drain(self) -> List[dict]:
+        """Remove and return every buffered event."""
+        with self._lock:
+            events, self._events = self._events, []
+
+        redis = self._redis()
+        if redis is not None:
+            pipeline = redis.pipeline()
+            pipeline.lrange(REDIS_KEY, 0, -1)
+            pipeline.delete(REDIS_KEY)
+            raw_events, _ = pipeline.execute()
+            events.extend(json.loads(raw) for raw in raw_events)
+        return events
+
+    def requeue(self, events: List[dict]):
+        """Put drained events back for the next flush (events are re-sorted by time when applied)."""
+        redis = self._redis()
+        if redis is not None:
+            redis.rpush(REDIS_KEY, *(json.dumps(event) for event in events))
+        else:
+            with self._lock:
+                self._events.extend(events)
+
+    def flush(self) -> int:
+        """
+        Apply buffered events to interest profiles. If the write fails the
+        events are put back so the next flush can retry them.
+
+        Returns:
+            Number of events applied after de-duplication
+        """
+        events = self.drain()
+        if not events:
+            return 0
+
+        try:
+            # One transaction, so a retry never applies part of a batch twice
+            with transaction.atomic():
+                return apply_interaction_events(events)
+        except Exception:
+            self.requeue(events)
+            raise
+
+
+def deduplicate_events(events: List[dict]) -> List[dict]:
+    """
+    Drop repeats of the same interaction by the same user within
+    INTERACTION_BUFFER['DEDUPE_WINDOW'] seconds of the last kept one.
+    """
+    window = _config('DEDUPE_WINDOW', 30)
+    last_kept: Dict[tuple, float] = {}
+    kept = []
+    for event in sorted(events, key=lambda e: e['ts']):
+        identity = (event['user_id'], event['type'], event.get('post_id'), event.get('query'))
+        previous = last_kept.get(identity)
+        if previous is not None and event['ts'] - previous < window:
+            continue
+        last_kept[identity] = event['ts']
+        kept.append(event)
+    return kept
+
+
+def apply_interaction_events(events: List[dict]) -> int:
+    """Merge events per user and write the interest deltas in bulk."""
+    from .cache_namespaces import user_recommendations
+    from .models import InterestProfile, Post
+    from .recommendations import RecommendationEngine
+    from django.utils import timezone
+
+    events = deduplicate_events(events)
+
+    post_ids = {event['post_id'] for event in events if event.get('post_id')}
+    posts = Post.objects.only('id', 'shape', 'pattern', 'size', 'colors').in_bulk(post_ids)
+
+    deltas: Dict[int, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    search_terms: Dict[int, Counter] = defaultdict(Counter)
+    searches_by_hour: Dict[datetime, Counter] = defaultdict(Counter)
+    try_ons_by_hour: Dict[datetime, Dict[int, Dict[str, int]]] = defaultdict(dict)
+    for event in events:
+        user_deltas = deltas[event['user_id']]
+        if event['type'] == 'search':
+            # Named shapes, patterns, sizes and colors are interests; other words are
+            # only counted in the user's bounded search-term summary
+            query = event.get('query') or ''
+            keywords, remaining_query = extract_nail_keywords(query)
+            for tag in [keywords['shape'], keywords['pattern'], keywords['size'], *keywords['color_variants']]:
+                if tag:
+                    user_deltas[tag] += SEARCH_TERM_WEIGHT
+            search_terms[event['user_id']].update(leftover_terms(remaining_query))
+            hour = truncate_to_hour(datetime.fromtimestamp(event['ts'], tz=dt_timezone.utc))
+            searches_by_hour[hour][normalize_query(query)] += 1
+            continue
+        post = posts.get(event.get('post_id'))
+        if post is None:
+            continue
+        for tag, delta in RecommendationEngine.interest_deltas(post, event['type']).items():
+            user_deltas[tag] += delta
+        if event['type'] == 'try_on':
+            hour = truncate_to_hour(datetime.fromtimestamp(event['ts'], tz=dt_timezone.utc))
+            counts = try_ons_by_hour[hour].setdefault(post.id, {'try_ons': 0})
+            counts['try_ons'] += 1
+
+    for hour, hour_deltas in try_ons_by_hour.items():
+        record_engagement(hour_deltas, hour=hour)
+    record_searches(searches_by_hour)
+
+    deltas = {user_id: tag_deltas for user_id, tag_deltas in deltas.items() if tag_deltas}
+    search_terms = {user_id: terms for user_id, terms in search_terms.items() if terms}
+    if not deltas and not search_terms:
+        return 0
+
+    # Interest scores are atomic increments; no row has to be read or locked
+    add_interests(deltas)
+
+    if search_terms:
+        now = timezone.now()
+        with transaction.atomic():
+            InterestProfile.objects.bulk_create(
+                [InterestProfile(user_id=user_id) for user_id in search_terms], ignore_conflicts=True
+            )
+            profiles = list(InterestProfile.objects.select_for_update().filter(user_id__in=search_terms))
+            for profile in profiles:
+                profile.search_terms = update_user_terms(profile.search_terms, search_terms[profile.user_id])
+                profile.updated_at = now
+            InterestProfile.objects.bulk_update(profiles, ['search_terms', 'updated_at'], batch_size=500)
+
+    for user_id in deltas:
+        user_recommendations(user_id).invalidate()
+
+    logger.debug(f"Applied {len(events)} interaction events for {len(deltas.keys() | search_terms.keys())} users")
+    return len(events)
+
+
+interaction_buffer = InteractionBuffer()
@@ -0,0 +1,126 @@
+"""
+Per-user interest scores with lazy exponential decay.
+
+An interest counts half as much every INTEREST_DECAY['HALF_LIFE_DAYS'].
+Instead of rewriting every score as time passes, scores are stored in decay
+space: an increment `delta` made at time t is stored as
+
+    delta * 2 ** ((t - era_start) / half_life)
+
+and a stored score is brought back to "now" by multiplying with
+2 ** -((now - era_start) / half_life). Stored scores are therefore plain
+sums, so concurrent updates from several devices are one
+INSERT ... ON CONFLICT DO UPDATE each, in any order, and nothing has to be
+read first.
+
+Eras keep the stored values bounded. Measuring from one fixed epoch would
+let them grow by 2x every half-life without end, until floats overflow.
+Instead, time is cut into eras of ERA_HALF_LIVES half-lives, and each row
+stores its score relative to the start of its own era (the `era` column).
+A stored score is at most 2 ** ERA_HALF_LIVES times the increments added
+in that era.
+- The first upsert in a new era rescales the row's score by
+  2 ** -ERA_HALF_LIVES and moves the row into the new era.
+- A row two or more eras old has decayed by at least 2 ** -ERA_HALF_LIVES,
+  to effectively zero, and its score restarts.
+No periodic rescale job is needed.
+
+Changing HALF_LIFE_DAYS rescales every stored score, so it should only
+change together with a data migration.
+"""
+
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+DECAY_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+# Half-lives per era (26 x 14 days = 364 days with the default half-life)
+ERA_HALF_LIVES = 26
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def _config(name: str, default):
+    return getattr(settings, 'INTEREST_DECAY', {}).get(name, default)
+
+
+def _half_lives(moment: datetime) -> float:
+    """Half-lives elapsed from DECAY_EPOCH to `moment`."""
+    return (moment - DECAY_EPOCH).total_seconds() / (_config('HALF_LIFE_DAYS', 14) * SECONDS_PER_DAY)
+
+
+def era_of(moment: datetime) -> int:
+    return int(_half_lives(moment) // ERA_HALF_LIVES)
+
+
+def decay_factor(moment: datetime, era: Optional[int] = None) -> float:
+    """Weight of an increment made at `moment`, relative to the start of `era` (default: its own era)."""
+    if era is None:
+        era = era_of(moment)
+    return 2.0 ** (_half_lives(moment) - era * ERA_HALF_LIVES)
+
+
+def add_interests(deltas: Dict[int, Dict[str, float]], at: Optional[datetime] = None):
+    """
+    Add interest increments with one atomic upsert per (user, tag).
+
+    Args:
+        deltas: {user_id: {tag: increment}}
+        at: When the increments happened (defaults to now)
+    """
+    from .models import UserInterest
+
+    at = at or timezone.now()
+    era = era_of(timezone.now())
+    factor = decay_factor(at, era)
+    at_value = connection.ops.adapt_datetimefield_value(at)
+    rows = [
+        (user_id, tag, delta * factor, era, at_value)
+        for user_id, tag_deltas in sorted(deltas.items())
+        for tag, delta in sorted(tag_deltas.items()) if delta
+    ]
+    if not rows:
+        return
+
+    table = UserInterest._meta.db_table
+    # One era apart: rescale the older side into the newer era. Further apart: the old score has faded.
+    # The later era wins, so a worker whose clock still reads the previous era can't move a row back.
+    era_step = repr(2.0 ** -ERA_HALF_LIVES)
+    sql = (
+        f"INSERT INTO {table} (user_id, tag, score, era, updated_at) VALUES (%s, %s, %s, %s, %s) "
+        f"ON CONFLICT (user_id, tag) DO UPDATE SET "
+        f"score = CASE "
+        f"WHEN {table}.era = EXCLUDED.era THEN {table}.score + EXCLUDED.score "
+        f"WHEN {table}.era = EXCLUDED.era - 1 THEN {table}.score * {era_step} + EXCLUDED.score "
+        f"WHEN {table}.era = EXCLUDED.era + 1 THEN {table}.score + EXCLUDED.score * {era_step} "
+        f"WHEN {table}.era > EXCLUDED.era THEN {table}.score "
+        f"ELSE EXCLUDED.score END, "
+        f"era = CASE WHEN {table}.era > EXCLUDED.era THEN {table}.era ELSE EXCLUDED.era END, "
+        f"updated_at = EXCLUDED.updated_at"
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def get_interest_scores(user_id: int, now: Optional[datetime] = None) -> Dict[str, float]:
+    """
+    A user's interest scores decayed to `now`.
+
+    Returns:
+        Dictionary of tag -> score, leaving out interests that have faded
+        below INTEREST_DECAY['MIN_SCORE']
+    """
+    from .models import UserInterest
+
+    now = now or timezone.now()
+    min_score = _config('MIN_SCORE', 0.5)
+    scores = {}
+    for tag, stored, era in UserInterest.objects.filter(user_id=user_id).values_list('tag', 'score', 'era'):
+        score = stored / decay_factor(now, era)
+        if score >= min_score:
+            scores[tag] = score
+    return scores
@@ -3,10 +3,15 @@
 """
 Keyword extraction utility for parsing and normalizing nail search queries.
 Maps various synonyms and variants to the canonical forms used by the app.
+
+All variants are compiled into one regex at import time and results are
+memoized per normalized query, since the explore search and the chat
+gateway run every query (and every chat answer) through here.
 """
 
 import re
-from typing import Dict, Optional, Tuple
+from functools import lru_cache
+from typing import Any, Dict, List, Pattern, Tuple
 from .color_constants import COLOR_SIMPLIFICATION_MAP
 
 # ===== CANONICAL OPTIONS FOR YOUR APP =====
@@ -72,6 +77,17 @@ SIZE_NORMALIZATION_MAP = {
 }
 
 
+# Memoized results of extract_nail_keywords, keyed by normalized query
+KEYWORD_CACHE_SIZE = 4096
+
+FIELD_MAPS = (
+    ('color', COLOR_SIMPLIFICATION_MAP),
+    ('shape', SHAPE_NORMALIZATION_MAP),
+    ('pattern', PATTERN_NORMALIZATION_MAP),
+    ('size', SIZE_NORMALIZATION_MAP),
+)
+
+
 def _normalize_text(text: str) -> str:
     """Normalizes text for consistent matching."""
     text = text.lower()
@@ -79,25 +95,55 @@ def _normalize_text(text: str) -> str:
     return re.sub(r'\s+', ' ', text).strip()
 
 
-def _extract_and_remove_keyword(text: str, normalization_map: Dict[str, str]) -> Tuple[Optional[str], str]:
+def _build_keyword_regex() -> Tuple[Pattern, Dict[str, Tuple[str, str]]]:
     """
-    Finds a keyword, returns its canonical form, and removes it from the text.
-    Sorts keys by length to match longer phrases first (e.g., "french tips" before "french").
+    One alternation over every variant of every map, so a query is scanned
+    once instead of once per variant. Variants are normalized like queries
+    ("light_pink" -> "light pink") and tried longest first, so each match is
+    the longest phrase at its position (e.g. "french tips" before "french").
     """
-    sorted_keys = sorted(normalization_map.keys(), key=len, reverse=True)
+    variants: Dict[str, Tuple[str, str]] = {}
+    for field, normalization_map in FIELD_MAPS:
+        for variant, canonical_form in normalization_map.items():
+            variants.setdefault(_normalize_text(variant), (field, canonical_form))
+    alternation = '|'.join(re.escape(variant) for variant in sorted(variants, key=len, reverse=True))
+    return re.compile(r'\b(?:' + alternation + r')\b'), variants
 
-    for variant in sorted_keys:
-        pattern = r'\b' + re.escape(variant) + r'\b'
-        if re.search(pattern, text):
-            canonical_form = normalization_map[variant]
-            # Remove the found variant from the text to get the remainder
-            remaining_text = re.sub(pattern, '', text, count=1).strip()
-            return canonical_form, _normalize_text(remaining_text)
 
-    return None, text
+_KEYWORD_REGEX, _KEYWORD_VARIANTS = _build_keyword_regex()
 
 
-def extract_nail_keywords(query: str) -> Tuple[Dict[str, Optional[str]], str]:
+@lru_cache(maxsize=KEYWORD_CACHE_SIZE)
+def _extract_normalized(normalized_query: str) -> Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[Tuple[str, str], ...], str]:
+    """
+    Single pass over a normalized query. Every color is kept; for the other
+    fields the first mention wins and later ones stay in the remainder.
+    """
+    colors: List[str] = []
+    color_variants: List[str] = []
+    found: Dict[str, str] = {}
+    remainder = []
+    position = 0
+    for match in _KEYWORD_REGEX.finditer(normalized_query):
+        field, canonical_form = _KEYWORD_VARIANTS[match.group()]
+        if field == 'color':
+            if canonical_form not in colors:
+                colors.append(canonical_form)
+            # Spelled like the color names stored on posts ("light pink" -> "light_pink")
+            variant = match.group().replace(' ', '_')
+            if variant not in color_variants:
+                color_variants.append(variant)
+        elif field not in found:
+            found[field] = canonical_form
+        else:
+            continue
+        remainder.append(normalized_query[position:match.start()])
+        position = match.end()
+    remainder.append(normalized_query[position:])
+    return tuple(colors), tuple(color_variants), tuple(found.items()), _normalize_text(' '.join(remainder))
+
+
+def extract_nail_keywords(query: str) -> Tuple[Dict[str, Any], str]:
     """
     Extracts structured keywords from a query and returns the remaining text.
     
@@ -106,20 +152,18 @@ def extract_nail_keywords(query: str) -> Tuple[Dict[str, Optional[str]], str]:
         
     Returns:
         A tuple containing:
-        - A dictionary of extracted keywords (e.g., {'color': 'blue', 'shape': 'coffin', 'size': 'short'}).
+        - A dictionary of extracted keywords (e.g., {'color': 'blue', 'colors': ['blue'],
+          'color_variants': ['navy'], 'shape': 'coffin', 'pattern': None, 'size': 'short'}).
+          'colors' lists the base color of every color mentioned, 'color' is the first
+          of them and 'color_variants' are the color names as written.
         - A string with the remaining text after extraction (e.g., "nails").
     """
-    normalized_query = _normalize_text(query)
-
-    result = {"color": None, "shape": None, "pattern": None, "size": None}
-
-    # Sequentially extract each keyword, updating the query string each time
-    result["color"], normalized_query = _extract_and_remove_keyword(normalized_query, COLOR_SIMPLIFICATION_MAP)
-    result["shape"], normalized_query = _extract_and_remove_keyword(normalized_query, SHAPE_NORMALIZATION_MAP)
-    result["pattern"], normalized_query = _extract_and_remove_keyword(normalized_query, PATTERN_NORMALIZATION_MAP)
-    result["size"], normalized_query = _extract_and_remove_keyword(normalized_query, SIZE_NORMALIZATION_MAP)
+    colors, color_variants, found, remaining_query = _extract_normalized(_normalize_text(query))
 
-    return result, normalized_query
+    result: Dict[str, Any] = {"color": colors[0] if colors else None, "colors": list(colors),
+                              "color_variants": list(color_variants), "shape": None, "pattern": None, "size": None}
+    result.update(found)
+    return result, remaining_query
 
 
 # Example usage for testing
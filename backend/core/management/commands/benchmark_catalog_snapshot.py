@@ -0,0 +1,118 @@
+import datetime
+import gc
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.catalog_snapshot import CatalogSnapshot, write_snapshot
+from core.facets import FacetIndex
+from core.keyword_extractor import SHAPE_OPTIONS, PATTERN_OPTIONS, SIZE_OPTIONS, COLOR_OPTIONS
+from core.scoring import PostCatalog
+
+TAG_SCORES = {'almond': 6.4, 'coffin': 1.2, 'french': 4.8, 'glossy': 0.9, 'short': 2.5, 'pink': 5.3, 'white': 3.1}
+CONSTRAINTS = [('shape', {'almond'}), ('color', {'pink', 'white'})]
+
+
+def _synthetic_rows(size, seed, now):
+    rng = random.Random(seed)
+    rows = []
+    for post_id in range(size, 0, -1):
+        colors = rng.sample(COLOR_OPTIONS, rng.randint(1, 4))
+        rows.append((
+            post_id, rng.choice(SHAPE_OPTIONS), rng.choice(PATTERN_OPTIONS), rng.choice(SIZE_OPTIONS),
+            colors, colors, rng.randint(0, 5000), rng.randint(0, 500),
+            now - datetime.timedelta(minutes=rng.randint(0, 60 * 24 * 365)),
+        ))
+    rows.sort(key=lambda row: (row[8], row[0]), reverse=True)
+    return rows
+
+
+def _memory_kb():
+    """Pss and private (Private_Clean + Private_Dirty) memory of this process, in KB."""
+    fields = {}
+    with open('/proc/self/smaps_rollup') as smaps:
+        for line in smaps:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])
+    return fields['Pss'], fields['Private_Clean'] + fields['Private_Dirty']
+
+
+def _worker(mode, size, seed, now, snapshot_path, barrier, results):
+    gc.collect()
+    pss_before, private_before = _memory_kb()
+
+    if mode == 'private':
+        # What every worker does without a snapshot: load the rows and build its own structures
+        rows = _synthetic_rows(size, seed, now)
+        catalog = PostCatalog.from_rows((*row[:5], *row[6:]) for row in rows)
+        index = FacetIndex((*row[:4], row[5], row[8]) for row in rows)
+        del rows
+    else:
+        snapshot = CatalogSnapshot(snapshot_path)
+        catalog, index = snapshot.catalog, snapshot.facet_index
+
+    top_ids = catalog.top_n(TAG_SCORES, 100, now=now)
+    matches = index.match(CONSTRAINTS).bit_count()
+    gc.collect()
+
+    # Measure while every worker is alive, so shared pages are split between them
+    barrier.wait()
+    pss_after, private_after = _memory_kb()
+    results.put((mode, pss_after - pss_before, private_after - private_before, top_ids, matches))
+    barrier.wait()
+
+
+class Command(BaseCommand):
+    help = ('Measures memory per worker for per-process catalog structures against the shared '
+            'memory-mapped catalog snapshot (Linux only).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10_000, 100_000, 500_000],
+                            help='Catalog sizes to benchmark.')
+        parser.add_argument('--workers', type=int, default=4, help='Worker processes, like gunicorn --workers.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        context = multiprocessing.get_context('fork')
+        workers = options['workers']
+        now = timezone.now()
+
+        for size in options['sizes']:
+            with tempfile.TemporaryDirectory() as directory:
+                start = time.perf_counter()
+                path = write_snapshot(directory, _synthetic_rows(size, options['seed'], now), catalog_version=0)
+                build_time = time.perf_counter() - start
+                gc.collect()
+                self.stdout.write(f"{size:>9,} posts   snapshot: {os.path.getsize(path) / 2 ** 20:7.1f} MB, "
+                                  f"written in {build_time:5.2f}s")
+
+                outcomes = {}
+                for mode in ('private', 'shared'):
+                    barrier, results = context.Barrier(workers), context.Queue()
+                    processes = [
+                        context.Process(target=_worker, args=(mode, size, options['seed'], now, path, barrier, results))
+                        for _ in range(workers)
+                    ]
+                    for process in processes:
+                        process.start()
+                    measurements = [results.get() for _ in processes]
+                    for process in processes:
+                        process.join()
+
+                    pss = sum(m[1] for m in measurements) / workers / 1024
+                    private = sum(m[2] for m in measurements) / workers / 1024
+                    outcomes[mode] = (measurements[0][3], measurements[0][4])
+                    label = 'per-process build' if mode == 'private' else 'mapped snapshot'
+                    self.stdout.write(f"  {label:>17}: {pss:8.1f} MB Pss / {private:8.1f} MB private per worker "
+                                      f"({workers} workers)")
+
+                if outcomes['private'] == outcomes['shared']:
+                    self.stdout.write(self.style.SUCCESS("  identical rankings and facet matches"))
+                else:
+                    self.stdout.write(self.style.ERROR("  rankings or facet matches differ"))
@@ -0,0 +1,50 @@
+import statistics
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from core.collaborative import InteractionMatrix
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the sparse collaborative filtering model on a synthetic interaction log.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--posts', type=int, default=50_000)
+        parser.add_argument('--saves-per-user', type=float, default=20.0,
+                            help='Average number of saved posts per user.')
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        users, posts = options['users'], options['posts']
+
+        # Skewed popularity: a few posts collect most of the saves
+        saves_per_user = rng.poisson(options['saves_per_user'], size=users)
+        user_ids = np.repeat(np.arange(1, users + 1), saves_per_user)
+        post_ids = np.minimum(rng.zipf(1.3, size=len(user_ids)), posts)
+        self.stdout.write(f"Generated {len(user_ids):,} interactions for {users:,} users and {posts:,} posts.")
+
+        start = time.perf_counter()
+        matrix = InteractionMatrix(user_ids, post_ids)
+        build_time = time.perf_counter() - start
+        self.stdout.write(f"  build: {build_time * 1000:.1f} ms, {matrix.nnz:,} unique pairs, "
+                          f"{matrix.nbytes / 1024 / 1024:.1f} MB")
+
+        timings = []
+        for user_id in rng.integers(1, users + 1, size=options['queries']).tolist():
+            start = time.perf_counter()
+            matrix.recommend(user_id, limit=50)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        self.stdout.write(f"  recommend: median {statistics.median(timings):.2f} ms, "
+                          f"p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms, max {timings[-1]:.2f} ms")
+
+        start = time.perf_counter()
+        for user_id in rng.integers(1, users + 1, size=1000).tolist():
+            matrix.add(user_id, int(rng.integers(1, posts + 1)))
+        add_time = time.perf_counter() - start
+        self.stdout.write(f"  incremental add: {add_time * 1000:.1f} ms per 1,000 saves")
@@ -0,0 +1,87 @@
+import datetime
+import random
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.keyword_extractor import SHAPE_OPTIONS, PATTERN_OPTIONS, SIZE_OPTIONS, COLOR_OPTIONS
+from core.recommendations import RecommendationEngine
+from core.scoring import PostCatalog
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the vectorized feed scoring engine against the per-post Python loop on synthetic catalogs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10_000, 100_000, 1_000_000],
+                            help='Catalog sizes to benchmark.')
+        parser.add_argument('--limit', type=int, default=100, help='Number of posts to select.')
+        parser.add_argument('--legacy-max', type=int, default=100_000,
+                            help='Skip the slow Python loop for catalogs larger than this.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        limit = options['limit']
+        now = timezone.now()
+
+        tag_scores = {
+            'almond': 6.4, 'coffin': 1.2, 'french': 4.8, 'glossy': 0.9,
+            'short': 2.5, 'pink': 5.3, 'white': 3.1, 'blue': 0.7,
+        }
+
+        for size in options['sizes']:
+            self.stdout.write(f"Generating {size:,} synthetic posts...")
+            rows = [
+                (
+                    post_id,
+                    rng.choice(SHAPE_OPTIONS),
+                    rng.choice(PATTERN_OPTIONS),
+                    rng.choice(SIZE_OPTIONS),
+                    rng.sample(COLOR_OPTIONS, rng.randint(1, 4)),
+                    rng.randint(0, 5000),
+                    rng.randint(0, 500),
+                    now - datetime.timedelta(minutes=rng.randint(0, 60 * 24 * 365)),
+                )
+                for post_id in range(size, 0, -1)
+            ]
+            rows.sort(key=lambda row: (row[7], row[0]), reverse=True)
+
+            start = time.perf_counter()
+            catalog = PostCatalog.from_rows(rows)
+            build_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            vector_ids = catalog.top_n(tag_scores, limit, now=now)
+            vector_time = time.perf_counter() - start
+
+            self.stdout.write(f"  build: {build_time * 1000:9.1f} ms   vectorized score + top {limit}: "
+                              f"{vector_time * 1000:9.1f} ms")
+
+            if size > options['legacy_max']:
+                self.stdout.write(self.style.WARNING(f"  python loop skipped (> {options['legacy_max']:,} posts)"))
+                continue
+
+            posts = [
+                SimpleNamespace(id=row[0], shape=row[1], pattern=row[2], size=row[3], colors=row[4],
+                                views_count=row[5], saves_count=row[6], created_at=row[7])
+                for row in rows
+            ]
+            start = time.perf_counter()
+            scored_posts = []
+            for post in posts:
+                score = RecommendationEngine._calculate_post_score(post, tag_scores, None)
+                if score > 0:
+                    scored_posts.append((post, score))
+            scored_posts.sort(key=lambda x: x[1], reverse=True)
+            legacy_ids = [post.id for post, score in scored_posts[:limit]]
+            legacy_time = time.perf_counter() - start
+
+            self.stdout.write(f"  python loop: {legacy_time * 1000:9.1f} ms   "
+                              f"speedup: {legacy_time / vector_time:6.1f}x")
+            if legacy_ids == vector_ids:
+                self.stdout.write(self.style.SUCCESS("  rankings match"))
+            else:
+                self.stdout.write(self.style.ERROR("  rankings differ"))
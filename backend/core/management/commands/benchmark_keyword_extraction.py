@@ -0,0 +1,75 @@
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import keyword_extractor
+from core.keyword_extractor import FIELD_MAPS, _normalize_text, extract_nail_keywords
+
+FILLER_WORDS = [
+    "nails", "design", "art", "with", "and", "for", "summer", "wedding", "cute", "ideas",
+    "the", "a", "look", "elegant", "simple", "trendy", "try", "these", "would", "suit", "you",
+]
+
+
+def _legacy_extract_and_remove_keyword(text, normalization_map):
+    # The previous extractor: sort the map and compile one regex per variant until one matches
+    for variant in sorted(normalization_map.keys(), key=len, reverse=True):
+        pattern = r'\b' + re.escape(variant) + r'\b'
+        if re.search(pattern, text):
+            remaining_text = re.sub(pattern, '', text, count=1).strip()
+            return normalization_map[variant], _normalize_text(remaining_text)
+    return None, text
+
+
+def _legacy_extract_nail_keywords(query):
+    normalized_query = _normalize_text(query)
+    result = {}
+    for field, normalization_map in FIELD_MAPS:
+        result[field], normalized_query = _legacy_extract_and_remove_keyword(normalized_query, normalization_map)
+    return result, normalized_query
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the compiled keyword extractor against the per-variant regex passes it replaced.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=2000, help='Number of distinct short queries.')
+        parser.add_argument('--answers', type=int, default=200, help='Number of distinct ~2 KB chat answers.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        variants = [variant.replace('_', ' ') for _, normalization_map in FIELD_MAPS for variant in normalization_map]
+
+        def text(words):
+            return ' '.join(rng.choice(variants) if rng.random() < 0.3 else rng.choice(FILLER_WORDS)
+                            for _ in range(words))
+
+        queries = [text(rng.randint(2, 6)) for _ in range(options['queries'])]
+        answers = []
+        for _ in range(options['answers']):
+            answer = ''
+            while len(answer) < 2048:
+                answer += text(12).capitalize() + '. '
+            answers.append(answer)
+
+        for label, texts in (('short queries', queries), ('2 KB chat answers', answers)):
+            legacy_time = self._time(_legacy_extract_nail_keywords, texts)
+            keyword_extractor._extract_normalized.cache_clear()
+            compiled_time = self._time(extract_nail_keywords, texts)
+            memo_time = self._time(extract_nail_keywords, texts)
+
+            self.stdout.write(
+                f"{label:>18}   per-variant regexes: {legacy_time / len(texts) * 1e6:8.1f} us   "
+                f"compiled: {compiled_time / len(texts) * 1e6:7.1f} us ({legacy_time / compiled_time:5.1f}x)   "
+                f"memoized: {memo_time / len(texts) * 1e6:6.2f} us"
+            )
+
+    @staticmethod
+    def _time(extract, texts):
+        start = time.perf_counter()
+        for item in texts:
+            extract(item)
+        return time.perf_counter() - start
@@ -0,0 +1,72 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from core.keyword_extractor import SHAPE_OPTIONS, PATTERN_OPTIONS, SIZE_OPTIONS, COLOR_OPTIONS
+from core.models import Post
+from core.renderers import ORJSONRenderer
+from core.serializers import PostSerializer, serialize_posts
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the fast post serialization path (plain dicts + orjson) against PostSerializer + JSONRenderer.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[24, 500, 5000],
+                            help='Page sizes to benchmark.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement (best is reported).')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        for size in options['sizes']:
+            posts = [
+                Post(
+                    id=post_id,
+                    title=f"Synthetic nail design {post_id}",
+                    # Mix of relative, local and absolute URLs, as stored in production
+                    image_url=rng.choice([
+                        f"/media/nails/{post_id}.jpg",
+                        f"http://127.0.0.1:8000/media/nails/{post_id}.jpg",
+                        f"https://cdn.example.com/nails/{post_id}.jpg",
+                    ]),
+                    width=rng.randint(500, 800),
+                    height=rng.randint(500, 800),
+                    shape=rng.choice(SHAPE_OPTIONS),
+                    pattern=rng.choice(PATTERN_OPTIONS),
+                    size=rng.choice(SIZE_OPTIONS),
+                    colors=rng.sample(COLOR_OPTIONS, rng.randint(1, 4)),
+                    try_on_image_url=rng.choice(['', f"/media/try_on/{post_id}.png"]),
+                )
+                for post_id in range(1, size + 1)
+            ]
+
+            legacy_time, legacy_body = self._best(
+                options['repeat'], lambda: JSONRenderer().render(PostSerializer(posts, many=True).data)
+            )
+            fast_time, fast_body = self._best(
+                options['repeat'], lambda: ORJSONRenderer().render(serialize_posts(posts))
+            )
+
+            self.stdout.write(
+                f"{size:>6,} posts   PostSerializer + JSONRenderer: {legacy_time / size * 1e6:7.2f} us/post   "
+                f"serialize_posts + orjson: {fast_time / size * 1e6:7.2f} us/post   "
+                f"speedup: {legacy_time / fast_time:5.1f}x"
+            )
+            if legacy_body == fast_body:
+                self.stdout.write(self.style.SUCCESS("  output identical"))
+            else:
+                self.stdout.write(self.style.ERROR("  output differs"))
+
+    @staticmethod
+    def _best(repeat, render):
+        best, body = None, None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            body = render()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, body
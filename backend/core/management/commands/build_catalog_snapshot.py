@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.catalog_snapshot import CatalogSnapshot, build_snapshot, snapshot_dir
+
+
+class Command(BaseCommand):
+    help = 'Builds the memory-mapped catalog snapshot shared by all workers and makes it current.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=None, help='Snapshot directory (defaults to CATALOG_SNAPSHOT["DIR"]).')
+
+    def handle(self, *args, **options):
+        directory = options['dir'] or snapshot_dir()
+        self.stdout.write(f"Building catalog snapshot in {directory}...")
+        path = build_snapshot(directory)
+        snapshot = CatalogSnapshot(path)
+        self.stdout.write(self.style.SUCCESS(f'Published {path} with {len(snapshot)} posts.'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Post, SimilarPosts
+from core.similarity import SimilarityIndex, SIMILAR_POSTS_INDEX_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Builds the precomputed similar-posts index used by the "more posts" endpoint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only index new posts and re-index edited ones.')
+        parser.add_argument('--size', type=int, default=SIMILAR_POSTS_INDEX_SIZE,
+                            help='Number of similar posts stored per post.')
+
+    def handle(self, *args, **options):
+        if options['incremental']:
+            missing_ids = list(Post.objects.filter(similar_index__isnull=True).values_list('id', flat=True))
+            stale_ids = list(SimilarPosts.objects.filter(stale=True).values_list('post_id', flat=True))
+            if not missing_ids and not stale_ids:
+                self.stdout.write(self.style.SUCCESS('Similarity index is up to date.'))
+                return
+            indexed = 0
+            if stale_ids:
+                self.stdout.write(f"Re-indexing {len(stale_ids)} edited posts...")
+                indexed += SimilarityIndex.refresh_posts(stale_ids, k=options['size'])
+            if missing_ids:
+                self.stdout.write(f"Indexing {len(missing_ids)} new posts...")
+                indexed += SimilarityIndex.add_posts(missing_ids, k=options['size'])
+        else:
+            self.stdout.write("Rebuilding the similarity index for all posts...")
+            indexed = SimilarityIndex.rebuild(k=options['size'])
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully indexed {indexed} posts.'))
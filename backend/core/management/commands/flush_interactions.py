@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.interaction_buffer import interaction_buffer
+
+
+class Command(BaseCommand):
+    help = 'Applies buffered interaction events (clicks, try-ons, searches) to user interest profiles.'
+
+    def handle(self, *args, **options):
+        self.stdout.write("Flushing buffered interactions...")
+        start = time.perf_counter()
+        applied = interaction_buffer.flush()
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully applied {applied} interaction events in {elapsed:.2f}s.'
+        ))
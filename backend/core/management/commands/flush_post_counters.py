@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.counters import post_counters
+
+
+class Command(BaseCommand):
+    help = 'Writes buffered post view/save counter increments to the database.'
+
+    def handle(self, *args, **options):
+        updated = post_counters.flush()
+        self.stdout.write(self.style.SUCCESS(f'Successfully flushed counters for {updated} posts.'))
@@ -2,6 +2,7 @@ import json
 import random
 import os
 from pathlib import Path
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from core.models import Post
@@ -106,3 +107,5 @@ class Command(BaseCommand):
         if posts_skipped_count > 0:
             self.stdout.write(
                 self.style.WARNING(f'Skipped {posts_skipped_count} posts (image files not found).'))
+
+        call_command('build_similarity_index', incremental=True, stdout=self.stdout)
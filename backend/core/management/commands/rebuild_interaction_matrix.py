@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.collaborative import rebuild_interaction_matrix
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the sparse user x post interaction matrix from saves and try-ons and publishes it to the cache.'
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding the interaction matrix...")
+        start = time.perf_counter()
+        matrix = rebuild_interaction_matrix()
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully rebuilt the interaction matrix: {len(matrix.user_ids)} users, '
+            f'{len(matrix.post_ids)} posts, {matrix.nnz} interactions '
+            f'({matrix.nbytes / 1024 / 1024:.1f} MB) in {elapsed:.2f}s.'
+        ))
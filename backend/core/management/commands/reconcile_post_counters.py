@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.counters import post_counters
+from core.models import Collection, Post
+
+
+class Command(BaseCommand):
+    help = ('Recomputes Post.saves_count from collection memberships to repair counter drift. '
+            'Needs the Redis-backed counter buffer (POST_COUNTERS["USE_CACHE"]).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Reconcile even with per-process buffers, e.g. while the web workers are stopped.')
+
+    def handle(self, *args, **options):
+        if not post_counters.shared and not options['force']:
+            # Each web worker holds its own pending deltas, which this process can't flush. They
+            # would be added again on top of the recomputed counts once the workers flush them.
+            self.stdout.write(self.style.WARNING(
+                'Skipped: post counters are buffered per process. Enable POST_COUNTERS["USE_CACHE"] '
+                'with Redis, or stop the web workers and pass --force.'
+            ))
+            return
+
+        # Apply the shared pending increments first so they are not counted twice
+        post_counters.flush()
+
+        savers = Collection.posts.through.objects.filter(
+            post_id=OuterRef('pk')
+        ).order_by().values('post_id').annotate(
+            savers=Count('collection__user_id', distinct=True)
+        ).values('savers')
+        actual = Coalesce(Subquery(savers), 0)
+
+        repaired = Post.objects.annotate(actual_saves=actual).exclude(
+            saves_count=F('actual_saves')
+        ).update(saves_count=actual)
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully reconciled saves_count, repaired {repaired} posts.'))
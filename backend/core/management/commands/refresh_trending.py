@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.counters import post_counters
+from core.trending import prune_engagement, refresh_trending
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the cached trending ranking from hourly engagement rollups and prunes old rollups.'
+
+    def handle(self, *args, **options):
+        # Fold in engagement still sitting in this process's buffer
+        post_counters.flush()
+
+        start = time.perf_counter()
+        post_ids = refresh_trending()
+        elapsed = time.perf_counter() - start
+        pruned = prune_engagement()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully ranked {len(post_ids)} trending posts in {elapsed:.2f}s '
+            f'(pruned {pruned} old rollup rows).'
+        ))
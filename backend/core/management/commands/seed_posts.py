@@ -1,4 +1,5 @@
 import random
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from core.models import Post
 from core.color_constants import COLOR_SIMPLIFICATION_MAP
@@ -65,3 +66,5 @@ class Command(BaseCommand):
             )
 
         self.stdout.write(self.style.SUCCESS('Successfully seeded the database with 100 structured fake posts.'))
+
+        call_command('build_similarity_index', incremental=True, stdout=self.stdout)
@@ -0,0 +1,134 @@
+"""
+Set-based changes to which collections hold which posts.
+
+Membership checks and writes go straight to the Collection.posts through
+table (EXISTS, bulk INSERT ... ON CONFLICT DO NOTHING, one DELETE) instead
+of loading collections' posts into Python. Saving a post to any collection
+also files it in the user's default "All Posts" collection, whose ID is
+cached per user. saves_count counts distinct savers, so it is only touched
+for posts that gain their first or lose their last collection, in one
+batched counter update per request. Changes for one user are serialized by
+locking the user's row, so two concurrent saves of the same post can't both
+count as its first.
+"""
+
+from typing import Dict, Iterable, List, Set
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .cache_namespaces import POSTS
+from .collaborative import record_interaction, remove_interaction
+from .counters import post_counters
+from .models import Collection
+from .saved_posts import invalidate_saved
+
+DEFAULT_COLLECTION_NAME = "All Posts"
+DEFAULT_COLLECTION_CACHE_TIMEOUT = 60 * 60 * 24
+
+CollectionPost = Collection.posts.through
+
+
+def default_collection_id(user) -> int:
+    """ID of the user's "All Posts" collection, created if missing."""
+    cache_key = f"collections:default:user:{user.id}"
+    collection_id = cache.get(cache_key)
+    if collection_id is None:
+        collection, _ = user.collections.get_or_create(name=DEFAULT_COLLECTION_NAME)
+        collection_id = collection.id
+        cache.set(cache_key, collection_id, timeout=DEFAULT_COLLECTION_CACHE_TIMEOUT)
+    return collection_id
+
+
+def is_member(collection_id: int, post_id: int) -> bool:
+    return CollectionPost.objects.filter(collection_id=collection_id, post_id=post_id).exists()
+
+
+def _lock_user(user):
+    """Hold the user's row until the end of the transaction (a no-op on SQLite, which serializes writes)."""
+    list(type(user).objects.select_for_update().filter(pk=user.pk).values_list('pk', flat=True))
+
+
+def _saved_post_ids(user, post_ids: Iterable[int]) -> Set[int]:
+    """Subset of `post_ids` that is in at least one of the user's collections."""
+    return set(
+        CollectionPost.objects.filter(collection__user=user, post_id__in=list(post_ids))
+        .values_list('post_id', flat=True).distinct()
+    )
+
+
+def add_posts(user, collection_ids: Iterable[int], post_ids: Iterable[int]) -> List[int]:
+    """
+    Add every post to every collection (and to "All Posts"). Existing
+    memberships are left alone.
+
+    Args:
+        user: Owner of the collections (ownership must already be checked)
+        collection_ids: Target collections
+        post_ids: IDs of existing posts
+
+    Returns:
+        IDs of posts the user had not saved anywhere before
+    """
+    post_ids = sorted(set(post_ids))
+    collection_ids = set(collection_ids) | {default_collection_id(user)}
+    if not post_ids:
+        return []
+
+    with transaction.atomic():
+        _lock_user(user)
+        previously_saved = _saved_post_ids(user, post_ids)
+        CollectionPost.objects.bulk_create(
+            [CollectionPost(collection_id=collection_id, post_id=post_id)
+             for collection_id in sorted(collection_ids) for post_id in post_ids],
+            ignore_conflicts=True,
+        )
+
+    newly_saved = [post_id for post_id in post_ids if post_id not in previously_saved]
+    _after_change(user, newly_saved, [])
+    return newly_saved
+
+
+def remove_posts(user, collection_ids: Iterable[int], post_ids: Iterable[int]) -> List[int]:
+    """
+    Remove every post from every collection.
+
+    Args:
+        user: Owner of the collections (ownership must already be checked)
+        collection_ids: Collections to remove from
+        post_ids: Posts to remove
+
+    Returns:
+        IDs of posts the user no longer saves anywhere
+    """
+    memberships = CollectionPost.objects.filter(collection_id__in=list(collection_ids), post_id__in=list(post_ids))
+    with transaction.atomic():
+        _lock_user(user)
+        removed = set(memberships.values_list('post_id', flat=True))
+        if not removed:
+            return []
+        memberships.delete()
+        unsaved = sorted(removed - _saved_post_ids(user, removed))
+
+    _after_change(user, [], unsaved)
+    return unsaved
+
+
+def _after_change(user, newly_saved: List[int], unsaved: List[int]):
+    """Batch the saves_count deltas and keep the saved set and collaborative model in step."""
+    deltas: Dict[int, int] = {post_id: 1 for post_id in newly_saved}
+    deltas.update({post_id: -1 for post_id in unsaved})
+    post_counters.increment_many('saves_count', deltas)
+    if newly_saved or unsaved:
+        # After commit, so a concurrent read can't cache the set from before this change
+        transaction.on_commit(lambda: invalidate_saved(user.id))
+
+    for post_id in newly_saved:
+        record_interaction(user.id, post_id)
+    if unsaved:
+        tried_on = set(user.try_ons.filter(post_id__in=unsaved).values_list('post_id', flat=True))
+        for post_id in unsaved:
+            if post_id not in tried_on:
+                remove_interaction(user.id, post_id)
+
+    POSTS.invalidate()
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_add_user_session_model'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarPosts',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='similar_index', serialize=False, to='core.post')),
+                ('similar_ids', models.JSONField(default=list)),
+                ('scores', models.JSONField(default=list)),
+                ('threshold', models.FloatField(db_index=True, default=-1.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
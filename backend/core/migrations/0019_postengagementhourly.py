@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_similarposts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostEngagementHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(db_index=True)),
+                ('views', models.IntegerField(default=0)),
+                ('saves', models.IntegerField(default=0)),
+                ('try_ons', models.IntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_engagement', to='core.post')),
+            ],
+            options={
+                'unique_together': {('post', 'hour')},
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:18
+
+from django.db import migrations, models
+
+import core.fields
+
+# Frozen copy of core.color_constants.COLOR_SIMPLIFICATION_MAP at the time of this
+# migration (base color -> variants), so later edits to the map can't change what
+# the backfill writes
+BASE_COLOR_VARIANTS = {
+    'blue': ('navy', 'midnight_blue', 'sky_blue', 'powder_blue', 'cyan', 'teal', 'bright_blue', 'dark_blue', 'light_blue', 'pale_blue', 'blue'),
+    'red': ('burgundy', 'dark_red', 'bright_red', 'light_red', 'vivid_red', 'crimson', 'maroon', 'bright_maroon', 'dark_maroon', 'red'),
+    'pink': ('soft_pink', 'baby_pink', 'hot_pink', 'rose', 'nude', 'bright_pink', 'dark_pink', 'light_pink', 'pink', 'lilac', 'fuchsia'),
+    'purple': ('lavender', 'magenta', 'plum', 'violet', 'bright_purple', 'dark_purple', 'light_purple', 'purple'),
+    'green': ('mint', 'sage', 'forest_green', 'olive', 'lime', 'bright_green', 'dark_green', 'light_green', 'green'),
+    'yellow': ('gold', 'mustard', 'amber', 'bright_yellow', 'dark_yellow', 'light_yellow', 'yellow', 'light_beige', 'beige', 'champagne'),
+    'orange': ('peach', 'coral', 'salmon', 'burnt_orange', 'bright_orange', 'dark_orange', 'light_orange', 'orange'),
+    'brown': ('tan', 'chocolate', 'khaki', 'bright_brown', 'dark_brown', 'light_brown', 'dark_beige', 'brown'),
+    'gray': ('dark_gray', 'light_gray', 'silver', 'jet', 'bright_gray', 'grey', 'gray'),
+    'black': ('black',),
+    'white': ('white', 'off_white', 'ivory'),
+}
+VARIANT_TO_BASE = {variant: base for base, variants in BASE_COLOR_VARIANTS.items() for variant in variants}
+
+
+def simplify_colors(colors):
+    if not isinstance(colors, list):
+        return []
+    return sorted({VARIANT_TO_BASE.get(color, color) for color in colors if isinstance(color, str)})
+
+
+def backfill_base_colors(apps, schema_editor):
+    Post = apps.get_model('core', 'Post')
+    batch = []
+    for post in Post.objects.only('id', 'colors').iterator(chunk_size=2000):
+        post.base_colors = simplify_colors(post.colors)
+        batch.append(post)
+        if len(batch) >= 2000:
+            Post.objects.bulk_update(batch, ['base_colors'])
+            batch = []
+    if batch:
+        Post.objects.bulk_update(batch, ['base_colors'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_postengagementhourly'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='base_colors',
+            field=core.fields.PortableArrayField(base_field=models.CharField(max_length=30), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=core.fields.PortableGinIndex(fields=['base_colors'], name='post_base_colors_gin_idx'),
+        ),
+        migrations.RunPython(backfill_base_colors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:19
+
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+import core.fields
+
+
+def backfill_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Post = apps.get_model('core', 'Post')
+    Post.objects.update(search_vector=SearchVector('title', config='english'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_post_base_colors'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=core.fields.PortableGinIndex(fields=['search_vector'], name='post_search_vector_gin_idx'),
+        ),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+    ]
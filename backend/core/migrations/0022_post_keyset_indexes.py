@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_post_search_vector'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_created_desc_idx',
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-created_at', '-id'], name='post_created_id_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tryon',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='tryon_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:34
+
+from django.db import migrations
+
+INDEX_NAME = 'collection_posts_recent_idx'
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.execute(f'CREATE INDEX {INDEX_NAME} ON core_collection_posts (collection_id, id DESC);')
+        return
+    # CONCURRENTLY builds the index without blocking writes to the table, but
+    # can't run inside a transaction (hence atomic = False below). A build
+    # that was interrupted leaves an invalid index behind, so drop it first.
+    schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME};')
+    schema_editor.execute(
+        f'CREATE INDEX CONCURRENTLY {INDEX_NAME} ON core_collection_posts (collection_id, id DESC);'
+    )
+
+
+def drop_index(apps, schema_editor):
+    concurrently = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(f'DROP INDEX {concurrently}{INDEX_NAME};')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0022_post_keyset_indexes'),
+    ]
+
+    operations = [
+        # The auto-created Collection.posts through table has no Meta to declare
+        # indexes on; this one serves "most recently saved first" pages of a collection
+        migrations.RunPython(create_index, drop_index),
+    ]
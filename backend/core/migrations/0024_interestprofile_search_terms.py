@@ -0,0 +1,72 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:38
+
+from django.db import migrations, models
+
+# Frozen copies of the runtime values at the time of this migration, so later
+# changes to core.interaction_buffer or core.search_terms can't change what it writes
+SEARCH_TERM_WEIGHT = 0.5  # Score one search added to each of its words
+USER_TERMS = 20  # SEARCH_TRACKING['USER_TERMS']
+
+
+def summarize_terms(term_counts):
+    """
+    Space-Saving summary (term -> [count, error]) of at most USER_TERMS
+    terms, built the way core.search_terms.update_user_terms did.
+    """
+    entries = {}
+    for term, count in sorted(term_counts.items()):
+        if len(entries) < USER_TERMS:
+            entries[term] = [count, 0]
+        else:
+            evicted = min(entries, key=lambda key: entries[key][0])
+            floor = entries.pop(evicted)[0]
+            entries[term] = [floor + count, floor]
+    return entries
+
+
+def move_search_words_out_of_tag_scores(apps, schema_editor):
+    """
+    Searches used to add every word to tag_scores. Keep only tags some post
+    can match and fold the other words into the bounded search_terms summary.
+    """
+    Post = apps.get_model('core', 'Post')
+    InterestProfile = apps.get_model('core', 'InterestProfile')
+
+    post_tags = set()
+    for shape, pattern, size, colors in Post.objects.values_list(
+            'shape', 'pattern', 'size', 'colors').iterator(chunk_size=5000):
+        post_tags.update(value for value in (shape, pattern, size) if value)
+        post_tags.update(color for color in colors or [] if isinstance(color, str))
+
+    batch = []
+    for profile in InterestProfile.objects.only('id', 'tag_scores', 'search_terms').iterator(chunk_size=2000):
+        words = {tag: score for tag, score in profile.tag_scores.items() if tag not in post_tags}
+        if not words:
+            continue
+        profile.tag_scores = {tag: score for tag, score in profile.tag_scores.items() if tag in post_tags}
+        # search_terms was just added, so every profile starts from an empty summary
+        profile.search_terms = summarize_terms({
+            word: max(round(score / SEARCH_TERM_WEIGHT), 1) for word, score in words.items()
+        })
+        batch.append(profile)
+        if len(batch) >= 2000:
+            InterestProfile.objects.bulk_update(batch, ['tag_scores', 'search_terms'])
+            batch = []
+    if batch:
+        InterestProfile.objects.bulk_update(batch, ['tag_scores', 'search_terms'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_collection_posts_recent_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interestprofile',
+            name='search_terms',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(move_search_words_out_of_tag_scores, migrations.RunPython.noop),
+    ]
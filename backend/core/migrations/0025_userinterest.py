@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:40
+
+import django.db.models.deletion
+from django.conf import settings
+from datetime import datetime, timezone
+
+from django.db import migrations, models
+
+# Frozen copies of core.interests at the time of this migration: scores are
+# stored in decay space relative to DECAY_EPOCH with a 14-day half-life
+DECAY_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+HALF_LIFE_SECONDS = 14 * 24 * 60 * 60
+
+
+def decay_factor(moment):
+    return 2.0 ** ((moment - DECAY_EPOCH).total_seconds() / HALF_LIFE_SECONDS)
+
+
+def copy_tag_scores(apps, schema_editor):
+    """One UserInterest row per tag, as of the profile's last update."""
+    InterestProfile = apps.get_model('core', 'InterestProfile')
+    UserInterest = apps.get_model('core', 'UserInterest')
+    batch = []
+    for profile in InterestProfile.objects.only('user_id', 'tag_scores', 'updated_at').iterator(chunk_size=2000):
+        factor = decay_factor(profile.updated_at)
+        for tag, score in profile.tag_scores.items():
+            if isinstance(score, (int, float)) and score > 0 and len(tag) <= 50:
+                batch.append(UserInterest(user_id=profile.user_id, tag=tag, score=score * factor,
+                                          updated_at=profile.updated_at))
+        if len(batch) >= 5000:
+            UserInterest.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        UserInterest.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_interestprofile_search_terms'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserInterest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(max_length=50)),
+                ('score', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='interests', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'tag'), name='user_interest_user_tag_uniq')],
+            },
+        ),
+        migrations.RunPython(copy_tag_scores, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='interestprofile',
+            name='tag_scores',
+        ),
+    ]
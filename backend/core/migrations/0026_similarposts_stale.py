@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_userinterest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='similarposts',
+            name='stale',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
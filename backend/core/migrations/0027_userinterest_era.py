@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_similarposts_stale'),
+    ]
+
+    operations = [
+        # Existing scores are relative to DECAY_EPOCH, which is the start of era 0
+        migrations.AddField(
+            model_name='userinterest',
+            name='era',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -1,9 +1,12 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 import uuid
 import hashlib
+from .color_constants import simplify_colors
+from .fields import PortableArrayField, PortableGinIndex
 
 
 class User(AbstractUser):
@@ -142,6 +145,8 @@ class Post(models.Model):
 
     # Storing the list of colors in a JSONField is efficient for querying.
     colors = models.JSONField(default=list, blank=True)
+    # Base color family of each entry in colors (e.g. "burgundy" -> "red"), kept in sync on save
+    base_colors = PortableArrayField(models.CharField(max_length=30), default=list, blank=True, editable=False)
 
     # Performance tracking fields
     views_count = models.IntegerField(default=0, db_index=True)
@@ -153,19 +158,73 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     try_on_image_url = models.URLField(max_length=500, blank=True)
 
+    # Full-text index of the title, maintained on save (see core.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         indexes = [
             models.Index(fields=['shape', 'pattern'], name='post_shape_pattern_idx'),
             models.Index(fields=['shape', 'size'], name='post_shape_size_idx'),
-            models.Index(fields=['-created_at'], name='post_created_desc_idx'),
+            # Feed order and the keyset for cursor pagination
+            models.Index(fields=['-created_at', '-id'], name='post_created_id_desc_idx'),
             models.Index(fields=['-views_count'], name='post_views_desc_idx'),
             models.Index(fields=['-saves_count'], name='post_saves_desc_idx'),
+            PortableGinIndex(fields=['base_colors'], name='post_base_colors_gin_idx'),
+            PortableGinIndex(fields=['search_vector'], name='post_search_vector_gin_idx'),
         ]
         ordering = ['-created_at']
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.base_colors = simplify_colors(self.colors)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'colors' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'base_colors'}
+        super().save(*args, **kwargs)
+
+        if update_fields is None or 'title' in update_fields:
+            from .search import update_search_vector
+            update_search_vector(Post.objects.filter(pk=self.pk))
+
+
+class SimilarPosts(models.Model):
+    """
+    Precomputed nearest neighbours of a post, ranked by attribute overlap.
+    Built offline by the build_similarity_index management command.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='similar_index')
+    similar_ids = models.JSONField(default=list)
+    # Similarity score of each entry in similar_ids, used for incremental refreshes
+    scores = models.JSONField(default=list)
+    # Score a new post must beat to enter the list (-1 while the list is not full)
+    threshold = models.FloatField(default=-1.0, db_index=True)
+    # Set when the post's attributes changed; build_similarity_index --incremental re-indexes it
+    stale = models.BooleanField(default=False, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Similar posts for {self.post_id}"
+
+
+class PostEngagementHourly(models.Model):
+    """
+    Engagement a post received during one hour, rolled up from the buffered
+    view/save counters and tracked try-ons. Feeds the trending ranking.
+    """
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='hourly_engagement')
+    hour = models.DateTimeField(db_index=True)
+    views = models.IntegerField(default=0)
+    saves = models.IntegerField(default=0)
+    try_ons = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('post', 'hour')
+
+    def __str__(self):
+        return f"Engagement for {self.post_id} at {self.hour:%Y-%m-%d %H:00}"
+
 
 class TryOn(models.Model):
     """
@@ -178,6 +237,9 @@ class TryOn(models.Model):
     class Meta:
         unique_together = ('user', 'post')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='tryon_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} tried on {self.post.title}"
@@ -202,13 +264,39 @@ class InterestProfile(models.Model):
     """
 
     Stores a user's calculated interests based on their activity.
+    Per-tag scores live in UserInterest rows.
     """
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='interest_profile')
 
-    # This will store scores for each tag, e.g., {"red": 5, "almond": 3, "blue": 1}
-    tag_scores = models.JSONField(default=dict)
+    # Most searched free-text words, a bounded Space-Saving summary (see core.search_terms),
+    # e.g. {"glitter": [5, 0]}: term -> [count, overestimation]
+    search_terms = models.JSONField(default=dict, blank=True)
 
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.user.email}'s Interest Profile"
+
+
+class UserInterest(models.Model):
+    """
+    One interest tag of a user (a shape, pattern, size or color), e.g. "almond".
+
+    `score` is kept in decay space (see core.interests): every increment is
+    scaled up by how long after the start of the row's `era` it happened, so
+    adding to a score is a plain atomic upsert and the decay is applied when
+    reading.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='interests')
+    tag = models.CharField(max_length=50)
+    score = models.FloatField(default=0)
+    era = models.IntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'tag'], name='user_interest_user_tag_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.tag}"
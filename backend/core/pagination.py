@@ -0,0 +1,292 @@
+"""
+Cursor pagination for post listings.
+
+Page-number pagination runs a COUNT(*) over the whole result set and an
+OFFSET that grows as the user scrolls. In cursor mode a page instead seeks
+past the (created_at, id) of the last row it returned, so page 200 costs
+the same index range scan as page 1 and nothing is counted.
+
+Listings served from an in-memory list of post IDs page in one of two ways:
+- Newest-first lists that carry each post's created_at (KeyedIds, e.g.
+  the facet index) seek the same (created_at, id) cursor with a binary
+  search, so posts created or deleted mid-scroll shift nothing.
+- Shuffled or rank-ordered lists (refresh shuffles, text search results,
+  For You snapshots) have no key to seek on and page by position. Their
+  cursors are list offsets, which are only stable because those lists are
+  cached and frozen for the scroll; a rebuilt list would repeat or skip
+  posts.
+
+Clients opt in by sending a `cursor` parameter (empty for the first page)
+and then follow the opaque `next` / `previous` links.
+"""
+
+import base64
+import bisect
+import datetime
+import json
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .scoring import to_epoch_us
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class KeyedIds:
+    """
+    Post IDs ordered newest first, (created_at, id) descending, with their
+    created_at times, so KeysetPagination can seek in them like a queryset.
+    Slicing returns plain IDs, so page-number pagination works too.
+    """
+
+    ordering = ('-created_at', '-id')
+
+    def __init__(self, ids, created_us):
+        self.ids = ids
+        self.created_us = created_us
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        return self.ids[index].tolist()
+
+    def key(self, position: int) -> list:
+        created_at = _EPOCH + datetime.timedelta(microseconds=int(self.created_us[position]))
+        return [created_at.isoformat(), int(self.ids[position])]
+
+    def seek(self, key: list, after: bool) -> int:
+        """
+        Position of the first post after `key` (or, with after=False, the
+        first post at or after it, i.e. the end of everything before it).
+        """
+        created_at = datetime.datetime.fromisoformat(key[0])
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=datetime.timezone.utc)
+        target = (-to_epoch_us(created_at), -int(key[1]))
+        search = bisect.bisect_right if after else bisect.bisect_left
+        return search(range(len(self)), target,
+                      key=lambda position: (-int(self.created_us[position]), -int(self.ids[position])))
+
+
+class KeysetPagination(BasePagination):
+    """
+    Seek pagination on `ordering`, falling back to positions for lists and
+    for querysets ordered some other way (random or by search rank).
+    """
+    page_size = 24
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    # The last field must be unique so that every row has a distinct position
+    ordering: Sequence[str] = ('-created_at', '-id')
+
+    def __init__(self, ordering: Optional[Sequence[str]] = None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+
+    # --- Cursor encoding ---
+
+    @staticmethod
+    def encode_cursor(position: dict) -> str:
+        raw = json.dumps(position, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, request) -> Optional[dict]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, dict):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    # --- Paging ---
+
+    def get_page_size(self, request) -> int:
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(requested, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None) -> List:
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        self.has_next = self.has_previous = False
+        self.next_position = self.previous_position = None
+        cursor = self.decode_cursor(request)
+
+        if isinstance(queryset, KeyedIds) and tuple(self.ordering) == KeyedIds.ordering:
+            return self._paginate_keyed(queryset, cursor)
+        if self._supports_keyset(queryset):
+            return self._paginate_keyset(queryset, cursor)
+        return self._paginate_positions(queryset, cursor)
+
+    def _supports_keyset(self, queryset) -> bool:
+        """Keyset paging only applies when it keeps the queryset's own order."""
+        if not isinstance(queryset, QuerySet) or queryset.query.is_sliced:
+            return False
+        order_by = tuple(queryset.query.order_by)
+        return order_by == self.ordering[:len(order_by)]
+
+    def _paginate_keyset(self, queryset, cursor: Optional[dict]) -> List:
+        reverse = bool(cursor and cursor.get('r'))
+        ordering = [self._invert(field) for field in self.ordering] if reverse else list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+
+        if cursor is not None:
+            values = cursor.get('k')
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(self._after(ordering, values))
+
+        # One extra row tells us whether there is another page, instead of a COUNT
+        rows = list(queryset[:self.page_size_value + 1])
+        has_more = len(rows) > self.page_size_value
+        rows = rows[:self.page_size_value]
+        if reverse:
+            rows.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = cursor is not None, has_more
+
+        if rows:
+            self.next_position = {'k': self._key(rows[-1])}
+            self.previous_position = {'k': self._key(rows[0]), 'r': 1}
+        return rows
+
+    def _paginate_keyed(self, items: KeyedIds, cursor: Optional[dict]) -> List:
+        reverse = bool(cursor and cursor.get('r'))
+        start = 0
+        if cursor is not None:
+            values = cursor.get('k')
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                start = items.seek(values, after=not reverse)
+            except (TypeError, ValueError, OverflowError):
+                raise NotFound(self.invalid_cursor_message)
+
+        if reverse:
+            end, start = start, max(start - self.page_size_value, 0)
+            self.has_previous, self.has_next = start > 0, True
+        else:
+            end = min(start + self.page_size_value, len(items))
+            self.has_previous, self.has_next = start > 0, end < len(items)
+
+        if end > start:
+            self.next_position = {'k': items.key(end - 1)}
+            self.previous_position = {'k': items.key(start), 'r': 1}
+        return items[start:end]
+
+    def _paginate_positions(self, items, cursor: Optional[dict]) -> List:
+        start = cursor.get('p', 0) if cursor is not None else 0
+        if not isinstance(start, int) or start < 0:
+            raise NotFound(self.invalid_cursor_message)
+
+        rows = list(items[start:start + self.page_size_value + 1])
+        self.has_next = len(rows) > self.page_size_value
+        self.has_previous = start > 0
+        self.next_position = {'p': start + self.page_size_value}
+        self.previous_position = {'p': max(start - self.page_size_value, 0)}
+        return rows[:self.page_size_value]
+
+    @staticmethod
+    def _invert(field: str) -> str:
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def _key(self, row) -> list:
+        values = []
+        for field in self.ordering:
+            value = getattr(row, field.lstrip('-'))
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return values
+
+    @staticmethod
+    def _after(ordering: Sequence[str], values: list) -> Q:
+        """
+        Rows strictly after `values` in `ordering`, spelled out as
+        (a < x) OR (a = x AND b < y) OR ... so the composite index is used.
+        """
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    # --- Response ---
+
+    def _link(self, position: Optional[dict], url: Optional[str] = None) -> Optional[str]:
+        if position is None:
+            return None
+        url = url or self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position))
+
+    def get_next_link(self, url: Optional[str] = None) -> Optional[str]:
+        """Link to the next page, on `url` if given (defaults to the current request)."""
+        return self._link(self.next_position, url) if self.has_next else None
+
+    def get_previous_link(self, url: Optional[str] = None) -> Optional[str]:
+        return self._link(self.previous_position, url) if self.has_previous else None
+
+    def get_paginated_data(self, data) -> OrderedDict:
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ])
+
+    def get_paginated_response(self, data) -> Response:
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class CollectionPostsPagination(KeysetPagination):
+    """Collection memberships, most recently saved first (through-table id)."""
+    ordering = ('-id',)
+
+
+class CursorPaginationMixin:
+    """
+    Use KeysetPagination instead of the view's page-number pagination when
+    the request carries a `cursor` parameter.
+    """
+    cursor_ordering: Sequence[str] = KeysetPagination.ordering
+
+    def uses_cursor_pagination(self) -> bool:
+        return KeysetPagination.cursor_query_param in self.request.query_params
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.uses_cursor_pagination():
+                self._paginator = KeysetPagination(ordering=self.cursor_ordering)
+            else:
+                self._paginator = self.pagination_class() if self.pagination_class else None
+        return self._paginator
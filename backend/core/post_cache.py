@@ -0,0 +1,47 @@
+"""
+Shared per-post object cache.
+
+List caches (feeds, similar posts, filtered listings) store only ordered post
+IDs and turn them back into Post objects here: one get_many for the cached
+posts and one in_bulk for the misses. Each post is cached once no matter how
+many lists it appears in, so editing a post only has to drop a single entry.
+"""
+
+from typing import Iterable, List
+
+from django.core.cache import cache
+
+from .models import Post
+
+POST_CACHE_TIMEOUT = 60 * 60
+
+
+def post_cache_key(post_id: int) -> str:
+    return f"post:{post_id}"
+
+
+def hydrate_posts(post_ids: Iterable[int]) -> List[Post]:
+    """
+    Return the posts for `post_ids` in the same order. IDs of posts that no
+    longer exist are skipped.
+    """
+    post_ids = list(post_ids)
+    if not post_ids:
+        return []
+
+    keys = {post_id: post_cache_key(post_id) for post_id in post_ids}
+    cached = cache.get_many(list(keys.values()))
+    posts_by_id = {post_id: cached[key] for post_id, key in keys.items() if key in cached}
+
+    missing = [post_id for post_id in keys if post_id not in posts_by_id]
+    if missing:
+        fetched = Post.objects.in_bulk(missing)
+        cache.set_many({keys[post_id]: post for post_id, post in fetched.items()}, timeout=POST_CACHE_TIMEOUT)
+        posts_by_id.update(fetched)
+
+    return [posts_by_id[post_id] for post_id in post_ids if post_id in posts_by_id]
+
+
+def invalidate_post(post_id: int):
+    """Drop a post's cached copy after it is edited or deleted."""
+    cache.delete(post_cache_key(post_id))
@@ -3,12 +3,22 @@ Advanced Recommendation Engine for Missland
 Implements collaborative filtering, content-based filtering, and hybrid recommendations
 """
 
-from django.db.models import Count, Q, F
+from django.db.models import Q, F
 from django.core.cache import cache
 from collections import Counter, defaultdict
 import math
-from typing import List, Dict, Tuple
-from .models import Post, User, Collection, TryOn, InterestProfile
+from typing import Dict, Iterable, List, Optional, Tuple
+from .models import Post, User, TryOn
+from .interests import add_interests, get_interest_scores
+from .cache_namespaces import user_recommendations, similar_posts as similar_posts_namespace
+from .collaborative import get_interaction_matrix
+from .post_cache import hydrate_posts
+from .trending import get_trending_post_ids
+from .scoring import (
+    get_catalog, INTEREST_WEIGHT, POPULARITY_WEIGHT, FRESHNESS_WEIGHT, DIVERSITY_WEIGHT,
+    FIELD_WEIGHTS, VIEWS_WEIGHT, SAVES_WEIGHT, FRESHNESS_MAX, FRESHNESS_DECAY_PER_DAY,
+    DIVERSITY_THRESHOLD, DIVERSITY_BONUS, MAX_SCORED_COLORS,
+)
 
 
 class RecommendationEngine:
@@ -32,50 +42,55 @@ class RecommendationEngine:
         Returns:
             List of recommended Post objects
         """
-        cache_key = f"recommendations:user:{user.id}:feed:{limit}"
-        cached_result = cache.get(cache_key)
+        cache_key = user_recommendations(user.id).key('feed', limit)
+        cached_ids = cache.get(cache_key)
         
-        if cached_result is not None:
-            return cached_result
+        if cached_ids is not None:
+            return hydrate_posts(cached_ids)
         
-        try:
-            profile = user.interest_profile
-            
-            # Get user's interest scores with decay
-            tag_scores = RecommendationEngine._apply_interest_decay(profile.tag_scores)
-            
-            if not tag_scores:
-                # New user - return trending posts
-                result = RecommendationEngine._get_trending_posts(limit)
-                cache.set(cache_key, result, timeout=300)
-                return result
-            
-            # Score all posts based on multiple factors
-            scored_posts = []
-            all_posts = Post.objects.select_related().only(
-                'id', 'title', 'shape', 'pattern', 'size', 'colors',
-                'views_count', 'saves_count', 'created_at'
-            )
-            
-            for post in all_posts:
-                score = RecommendationEngine._calculate_post_score(
-                    post, tag_scores, user
-                )
-                if score > 0:
-                    scored_posts.append((post, score))
-            
-            # Sort by score and return top posts
-            scored_posts.sort(key=lambda x: x[1], reverse=True)
-            result = [post for post, score in scored_posts[:limit]]
+        tag_scores = RecommendationEngine.get_interest_scores(user)
+        post_ids = RecommendationEngine.rank_post_ids(tag_scores, limit)
+        
+        cache.set(cache_key, post_ids, timeout=300)  # Cache for 5 minutes
+        return hydrate_posts(post_ids)
+
+    @staticmethod
+    def get_interest_scores(user: User) -> Dict:
+        """
+        Get a user's decayed interest scores
+        
+        Args:
+            user: User object
             
-            cache.set(cache_key, result, timeout=300)  # Cache for 5 minutes
-            return result
+        Returns:
+            Dictionary of tag -> score, empty for users without interests
+        """
+        if not getattr(user, 'is_authenticated', False):
+            return {}
+        # Each interest decays from its own updates (half-life INTEREST_DECAY['HALF_LIFE_DAYS'])
+        return get_interest_scores(user.id)
+
+    @staticmethod
+    def rank_post_ids(tag_scores: Dict, limit: int, exclude_ids: Optional[Iterable[int]] = None) -> List[int]:
+        """
+        Rank posts for a set of interests
+        
+        Args:
+            tag_scores: Decayed interest scores (empty for new users)
+            limit: Number of post IDs to return
+            exclude_ids: Post IDs to leave out (e.g. already shown)
             
-        except (InterestProfile.DoesNotExist, AttributeError):
-            # Fallback to trending posts
-            result = RecommendationEngine._get_trending_posts(limit)
-            cache.set(cache_key, result, timeout=300)
-            return result
+        Returns:
+            Up to `limit` post IDs, best first
+        """
+        if not tag_scores:
+            # New user - return trending posts
+            excluded = set(exclude_ids or ())
+            trending = get_trending_post_ids(limit + len(excluded))
+            return [post_id for post_id in trending if post_id not in excluded][:limit]
+        
+        # Score the whole catalog in one vectorized pass
+        return get_catalog().top_n(tag_scores, limit, exclude_ids=exclude_ids)
 
     @staticmethod
     def _calculate_post_score(post: Post, tag_scores: Dict, user: User) -> float:
@@ -96,71 +111,49 @@ class RecommendationEngine:
         
         if post.shape:
             post_tags.append(post.shape)
-            interest_score += tag_scores.get(post.shape, 0) * 2.0  # Shape is important
+            interest_score += tag_scores.get(post.shape, 0) * FIELD_WEIGHTS['shape']
         
         if post.pattern:
             post_tags.append(post.pattern)
-            interest_score += tag_scores.get(post.pattern, 0) * 1.5  # Pattern moderately important
+            interest_score += tag_scores.get(post.pattern, 0) * FIELD_WEIGHTS['pattern']
         
         if post.size:
             post_tags.append(post.size)
-            interest_score += tag_scores.get(post.size, 0) * 1.0
+            interest_score += tag_scores.get(post.size, 0) * FIELD_WEIGHTS['size']
         
         if post.colors:
-            for color in post.colors[:3]:  # Limit to top 3 colors
+            for color in post.colors[:MAX_SCORED_COLORS]:  # Limit to top 3 colors
                 post_tags.append(color)
-                interest_score += tag_scores.get(color, 0) * 0.8
+                interest_score += tag_scores.get(color, 0) * FIELD_WEIGHTS['color']
         
-        score += interest_score * 0.4
+        score += interest_score * INTEREST_WEIGHT
         
         # 2. Popularity-based scoring (30% weight)
         # Normalize views and saves
         popularity_score = (
-            math.log1p(post.views_count) * 0.3 +
-            math.log1p(post.saves_count) * 0.7  # Saves are more valuable
+            math.log1p(post.views_count) * VIEWS_WEIGHT +
+            math.log1p(post.saves_count) * SAVES_WEIGHT
         )
-        score += popularity_score * 0.3
+        score += popularity_score * POPULARITY_WEIGHT
         
         # 3. Freshness scoring (20% weight)
         # Newer posts get a boost
         from django.utils import timezone
-        import datetime
         
         age_days = (timezone.now() - post.created_at).days
-        freshness_score = max(0, 10 - age_days * 0.1)  # Decay over 100 days
-        score += freshness_score * 0.2
+        freshness_score = max(0, FRESHNESS_MAX - age_days * FRESHNESS_DECAY_PER_DAY)
+        score += freshness_score * FRESHNESS_WEIGHT
         
         # 4. Diversity bonus (10% weight)
         # Slightly boost posts that differ from user's usual preferences
         diversity_score = 0
-        uncommon_tags = [tag for tag in post_tags if tag_scores.get(tag, 0) < 2]
+        uncommon_tags = [tag for tag in post_tags if tag_scores.get(tag, 0) < DIVERSITY_THRESHOLD]
         if uncommon_tags:
-            diversity_score = len(uncommon_tags) * 0.5
-        score += diversity_score * 0.1
+            diversity_score = len(uncommon_tags) * DIVERSITY_BONUS
+        score += diversity_score * DIVERSITY_WEIGHT
         
         return score
 
-    @staticmethod
-    def _apply_interest_decay(tag_scores: Dict, decay_rate: float = 0.95) -> Dict:
-        """
-        Apply exponential decay to old interests to keep recommendations fresh
-        
-        Args:
-            tag_scores: Dictionary of tag scores
-            decay_rate: Rate of decay (0.95 = 5% decay per period)
-            
-        Returns:
-            Dictionary with decayed scores
-        """
-        # In a real implementation, you'd track timestamps for each interest
-        # For now, apply a simple decay to all scores
-        decayed_scores = {}
-        for tag, score in tag_scores.items():
-            if score > 0.5:  # Only keep significant interests
-                decayed_scores[tag] = score * decay_rate
-        
-        return decayed_scores
-
     @staticmethod
     def _get_trending_posts(limit: int = 100) -> List[Post]:
         """
@@ -172,19 +165,8 @@ class RecommendationEngine:
         Returns:
             List of trending Post objects
         """
-        from django.utils import timezone
-        import datetime
-        
-        # Get posts from last 30 days, sorted by engagement
-        thirty_days_ago = timezone.now() - datetime.timedelta(days=30)
-        
-        trending = Post.objects.filter(
-            created_at__gte=thirty_days_ago
-        ).annotate(
-            engagement_score=F('views_count') + F('saves_count') * 3
-        ).order_by('-engagement_score')[:limit]
-        
-        return list(trending)
+        # Precomputed decayed ranking from hourly engagement rollups
+        return hydrate_posts(get_trending_post_ids(limit))
 
     @staticmethod
     def get_similar_posts(post: Post, limit: int = 48) -> List[Post]:
@@ -198,11 +180,11 @@ class RecommendationEngine:
         Returns:
             List of similar Post objects
         """
-        cache_key = f"similar:post:{post.id}:limit:{limit}"
-        cached_result = cache.get(cache_key)
+        cache_key = similar_posts_namespace(post.id).key('limit', limit)
+        cached_ids = cache.get(cache_key)
         
-        if cached_result is not None:
-            return cached_result
+        if cached_ids is not None:
+            return hydrate_posts(cached_ids)
         
         # Build query for similar posts
         q_objects = Q()
@@ -239,7 +221,7 @@ class RecommendationEngine:
         scored_posts.sort(key=lambda x: x[1], reverse=True)
         result = [p for p, score in scored_posts[:limit]]
         
-        cache.set(cache_key, result, timeout=600)  # Cache for 10 minutes
+        cache.set(cache_key, [p.id for p in result], timeout=600)  # Cache for 10 minutes
         return result
 
     @staticmethod
@@ -274,57 +256,35 @@ class RecommendationEngine:
         Returns:
             List of recommended Post objects
         """
-        cache_key = f"collaborative:user:{user.id}:limit:{limit}"
-        cached_result = cache.get(cache_key)
+        cache_key = user_recommendations(user.id).key('collaborative', limit)
+        cached_ids = cache.get(cache_key)
         
-        if cached_result is not None:
-            return cached_result
+        if cached_ids is not None:
+            return hydrate_posts(cached_ids)
         
-        # Get user's saved posts
-        user_saved_post_ids = set(
-            Collection.objects.filter(user=user).values_list('posts__id', flat=True)
-        )
+        # Neighbours and candidates come from the in-memory sparse matrix
+        # (not loaded yet on a cold start; the matrix is then being rebuilt in the background)
+        matrix = get_interaction_matrix()
+        recommended_post_ids = matrix.recommend(user.id, limit=limit) if matrix is not None else []
         
-        if not user_saved_post_ids:
+        if not recommended_post_ids:
             return []
         
-        # Find users with similar saves
-        similar_users = User.objects.filter(
-            collections__posts__id__in=user_saved_post_ids
-        ).exclude(id=user.id).annotate(
-            common_posts=Count('collections__posts')
-        ).filter(common_posts__gte=2).order_by('-common_posts')[:20]
-        
-        # Get posts saved by similar users that current user hasn't saved
-        recommended_post_ids = Collection.objects.filter(
-            user__in=similar_users
-        ).exclude(
-            posts__id__in=user_saved_post_ids
-        ).values_list('posts__id', flat=True).distinct()
-        
-        # Get the actual posts with engagement scores
-        recommended_posts = Post.objects.filter(
-            id__in=recommended_post_ids
-        ).annotate(
-            engagement=F('saves_count') * 2 + F('views_count')
-        ).order_by('-engagement')[:limit]
-        
-        result = list(recommended_posts)
-        cache.set(cache_key, result, timeout=600)
-        return result
+        cache.set(cache_key, recommended_post_ids, timeout=600)
+        return hydrate_posts(recommended_post_ids)
 
     @staticmethod
-    def update_user_interests(user: User, post: Post, interaction_type: str):
+    def interest_deltas(post: Post, interaction_type: str) -> Dict[str, float]:
         """
-        Update user's interest profile based on interaction
+        Interest score increments produced by one interaction with a post
         
         Args:
-            user: User object
             post: Post object that was interacted with
             interaction_type: 'view', 'save', 'try_on'
+            
+        Returns:
+            Dictionary of tag -> score increment
         """
-        profile, created = InterestProfile.objects.get_or_create(user=user)
-        
         # Weight different interactions differently
         weights = {
             'view': 0.1,
@@ -334,23 +294,38 @@ class RecommendationEngine:
         }
         
         weight = weights.get(interaction_type, 0.1)
+        deltas = defaultdict(float)
         
-        # Update interest scores
         if post.shape:
-            profile.tag_scores[post.shape] = profile.tag_scores.get(post.shape, 0) + weight * 2.0
+            deltas[post.shape] += weight * 2.0
         
         if post.pattern:
-            profile.tag_scores[post.pattern] = profile.tag_scores.get(post.pattern, 0) + weight * 1.5
+            deltas[post.pattern] += weight * 1.5
         
         if post.size:
-            profile.tag_scores[post.size] = profile.tag_scores.get(post.size, 0) + weight * 1.0
+            deltas[post.size] += weight * 1.0
         
         if post.colors:
             for color in post.colors:
-                profile.tag_scores[color] = profile.tag_scores.get(color, 0) + weight * 0.8
+                deltas[color] += weight * 0.8
+        
+        return dict(deltas)
+
+    @staticmethod
+    def update_user_interests(user: User, post: Post, interaction_type: str):
+        """
+        Update user's interest profile based on interaction
         
-        profile.save()
+        Tracking endpoints go through core.interaction_buffer instead, which
+        applies the same deltas in batches.
+        
+        Args:
+            user: User object
+            post: Post object that was interacted with
+            interaction_type: 'view', 'save', 'try_on'
+        """
+        # One atomic upsert per tag, safe against concurrent updates
+        add_interests({user.id: RecommendationEngine.interest_deltas(post, interaction_type)})
         
-        # Invalidate cache
-        cache.delete(f"recommendations:user:{user.id}:*")
-        cache.delete(f"collaborative:user:{user.id}:*")
+        # Invalidate cache (feed and collaborative results share the namespace)
+        user_recommendations(user.id).invalidate()
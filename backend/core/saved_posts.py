@@ -0,0 +1,70 @@
+"""
+Per-user set of saved post IDs, for `is_saved` flags on post lists.
+
+The IDs of every post a user has in any collection are kept in the cache as
+one sorted int64 array (8 bytes per saved post). Flagging a page of posts is
+then a vectorized binary search with no database round trip. Any change to
+the user's memberships drops the cached array (see core.memberships) and the
+next read rebuilds it with a single query.
+"""
+
+from typing import Iterable, Optional
+
+import numpy as np
+from django.core.cache import cache
+
+from .models import Collection
+
+SAVED_KEY_PREFIX = 'saved:user'
+SAVED_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _cache_key(user_id: int) -> str:
+    return f"{SAVED_KEY_PREFIX}:{user_id}"
+
+
+class SavedPostSet:
+    """Sorted array of the post IDs a user has saved."""
+
+    def __init__(self, post_ids: Optional[np.ndarray] = None):
+        self.post_ids = post_ids if post_ids is not None else np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def for_user(cls, user) -> 'SavedPostSet':
+        """Load the user's saved set (empty for anonymous users)."""
+        if not getattr(user, 'is_authenticated', False):
+            return cls()
+
+        raw = cache.get(_cache_key(user.id))
+        if raw is not None:
+            return cls(np.frombuffer(raw, dtype=np.int64))
+
+        post_ids = np.unique(np.fromiter(
+            Collection.posts.through.objects.filter(collection__user_id=user.id).values_list('post_id', flat=True),
+            dtype=np.int64,
+        ))
+        cache.set(_cache_key(user.id), post_ids.tobytes(), timeout=SAVED_CACHE_TIMEOUT)
+        return cls(post_ids)
+
+    def contains(self, post_ids: Iterable[int]) -> np.ndarray:
+        """Boolean array: True where the post is saved."""
+        ids = np.fromiter(post_ids, dtype=np.int64)
+        if not len(self.post_ids) or not len(ids):
+            return np.zeros(len(ids), dtype=bool)
+        positions = np.minimum(np.searchsorted(self.post_ids, ids), len(self.post_ids) - 1)
+        return self.post_ids[positions] == ids
+
+    def __contains__(self, post_id: int) -> bool:
+        return bool(self.contains([post_id])[0])
+
+    def __len__(self) -> int:
+        return len(self.post_ids)
+
+
+def invalidate_saved(user_id: int):
+    """
+    Drop the user's cached set after their memberships changed; the next
+    read rebuilds it from the database. Patching the cached array instead
+    would be a read-modify-write that concurrent saves could overwrite.
+    """
+    cache.delete(_cache_key(user_id))
@@ -0,0 +1,234 @@
+"""
+Vectorized scoring engine for the personalized feed.
+
+The post catalog is held in memory as one sparse one-hot feature matrix
+(ELLPACK layout: every row stores the column indices of its active shape,
+pattern, size and color features) next to dense popularity and age columns.
+Scoring a user is then a single sparse matrix-vector product against their
+interest vector, and the top N posts are picked with a partial selection
+instead of a full sort.
+"""
+
+import datetime
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+# ===== SCORING WEIGHTS (shared with RecommendationEngine._calculate_post_score) =====
+INTEREST_WEIGHT = 0.4
+POPULARITY_WEIGHT = 0.3
+FRESHNESS_WEIGHT = 0.2
+DIVERSITY_WEIGHT = 0.1
+
+FIELD_WEIGHTS = {
+    'shape': 2.0,  # Shape is important
+    'pattern': 1.5,  # Pattern moderately important
+    'size': 1.0,
+    'color': 0.8,
+}
+
+VIEWS_WEIGHT = 0.3
+SAVES_WEIGHT = 0.7  # Saves are more valuable
+
+FRESHNESS_MAX = 10
+FRESHNESS_DECAY_PER_DAY = 0.1  # Decay over 100 days
+
+DIVERSITY_THRESHOLD = 2
+DIVERSITY_BONUS = 0.5
+
+MAX_SCORED_COLORS = 3  # Only the top 3 colors contribute to the score
+
+_ATTRIBUTE_FIELDS = ('shape', 'pattern', 'size')
+_MICROSECONDS_PER_DAY = 86_400 * 1_000_000
+_PADDING_COLUMN = 0
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def to_epoch_us(value: datetime.datetime) -> int:
+    """Converts an aware datetime to integer microseconds since the epoch."""
+    delta = value - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+class PostCatalog:
+    """
+    In-memory matrix view of every post used for feed scoring.
+
+    Attributes:
+        ids: Post IDs, in the catalog's default order (newest first).
+        features: (N, 3 + MAX_SCORED_COLORS) int32 matrix of feature column
+            indices. Column 0 is a padding column that always scores zero.
+        columns: Feature column index -> (field, value).
+        views, saves: Engagement counters as float64 vectors.
+        created_us: Creation time in epoch microseconds (int64).
+    """
+
+    def __init__(self, ids, features, columns, views, saves, created_us, popularity=None):
+        self.ids = ids
+        self.features = features
+        self.columns = columns
+        self.column_index = {column: index for index, column in enumerate(columns) if column is not None}
+        self.views = views
+        self.saves = saves
+        self.created_us = created_us
+        self.built_at = time.monotonic()
+
+        # Popularity never depends on the user, so it is computed once per build
+        # (or read precomputed from a shared catalog snapshot)
+        self._popularity = popularity if popularity is not None else self.popularity(views, saves)
+
+    @staticmethod
+    def popularity(views: np.ndarray, saves: np.ndarray) -> np.ndarray:
+        return (np.log1p(views) * VIEWS_WEIGHT + np.log1p(saves) * SAVES_WEIGHT) * POPULARITY_WEIGHT
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence]) -> 'PostCatalog':
+        """
+        Build a catalog from (id, shape, pattern, size, colors, views_count,
+        saves_count, created_at) tuples.
+        """
+        columns = [None]  # Column 0 is the padding column
+        column_index = {}
+
+        def column_for(field, value):
+            key = (field, value)
+            index = column_index.get(key)
+            if index is None:
+                index = column_index[key] = len(columns)
+                columns.append(key)
+            return index
+
+        ids, features, views, saves, created = [], [], [], [], []
+        for post_id, shape, pattern, size, colors, views_count, saves_count, created_at in rows:
+            row = [_PADDING_COLUMN] * (len(_ATTRIBUTE_FIELDS) + MAX_SCORED_COLORS)
+            for position, (field, value) in enumerate(zip(_ATTRIBUTE_FIELDS, (shape, pattern, size))):
+                if value:
+                    row[position] = column_for(field, value)
+            if colors and isinstance(colors, list):
+                for position, color in enumerate(colors[:MAX_SCORED_COLORS]):
+                    row[len(_ATTRIBUTE_FIELDS) + position] = column_for('color', color)
+
+            ids.append(post_id)
+            features.append(row)
+            views.append(views_count)
+            saves.append(saves_count)
+            created.append(to_epoch_us(created_at))
+
+        width = len(_ATTRIBUTE_FIELDS) + MAX_SCORED_COLORS
+        return cls(
+            ids=np.asarray(ids, dtype=np.int64),
+            features=np.asarray(features, dtype=np.int32).reshape(-1, width),
+            columns=columns,
+            views=np.asarray(views, dtype=np.float64),
+            saves=np.asarray(saves, dtype=np.float64),
+            created_us=np.asarray(created, dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls) -> 'PostCatalog':
+        """Build a catalog from the database."""
+        from .models import Post
+
+        rows = Post.objects.order_by('-created_at', '-id').values_list(
+            'id', 'shape', 'pattern', 'size', 'colors', 'views_count', 'saves_count', 'created_at'
+        ).iterator(chunk_size=5000)
+        return cls.from_rows(rows)
+
+    def user_vector(self, tag_scores: Dict[str, float]) -> np.ndarray:
+        """
+        Project a user's tag scores onto the feature columns.
+
+        Each column carries both its weighted interest contribution and the
+        diversity bonus it earns when the user has little interest in it.
+        """
+        vector = np.zeros(len(self.columns), dtype=np.float64)
+        for index, column in enumerate(self.columns):
+            if column is None:
+                continue
+            field, value = column
+            interest = tag_scores.get(value, 0)
+            vector[index] = interest * FIELD_WEIGHTS[field] * INTEREST_WEIGHT
+            if interest < DIVERSITY_THRESHOLD:
+                vector[index] += DIVERSITY_BONUS * DIVERSITY_WEIGHT
+        return vector
+
+    def freshness(self, now=None) -> np.ndarray:
+        """Freshness component for every post, using whole days of age."""
+        now_us = to_epoch_us(now or timezone.now())
+        age_days = (now_us - self.created_us) // _MICROSECONDS_PER_DAY
+        return np.maximum(0, FRESHNESS_MAX - age_days * FRESHNESS_DECAY_PER_DAY) * FRESHNESS_WEIGHT
+
+    def score(self, tag_scores: Dict[str, float], now=None) -> np.ndarray:
+        """Score every post in the catalog for the given tag scores."""
+        vector = self.user_vector(tag_scores)
+        # Sparse (ELLPACK) matrix-vector product: gather the weight of each
+        # active column and sum across the row
+        interest = vector[self.features].sum(axis=1)
+        return interest + self._popularity + self.freshness(now)
+
+    def top_n(self, tag_scores: Dict[str, float], limit: int, now=None,
+              exclude_ids: Optional[Iterable[int]] = None) -> List[int]:
+        """
+        Return the IDs of the `limit` best scoring posts.
+
+        Ties keep catalog order, matching a stable sort over the same rows.
+        """
+        if limit <= 0 or not len(self):
+            return []
+
+        scores = self.score(tag_scores, now)
+        mask = scores > 0
+        if exclude_ids:
+            mask &= ~np.isin(self.ids, np.fromiter(exclude_ids, dtype=np.int64))
+        candidates = np.flatnonzero(mask)
+
+        if candidates.size > limit:
+            # Partial selection: find the score of the limit-th best post and
+            # keep everything at or above it so ties are resolved below
+            partition = np.argpartition(-scores[candidates], limit - 1)[:limit]
+            threshold = scores[candidates[partition]].min()
+            candidates = candidates[scores[candidates] >= threshold]
+
+        order = np.lexsort((candidates, -scores[candidates]))[:limit]
+        return self.ids[candidates[order]].tolist()
+
+
+_catalog: Optional[PostCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> PostCatalog:
+    """
+    Return the catalog of the shared snapshot (see core.catalog_snapshot),
+    or else this process's own catalog, rebuilt once it is older than
+    RECOMMENDATION_CATALOG_TTL seconds.
+    """
+    from .catalog_snapshot import get_snapshot
+
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        return snapshot.catalog
+
+    global _catalog
+    ttl = getattr(settings, 'RECOMMENDATION_CATALOG_TTL', 300)
+    catalog = _catalog
+    if catalog is not None and time.monotonic() - catalog.built_at < ttl:
+        return catalog
+
+    with _catalog_lock:
+        if _catalog is None or time.monotonic() - _catalog.built_at >= ttl:
+            _catalog = PostCatalog.load()
+        return _catalog
+
+
+def invalidate_catalog():
+    """Drop this process's catalog so the next request rebuilds it."""
+    global _catalog
+    _catalog = None
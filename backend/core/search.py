@@ -0,0 +1,85 @@
+"""
+Free-text search over post titles.
+
+On Postgres the text is matched against the GIN-indexed Post.search_vector
+column (kept in sync on save) and results are ordered by ts_rank. Other
+backends, e.g. SQLite test databases, fall back to one case-insensitive
+substring filter per term in the original order; there the column is never
+filled and its index is a plain one (see core.fields.PortableGinIndex).
+
+A query made only of stopwords ("the", "with", ...) becomes an empty
+tsquery on Postgres, which matches no rows. Such a query adds no text
+condition at all, so the listing falls back to its attribute filters.
+"""
+
+import re
+from functools import lru_cache
+from typing import List
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, QuerySet
+
+SEARCH_CONFIG = 'english'
+
+_TERM_PATTERN = re.compile(r'\w+')
+
+
+def full_text_available() -> bool:
+    return connection.vendor == 'postgresql'
+
+
+def title_vector() -> SearchVector:
+    """Expression that Post.search_vector is maintained from."""
+    return SearchVector('title', config=SEARCH_CONFIG)
+
+
+def update_search_vector(queryset: QuerySet) -> int:
+    """Recompute search_vector for the posts in `queryset` (no-op off Postgres)."""
+    if not full_text_available():
+        return 0
+    return queryset.update(search_vector=title_vector())
+
+
+def search_terms(text: str) -> List[str]:
+    return _TERM_PATTERN.findall(text.lower())
+
+
+@lru_cache(maxsize=1024)
+def _has_lexemes(raw_query: str) -> bool:
+    """Whether a raw tsquery keeps any lexeme once stopwords are dropped."""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT numnode(to_tsquery(%s::regconfig, %s))', [SEARCH_CONFIG, raw_query])
+        return cursor.fetchone()[0] > 0
+
+
+def search_posts(queryset: QuerySet, text: str) -> QuerySet:
+    """
+    Keep posts whose title matches every term in `text`, best match first.
+    The last term is matched as a prefix so partially typed words still hit.
+
+    Args:
+        queryset: Posts to search within
+        text: Raw free-text query
+
+    Returns:
+        Filtered queryset, ordered by relevance on Postgres (unchanged when
+        every term is a stopword)
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset
+
+    if not full_text_available():
+        for term in terms:
+            queryset = queryset.filter(title__icontains=term)
+        return queryset
+
+    # Terms are plain word characters, so they are safe to join into a raw tsquery
+    raw_query = ' & '.join(terms[:-1] + [f"{terms[-1]}:*"])
+    if not _has_lexemes(raw_query):
+        return queryset
+    query = SearchQuery(raw_query, config=SEARCH_CONFIG, search_type='raw')
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F('search_vector'), query)
+    ).order_by('-search_rank', '-created_at')
@@ -0,0 +1,218 @@
+"""
+Bounded summaries of what users search for.
+
+Search queries are split by the keyword extractor: the shapes, patterns,
+sizes and colors they name become interest tags (see core.interaction_buffer),
+and only the leftover free-text words are kept here, in two fixed-size
+structures:
+
+- per user, a Space-Saving top-K summary (SEARCH_TRACKING['USER_TERMS']
+  entries) stored on InterestProfile.search_terms, so a profile no longer
+  grows with every new word searched;
+- globally, one Count-Min sketch per hour of whole normalized queries, plus a
+  Space-Saving list of candidate queries for that hour, stored in the cache.
+  Trending searches are the candidates ranked by their sketch counts over the
+  last WINDOW_HOURS, each hour weighted by 0.5 ** (age / HALF_LIFE_HOURS).
+
+Hourly entries are updated with a read-modify-write by the interaction
+flusher. Two processes flushing at the same moment can lose one batch of
+counts, which only makes trending slightly less exact.
+"""
+
+import hashlib
+import re
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .keyword_extractor import _normalize_text
+
+SEARCH_TRENDS_KEY_PREFIX = 'search:trends'
+TRENDING_SEARCHES_CACHE_KEY = 'search:trending'
+
+# Longest query counted towards trending searches
+MAX_QUERY_LENGTH = 100
+
+TERM_RE = re.compile(r'[a-z]{3,}')
+
+# Leftover words that say nothing about what the user wants
+TERM_STOPWORDS = frozenset({
+    'and', 'the', 'for', 'with', 'nail', 'nails', 'design', 'designs', 'art', 'idea', 'ideas',
+    'this', 'that', 'your', 'you', 'are', 'from', 'look', 'style', 'manicure', 'some', 'show', 'want',
+})
+
+
+def _config(name: str, default):
+    return getattr(settings, 'SEARCH_TRACKING', {}).get(name, default)
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitter summary with at most `capacity` entries.
+
+    When full, a new item takes over the entry with the smallest count and
+    inherits that count as its error, so counts overestimate by at most
+    `error` and every item seen more than total / capacity times is kept.
+    """
+
+    def __init__(self, capacity: int, entries: Optional[Dict[str, list]] = None):
+        self.capacity = capacity
+        # item -> [count, error]
+        self.entries: Dict[str, list] = {item: list(entry) for item, entry in (entries or {}).items()}
+        while len(self.entries) > capacity:
+            del self.entries[min(self.entries, key=lambda item: self.entries[item][0])]
+
+    def add(self, item: str, count: int = 1):
+        entry = self.entries.get(item)
+        if entry is not None:
+            entry[0] += count
+        elif len(self.entries) < self.capacity:
+            self.entries[item] = [count, 0]
+        else:
+            evicted = min(self.entries, key=lambda key: self.entries[key][0])
+            floor = self.entries.pop(evicted)[0]
+            self.entries[item] = [floor + count, floor]
+
+    def top(self, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """(item, count) pairs, highest count first."""
+        ranked = sorted(self.entries.items(), key=lambda item: (-item[1][0], item[0]))
+        return [(item, entry[0]) for item, entry in ranked[:limit]]
+
+    def to_dict(self) -> Dict[str, list]:
+        return self.entries
+
+
+class CountMinSketch:
+    """
+    `depth` rows of `width` counters; an item's count is the minimum of its
+    counters, which never underestimates and overestimates by at most
+    e / width of the total with probability 1 - exp(-depth).
+    """
+
+    def __init__(self, width: int, depth: int, table: Optional[bytes] = None):
+        self.width = width
+        self.depth = depth
+        if table is not None and len(table) == width * depth * 4:
+            self.table = np.frombuffer(table, dtype=np.uint32).reshape(depth, width).copy()
+        else:
+            # Missing, or written with different dimensions
+            self.table = np.zeros((depth, width), dtype=np.uint32)
+
+    def _columns(self, item: str) -> np.ndarray:
+        digest = hashlib.blake2b(item.encode(), digest_size=4 * self.depth).digest()
+        return np.frombuffer(digest, dtype='<u4') % self.width
+
+    def add(self, item: str, count: int = 1):
+        self.table[np.arange(self.depth), self._columns(item)] += np.uint32(count)
+
+    def estimate(self, item: str) -> int:
+        return int(self.table[np.arange(self.depth), self._columns(item)].min())
+
+    def to_bytes(self) -> bytes:
+        return self.table.tobytes()
+
+
+# --- Per-user search terms ---
+
+def leftover_terms(remaining_query: str) -> List[str]:
+    """Words worth tracking from the text the keyword extractor left over."""
+    return [term for term in TERM_RE.findall(remaining_query) if term not in TERM_STOPWORDS]
+
+
+def update_user_terms(search_terms: Dict[str, list], term_counts: Dict[str, int]) -> Dict[str, list]:
+    """
+    Add term counts to a profile's stored summary.
+
+    Args:
+        search_terms: InterestProfile.search_terms
+        term_counts: term -> number of new searches using it
+
+    Returns:
+        The updated summary, bounded to SEARCH_TRACKING['USER_TERMS'] entries
+    """
+    summary = SpaceSaving(_config('USER_TERMS', 20), search_terms)
+    for term, count in sorted(term_counts.items()):
+        summary.add(term, count)
+    return summary.to_dict()
+
+
+# --- Global trending searches ---
+
+def _bucket_key(hour: datetime) -> str:
+    return f"{SEARCH_TRENDS_KEY_PREFIX}:{hour.strftime('%Y%m%d%H')}"
+
+
+def _bucket_timeout() -> int:
+    return (_config('WINDOW_HOURS', 24) + 1) * 3600
+
+
+def _load_bucket(hour: datetime, stored: Optional[dict] = None) -> Tuple[CountMinSketch, SpaceSaving]:
+    """Decode an hour's bucket, read from the cache unless `stored` is given."""
+    if stored is None:
+        stored = cache.get(_bucket_key(hour)) or {}
+    sketch = CountMinSketch(_config('SKETCH_WIDTH', 2048), _config('SKETCH_DEPTH', 4), stored.get('sketch'))
+    candidates = SpaceSaving(_config('CANDIDATES', 200), stored.get('candidates'))
+    return sketch, candidates
+
+
+def normalize_query(query: str) -> str:
+    return _normalize_text(query)[:MAX_QUERY_LENGTH].strip()
+
+
+def record_searches(queries_by_hour: Dict[datetime, Counter]):
+    """
+    Count searches into the hourly sketches.
+
+    Args:
+        queries_by_hour: hour (truncated) -> Counter of normalized queries
+    """
+    for hour, queries in queries_by_hour.items():
+        sketch, candidates = _load_bucket(hour)
+        for query, count in sorted(queries.items()):
+            if query:
+                sketch.add(query, count)
+                candidates.add(query, count)
+        cache.set(_bucket_key(hour), {'sketch': sketch.to_bytes(), 'candidates': candidates.to_dict()},
+                  timeout=_bucket_timeout())
+
+
+def compute_trending_searches(limit: int, now: Optional[datetime] = None) -> List[dict]:
+    """
+    Rank the hourly candidates by time-decayed sketch counts.
+
+    Returns:
+        [{'query', 'score'}], most trending first
+    """
+    now = now or timezone.now()
+    current_hour = now.replace(minute=0, second=0, microsecond=0)
+    half_life = _config('HALF_LIFE_HOURS', 6)
+
+    hours = [current_hour - timedelta(hours=age) for age in range(_config('WINDOW_HOURS', 24))]
+    stored = cache.get_many([_bucket_key(hour) for hour in hours])
+    buckets = [
+        (0.5 ** (age / half_life), *_load_bucket(hour, stored[_bucket_key(hour)]))
+        for age, hour in enumerate(hours) if _bucket_key(hour) in stored
+    ]
+
+    candidates = {query for _, _, bucket_candidates in buckets for query in bucket_candidates.entries}
+    scores = {
+        query: sum(weight * sketch.estimate(query) for weight, sketch, _ in buckets)
+        for query in candidates
+    }
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    return [{'query': query, 'score': round(score, 2)} for query, score in ranked if score > 0]
+
+
+def trending_searches(limit: int = 10) -> List[dict]:
+    """Trending searches, recomputed at most every SEARCH_TRACKING['TRENDING_TTL'] seconds."""
+    cache_key = f"{TRENDING_SEARCHES_CACHE_KEY}:{limit}"
+    results = cache.get(cache_key)
+    if results is None:
+        results = compute_trending_searches(limit)
+        cache.set(cache_key, results, timeout=_config('TRENDING_TTL', 60))
+    return results
@@ -0,0 +1,132 @@
+"""
+Compact per-user record of posts already seen.
+
+Each user gets a rotating pair of small Bloom filters (SEEN_FILTER['BITS']
+bits each) stored as one cache entry. Clicked posts and served feed pages
+are added to the current filter; once it holds CAPACITY posts it becomes
+the previous filter and a fresh one is started, so memory stays fixed and
+the false positive rate stays near 1% while the last one to two
+generations of history are remembered.
+
+Updates are a read-modify-write of the cache entry. Two concurrent updates
+can lose one of their additions, which only means a post may be shown
+again; it never hides a post that was not seen.
+"""
+
+from typing import Iterable, List, Optional
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+SEEN_KEY_PREFIX = 'seen:user'
+
+# Salt separating the two hash streams of double hashing
+_SECOND_HASH_SALT = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _config(name: str, default):
+    return getattr(settings, 'SEEN_FILTER', {}).get(name, default)
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer; wraps modulo 2**64 like the reference version."""
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+class SeenFilter:
+    """
+    Rotating pair of Bloom filters over post IDs.
+
+    Usage:
+        seen = SeenFilter.load(user.id)
+        post_ids = seen.demote(post_ids)
+    """
+
+    def __init__(self, user_id: int, current: Optional[bytes] = None, previous: Optional[bytes] = None,
+                 count: int = 0):
+        self.user_id = user_id
+        self.bits = _config('BITS', 2048)
+        self.hashes = _config('HASHES', 4)
+        self.current = self._bitmap(current)
+        self.previous = self._bitmap(previous)
+        self.count = count
+
+    def _bitmap(self, raw: Optional[bytes]) -> np.ndarray:
+        if raw is None or len(raw) * 8 != self.bits:
+            # Missing, or written with a different BITS setting
+            return np.zeros(self.bits // 8, dtype=np.uint8)
+        return np.frombuffer(raw, dtype=np.uint8).copy()
+
+    @staticmethod
+    def cache_key(user_id: int) -> str:
+        return f"{SEEN_KEY_PREFIX}:{user_id}"
+
+    @classmethod
+    def load(cls, user_id: int) -> 'SeenFilter':
+        stored = cache.get(cls.cache_key(user_id)) or {}
+        return cls(user_id, **stored)
+
+    def save(self):
+        cache.set(self.cache_key(self.user_id), {
+            'current': self.current.tobytes(),
+            'previous': self.previous.tobytes(),
+            'count': self.count,
+        }, timeout=_config('TIMEOUT', 60 * 60 * 24 * 30))
+
+    def _positions(self, post_ids: Iterable[int]) -> np.ndarray:
+        """Bit positions of each post, one row of HASHES positions per post."""
+        ids = np.fromiter(post_ids, dtype=np.int64).astype(np.uint64)
+        first = _mix(ids)
+        second = _mix(ids ^ _SECOND_HASH_SALT) | np.uint64(1)
+        steps = np.arange(self.hashes, dtype=np.uint64)
+        return ((first[:, None] + steps[None, :] * second[:, None]) % np.uint64(self.bits)).astype(np.int64)
+
+    @staticmethod
+    def _test(bitmap: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        return ((bitmap[positions >> 3] >> (positions & 7).astype(np.uint8)) & 1).all(axis=1)
+
+    def add(self, post_ids: Iterable[int]):
+        """Mark posts as seen, rotating the filters when the current one is full."""
+        post_ids = list(post_ids)
+        if not post_ids:
+            return
+
+        positions = self._positions(post_ids)
+        added = int((~self._test(self.current, positions)).sum())
+        if self.count + added > _config('CAPACITY', 200):
+            self.previous, self.current = self.current, np.zeros_like(self.current)
+            self.count = 0
+            added = len(set(post_ids))
+
+        flat = positions.ravel()
+        np.bitwise_or.at(self.current, flat >> 3, (1 << (flat & 7)).astype(np.uint8))
+        self.count += added
+
+    def contains(self, post_ids: Iterable[int]) -> np.ndarray:
+        """Boolean array: True where the post was (probably) seen."""
+        post_ids = list(post_ids)
+        if not post_ids:
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(post_ids)
+        return self._test(self.current, positions) | self._test(self.previous, positions)
+
+    def demote(self, post_ids: List[int]) -> List[int]:
+        """Reorder `post_ids` with unseen posts first, keeping order within each group."""
+        seen = self.contains(post_ids)
+        return [post_id for post_id, was_seen in zip(post_ids, seen) if not was_seen] + \
+               [post_id for post_id, was_seen in zip(post_ids, seen) if was_seen]
+
+
+def mark_seen(user, post_ids: Iterable[int]):
+    """Record posts shown to or opened by `user` (anonymous users are ignored)."""
+    if not getattr(user, 'is_authenticated', False):
+        return
+    post_ids = list(post_ids)
+    if not post_ids:
+        return
+    seen = SeenFilter.load(user.id)
+    seen.add(post_ids)
+    seen.save()
@@ -1,5 +1,8 @@
+from functools import lru_cache
+
 import requests
 from django.contrib.auth.password_validation import validate_password
+from django.db.models import QuerySet
 from rest_framework import serializers
 from .models import User, Post, Article, Collection, TryOn, UserSession
 
@@ -103,6 +106,32 @@ class EmailChangeConfirmSerializer(serializers.Serializer):
     token = serializers.CharField(required=True)
 
 
+# Hosts whose media URLs are rewritten onto BASE_URL
+LOCAL_URL_PREFIXES = ('http://127.0.0.1', 'http://localhost')
+
+
+@lru_cache(maxsize=1)
+def _media_base_url():
+    from django.conf import settings
+    return settings.BASE_URL
+
+
+@lru_cache(maxsize=100_000)
+def absolute_media_url(url):
+    """Make a stored image URL absolute against BASE_URL (memoized per URL)."""
+    if not url:
+        return url
+    base_url = _media_base_url()
+    # Replace localhost URLs with production BASE_URL
+    if url.startswith(LOCAL_URL_PREFIXES):
+        # Extract just the path part (e.g., /media/nails/...)
+        path = url.split('/', 3)[-1] if '/' in url.split('://', 1)[-1] else url
+        return f"{base_url}/{path}"
+    if url.startswith('http'):
+        return url
+    return f"{base_url}{url}"
+
+
 class PostSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField(read_only=True)
     try_on_image_url = serializers.SerializerMethodField(read_only=True)
@@ -113,32 +142,51 @@ class PostSerializer(serializers.ModelSerializer):
                   'try_on_image_url')
 
     def get_image_url(self, obj):
-        from django.conf import settings
-        base_url = settings.BASE_URL
-        url = obj.image_url
-        # Replace localhost URLs with production BASE_URL
-        if url.startswith('http://127.0.0.1') or url.startswith('http://localhost'):
-            # Extract just the path part (e.g., /media/nails/...)
-            path = url.split('/', 3)[-1] if '/' in url.split('://', 1)[-1] else url
-            return f"{base_url}/{path}"
-        if url.startswith('http'):
-            return url
-        return f"{base_url}{url}" if url else url
+        return absolute_media_url(obj.image_url)
 
     def get_try_on_image_url(self, obj):
-        from django.conf import settings
-        base_url = settings.BASE_URL
-        if not obj.try_on_image_url:
-            return obj.try_on_image_url
-        url = obj.try_on_image_url
-        # Replace localhost URLs with production BASE_URL
-        if url.startswith('http://127.0.0.1') or url.startswith('http://localhost'):
-            # Extract just the path part (e.g., /media/nails/...)
-            path = url.split('/', 3)[-1] if '/' in url.split('://', 1)[-1] else url
-            return f"{base_url}/{path}"
-        if url.startswith('http'):
-            return url
-        return f"{base_url}{url}"
+        return absolute_media_url(obj.try_on_image_url)
+
+
+def serialize_posts(posts, saved=None):
+    """
+    Read-only fast path producing exactly what PostSerializer(many=True)
+    does, without DRF's per-field machinery.
+
+    Args:
+        posts: A Post queryset (read with .values()) or an iterable of Post
+            instances or dict rows
+        saved: Optional SavedPostSet of the requesting user; when given,
+            every dict also gets an `is_saved` flag
+
+    Returns:
+        List of plain dicts
+    """
+    fields = PostSerializer.Meta.fields
+    if isinstance(posts, QuerySet):
+        rows = posts.values(*fields)
+    else:
+        rows = (post if isinstance(post, dict) else {field: getattr(post, field) for field in fields}
+                for post in posts)
+    data = [
+        {
+            'id': row['id'],
+            'title': row['title'],
+            'image_url': absolute_media_url(row['image_url']),
+            'width': row['width'],
+            'height': row['height'],
+            'shape': row['shape'],
+            'pattern': row['pattern'],
+            'size': row['size'],
+            'colors': row['colors'],
+            'try_on_image_url': absolute_media_url(row['try_on_image_url']),
+        }
+        for row in rows
+    ]
+    if saved is not None:
+        for item, is_saved in zip(data, saved.contains(item['id'] for item in data).tolist()):
+            item['is_saved'] = is_saved
+    return data
 
 
 class TryOnSerializer(serializers.ModelSerializer):
@@ -221,29 +269,36 @@ class CollectionListSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'posts_preview', 'post_count']
 
     def get_posts_preview(self, obj):
-        # Get the most recent 4 posts from the collection
-        recent_posts = obj.posts.order_by('-id')[:4]
+        # Prefetched by CollectionListView (one windowed query for all collections)
+        recent_posts = getattr(obj, 'preview_posts', None)
+        if recent_posts is None:
+            # Get the most recent 4 posts from the collection
+            recent_posts = obj.posts.order_by('-id')[:4]
         # Return a list of their image URLs
         return [post.image_url for post in recent_posts]
 
     def get_post_count(self, obj):
-        return obj.posts.count()
+        # Annotated by CollectionListView
+        post_count = getattr(obj, 'post_count', None)
+        return post_count if post_count is not None else obj.posts.count()
 
 
 class CollectionDetailSerializer(serializers.ModelSerializer):
-    # We will use a SerializerMethodField for more explicit control
-    posts = serializers.SerializerMethodField()
+    # Annotated by CollectionDetailView, which also adds the first page of posts
+    post_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Collection
-        fields = ['id', 'name', 'posts']
-
-    def get_posts(self, obj):
-        # 'obj' is the Collection instance.
-        # We get all posts related to it, ordered by most recent.
-        posts_queryset = obj.posts.all().order_by('-id')
-        # We manually serialize that list of posts using the PostSerializer.
-        return PostSerializer(posts_queryset, many=True).data
+        fields = ['id', 'name', 'post_count']
+
+
+class BulkCollectionMembershipSerializer(serializers.Serializer):
+    """Every post in post_ids is added to (or removed from) every collection in collection_ids."""
+    action = serializers.ChoiceField(choices=['add', 'remove'])
+    collection_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False,
+                                           max_length=50)
+    post_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False,
+                                     max_length=500)
 
 
 class PasswordResetRequestSerializer(serializers.Serializer):
@@ -0,0 +1,75 @@
+"""
+Reproducible shuffles of posts.
+
+`order_by('?')` sorts the whole table by random() on every request, so each
+page of a shuffled listing comes from a different order and users see
+duplicates. Here a post's place is a hash of (id, seed) instead: a
+bijective integer mix of the ID keyed by the seed. The same seed always
+gives the same order, so pages (and cursors) stay consistent, and the hash
+is computed identically in SQL and with numpy over in-memory ID lists.
+"""
+
+import hashlib
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.db.models import BigIntegerField, ExpressionWrapper, F, QuerySet
+
+HASH_MODULUS = 2 ** 32
+XOR_SHIFT = 15
+
+
+def shuffle_keys(seed) -> Tuple[int, int, int]:
+    """
+    Derive the hash keys (multiplier, offset, multiplier) for a seed. The
+    multipliers are odd, so every step is a bijection on 32-bit values, and
+    below 2**31, so no intermediate product overflows a signed bigint.
+    """
+    digest = hashlib.blake2b(str(seed).encode(), digest_size=12).digest()
+    first, offset, second = (int.from_bytes(digest[i:i + 4], 'little') for i in (0, 4, 8))
+    return (first % 2 ** 31) | 1, offset, (second % 2 ** 31) | 1
+
+
+def shuffle_rank(seed, field: str = 'id'):
+    """Database expression for the shuffle position of each row's `field`."""
+    first, offset, second = shuffle_keys(seed)
+    # The % operator (not MOD()) keeps the arithmetic integral on every backend
+    mixed = ExpressionWrapper((F(field) * first + offset) % HASH_MODULUS, output_field=BigIntegerField())
+    mixed = mixed.bitxor(mixed.bitrightshift(XOR_SHIFT))
+    return ExpressionWrapper(mixed * second % HASH_MODULUS, output_field=BigIntegerField())
+
+
+def seeded_shuffle(queryset: QuerySet, seed) -> QuerySet:
+    """Order `queryset` by the seeded shuffle of its primary keys."""
+    return queryset.annotate(shuffle_rank=shuffle_rank(seed)).order_by('shuffle_rank', 'pk')
+
+
+def shuffle_ids(ids: Iterable[int], seed, limit: Optional[int] = None) -> List[int]:
+    """
+    Order post IDs exactly as seeded_shuffle would order their posts.
+
+    Args:
+        ids: Post IDs (any order)
+        seed: Shuffle seed
+        limit: Keep only the first `limit` IDs of the shuffle
+
+    Returns:
+        Shuffled list of IDs
+    """
+    ids = np.asarray(ids if isinstance(ids, np.ndarray) else list(ids), dtype=np.uint64)
+    if not len(ids):
+        return []
+
+    first, offset, second = (np.uint64(key) for key in shuffle_keys(seed))
+    modulus = np.uint64(HASH_MODULUS)
+    mixed = (ids * first + offset) % modulus
+    mixed ^= mixed >> np.uint64(XOR_SHIFT)
+    ranks = (mixed * second) % modulus
+
+    if limit is not None and limit < len(ids):
+        # Select the smallest ranks first, then order just those
+        candidates = np.argpartition(ranks, limit)[:limit]
+        order = candidates[np.lexsort((ids[candidates], ranks[candidates]))]
+    else:
+        order = np.lexsort((ids, ranks))
+    return ids[order].astype(np.int64).tolist()
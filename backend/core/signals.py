@@ -1,7 +1,10 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
-from .models import InterestProfile, Collection
+from .models import InterestProfile, Collection, Post, SimilarPosts
+from .cache_namespaces import CATALOG
+from .post_cache import invalidate_post
+from .similarity import SIMILARITY_FIELDS
 
 
 # The two previous functions have been merged into this single, correct one.
@@ -14,3 +17,26 @@ def create_user_addons(sender, instance, created, **kwargs):
     if created:
         InterestProfile.objects.create(user=instance)
         Collection.objects.create(user=instance, name="All Posts")
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_cached_post(sender, instance, **kwargs):
+    """
+    Drop the shared cached copy of a post when it changes, so every cached
+    list that references it picks up the edit, and tell in-process indexes
+    built over the catalog (e.g. the facet index) to rebuild.
+    """
+    invalidate_post(instance.pk)
+    CATALOG.invalidate()
+
+
+@receiver(post_save, sender=Post)
+def mark_similar_posts_stale(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Flag an edited post for re-indexing by build_similarity_index
+    --incremental. New posts need no flag: they have no index entry yet.
+    """
+    if created or (update_fields is not None and SIMILARITY_FIELDS.isdisjoint(update_fields)):
+        return
+    SimilarPosts.objects.filter(pk=instance.pk, stale=False).update(stale=True)
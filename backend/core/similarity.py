@@ -0,0 +1,277 @@
+"""
+Offline item-to-item similarity index for "more like this" recommendations.
+
+Every post gets its top-K most similar posts precomputed with the same
+attribute-overlap similarity as RecommendationEngine._calculate_similarity,
+so MorePostsView can answer with a single primary-key lookup.
+
+New posts have no entry yet, and edited posts get their entry flagged stale
+(see core.signals). `build_similarity_index --incremental` indexes both; run
+it after imports and on a schedule (e.g. every few minutes from cron).
+"""
+
+import logging
+from collections import defaultdict
+from typing import Iterable, List, Optional
+
+import numpy as np
+from django.db import transaction
+
+from .models import Post, SimilarPosts
+
+logger = logging.getLogger(__name__)
+
+SIMILAR_POSTS_INDEX_SIZE = 48
+
+# Must stay in sync with RecommendationEngine._calculate_similarity
+SHAPE_MATCH = 3.0
+PATTERN_MATCH = 2.5
+SIZE_MATCH = 1.5
+COLOR_MATCH = 1.0
+
+# Post fields the similarity is computed on; editing one makes the post's entry stale
+SIMILARITY_FIELDS = frozenset({'shape', 'pattern', 'size', 'colors'})
+
+# Upper bound on the number of similarity cells computed per chunk
+_CHUNK_CELLS = 8_000_000
+
+
+class _CatalogArrays:
+    """Column-oriented snapshot of the attributes the similarity is computed on."""
+
+    def __init__(self, rows):
+        shape_codes, pattern_codes, size_codes = {'': 0}, {'': 0}, {'': 0}
+        color_codes = {}
+        ids, shapes, patterns, sizes, engagement, color_rows = [], [], [], [], [], []
+
+        for post_id, shape, pattern, size, colors, views_count, saves_count in rows:
+            ids.append(post_id)
+            shapes.append(shape_codes.setdefault(shape or '', len(shape_codes)))
+            patterns.append(pattern_codes.setdefault(pattern or '', len(pattern_codes)))
+            sizes.append(size_codes.setdefault(size or '', len(size_codes)))
+            engagement.append(views_count + saves_count * 2)
+            colors = colors if isinstance(colors, list) else []
+            color_rows.append({color_codes.setdefault(color, len(color_codes)) for color in colors})
+
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.shapes = np.asarray(shapes, dtype=np.int32)
+        self.patterns = np.asarray(patterns, dtype=np.int32)
+        self.sizes = np.asarray(sizes, dtype=np.int32)
+        self.colors = np.zeros((len(ids), max(len(color_codes), 1)), dtype=np.float32)
+        for row, codes in enumerate(color_rows):
+            self.colors[row, list(codes)] = 1.0
+        self.position = {post_id: row for row, post_id in enumerate(ids)}
+
+        # Rank of each post by engagement (higher is better), used to break
+        # similarity ties the same way the live query ordered its candidates
+        order = np.lexsort((-self.ids, np.asarray(engagement, dtype=np.int64)))
+        self.engagement_rank = np.empty(len(ids), dtype=np.float64)
+        self.engagement_rank[order] = np.arange(len(ids), dtype=np.float64)
+
+    @classmethod
+    def load(cls) -> '_CatalogArrays':
+        rows = Post.objects.values_list(
+            'id', 'shape', 'pattern', 'size', 'colors', 'views_count', 'saves_count'
+        ).iterator(chunk_size=5000)
+        return cls(rows)
+
+    def similarities(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Similarity of each post in `rows` to every post in the catalog.
+        Posts that share no non-empty attribute, and the post itself, get -inf.
+        """
+        shape_eq = self.shapes[rows, None] == self.shapes[None, :]
+        pattern_eq = self.patterns[rows, None] == self.patterns[None, :]
+        size_eq = self.sizes[rows, None] == self.sizes[None, :]
+        overlap = self.colors[rows] @ self.colors.T
+
+        scores = (shape_eq * SHAPE_MATCH + pattern_eq * PATTERN_MATCH +
+                  size_eq * SIZE_MATCH + overlap * COLOR_MATCH)
+
+        # Only posts that share a non-empty attribute were ever candidates
+        candidate = (
+            (shape_eq & (self.shapes[rows, None] != 0)) |
+            (pattern_eq & (self.patterns[rows, None] != 0)) |
+            (size_eq & (self.sizes[rows, None] != 0)) |
+            (overlap > 0)
+        )
+        candidate[np.arange(len(rows)), rows] = False
+        return np.where(candidate, scores, -np.inf)
+
+    def top_k(self, rows: np.ndarray, k: int):
+        """Yield (row, neighbour_rows, neighbour_scores) for each row."""
+        scores = self.similarities(rows)
+        # Similarities are multiples of 0.5, so doubling them gives integers
+        # that can carry the engagement rank as a tie-breaker without collisions
+        keys = scores * 2 * (len(self.ids) + 1) + self.engagement_rank
+        k = min(k, len(self.ids))
+        if k == 0:
+            return
+        part = np.argpartition(-keys, k - 1, axis=1)[:, :k]
+        for i, row in enumerate(rows):
+            neighbours = part[i][np.argsort(-keys[i, part[i]], kind='stable')]
+            neighbours = neighbours[np.isfinite(keys[i, neighbours])]
+            yield row, neighbours, scores[i, neighbours]
+
+    def rows_for(self, post_ids: Iterable[int]) -> np.ndarray:
+        """Catalog rows of the given posts, skipping posts that no longer exist."""
+        return np.asarray(
+            sorted({self.position[post_id] for post_id in post_ids if post_id in self.position}), dtype=np.int64
+        )
+
+    def chunk_size(self) -> int:
+        return max(1, min(512, _CHUNK_CELLS // max(len(self.ids), 1)))
+
+
+class SimilarityIndex:
+    """Builds, refreshes and reads the SimilarPosts table."""
+
+    @staticmethod
+    def lookup(post_id: int, limit: int = SIMILAR_POSTS_INDEX_SIZE) -> Optional[List[int]]:
+        """
+        Return the precomputed similar post IDs for a post, or None if the
+        post has not been indexed yet.
+        """
+        similar_ids = SimilarPosts.objects.filter(pk=post_id).values_list('similar_ids', flat=True).first()
+        if similar_ids is None:
+            return None
+        return similar_ids[:limit]
+
+    @staticmethod
+    def rebuild(k: int = SIMILAR_POSTS_INDEX_SIZE) -> int:
+        """
+        Recompute the index for every post.
+
+        Returns:
+            Number of posts indexed
+        """
+        catalog = _CatalogArrays.load()
+        entries = SimilarityIndex._compute(catalog, np.arange(len(catalog.ids)), k)
+
+        with transaction.atomic():
+            SimilarPosts.objects.all().delete()
+            SimilarPosts.objects.bulk_create(entries, batch_size=1000)
+        return len(entries)
+
+    @staticmethod
+    def add_posts(post_ids: Iterable[int], k: int = SIMILAR_POSTS_INDEX_SIZE) -> int:
+        """
+        Index newly added posts and splice them into the neighbour lists of
+        existing posts they now rank for.
+
+        Returns:
+            Number of posts indexed
+        """
+        catalog = _CatalogArrays.load()
+        new_rows = catalog.rows_for(post_ids)
+        if not new_rows.size:
+            return 0
+        return SimilarityIndex._index(catalog, new_rows, new_rows, k)
+
+    @staticmethod
+    def refresh_posts(post_ids: Iterable[int], k: int = SIMILAR_POSTS_INDEX_SIZE) -> int:
+        """
+        Re-index posts whose attributes changed. Their own lists and every
+        list that ranked them under the old attributes are recomputed, then
+        they are spliced into the lists they now rank for.
+
+        Returns:
+            Number of neighbour lists recomputed
+        """
+        catalog = _CatalogArrays.load()
+        changed_rows = catalog.rows_for(post_ids)
+        if not changed_rows.size:
+            return 0
+        changed_ids = set(catalog.ids[changed_rows].tolist())
+
+        # There is no reverse index, so find the lists holding a changed post in one pass
+        ranked_in = [
+            post_id for post_id, similar_ids in SimilarPosts.objects.exclude(pk__in=changed_ids)
+            .values_list('post_id', 'similar_ids').iterator(chunk_size=5000)
+            if not changed_ids.isdisjoint(similar_ids)
+        ]
+        rows = np.union1d(changed_rows, catalog.rows_for(ranked_in))
+
+        with transaction.atomic():
+            SimilarPosts.objects.filter(pk__in=catalog.ids[rows].tolist()).delete()
+            return SimilarityIndex._index(catalog, rows, changed_rows, k)
+
+    @staticmethod
+    def _index(catalog: _CatalogArrays, rows: np.ndarray, splice_rows: np.ndarray, k: int) -> int:
+        """
+        Store freshly computed lists for `rows`, and splice the posts in
+        `splice_rows` into the other lists they now rank for.
+        """
+        entries = SimilarityIndex._compute(catalog, rows, k)
+        computed_ids = {int(catalog.ids[row]) for row in rows}
+
+        # Similarity is symmetric, so each post's scores against the
+        # catalog tell us which existing neighbour lists it should enter
+        pending = {}
+        for start in range(0, len(splice_rows), catalog.chunk_size()):
+            chunk = splice_rows[start:start + catalog.chunk_size()]
+            scores = catalog.similarities(chunk)
+            for i, row in enumerate(chunk):
+                for target in np.flatnonzero(np.isfinite(scores[i])):
+                    target_id = int(catalog.ids[target])
+                    if target_id not in computed_ids:
+                        pending.setdefault(target_id, []).append((int(catalog.ids[row]), float(scores[i, target])))
+
+        with transaction.atomic():
+            SimilarPosts.objects.bulk_create(entries, batch_size=1000, ignore_conflicts=True)
+
+            # Only lists whose entry threshold the new posts beat need loading
+            targets_by_score = defaultdict(list)
+            for target_id, candidates in pending.items():
+                targets_by_score[max(score for _, score in candidates)].append(target_id)
+
+            updated = []
+            for score, target_ids in targets_by_score.items():
+                for start in range(0, len(target_ids), 5000):
+                    entries_to_update = SimilarPosts.objects.select_for_update().filter(
+                        pk__in=target_ids[start:start + 5000], threshold__lt=score
+                    )
+                    for entry in entries_to_update:
+                        if SimilarityIndex._splice(entry, pending[entry.post_id], k):
+                            updated.append(entry)
+            SimilarPosts.objects.bulk_update(updated, ['similar_ids', 'scores', 'threshold', 'updated_at'], batch_size=1000)
+
+        logger.info(f"Indexed {len(entries)} posts, updated {len(updated)} neighbour lists")
+        return len(entries)
+
+    @staticmethod
+    def _compute(catalog: _CatalogArrays, rows: np.ndarray, k: int) -> List[SimilarPosts]:
+        entries = []
+        chunk = catalog.chunk_size()
+        for start in range(0, len(rows), chunk):
+            for row, neighbours, scores in catalog.top_k(rows[start:start + chunk], k):
+                entries.append(SimilarPosts(
+                    post_id=int(catalog.ids[row]),
+                    similar_ids=catalog.ids[neighbours].tolist(),
+                    scores=scores.tolist(),
+                    threshold=float(scores[-1]) if len(neighbours) >= k else -1.0,
+                ))
+        return entries
+
+    @staticmethod
+    def _splice(entry: SimilarPosts, candidates, k: int) -> bool:
+        """
+        Insert (post_id, score) candidates into an existing neighbour list.
+        New posts have no engagement yet, so they rank after equal scores.
+        """
+        changed = False
+        for post_id, score in candidates:
+            if post_id in entry.similar_ids:
+                continue
+            if len(entry.similar_ids) >= k and score <= entry.scores[-1]:
+                continue
+            position = len(entry.scores)
+            while position > 0 and entry.scores[position - 1] < score:
+                position -= 1
+            entry.similar_ids.insert(position, post_id)
+            entry.scores.insert(position, score)
+            del entry.similar_ids[k:], entry.scores[k:]
+            changed = True
+        if changed:
+            entry.threshold = entry.scores[-1] if len(entry.scores) >= k else -1.0
+        return changed
@@ -0,0 +1,204 @@
+"""
+Prefix-trie autocomplete for the explore search box.
+
+The trie holds every filter option and synonym the keyword extractor
+understands (canonical shapes, patterns, sizes and colors, their variants,
+all COLOR_SIMPLIFICATION_MAP entries) plus the most frequent words in post
+titles, each weighted by how many posts it would return. Every node keeps
+its own best completions, so a lookup is one walk down the typed prefix and
+no ranking happens per keystroke. Like the facet index, each process builds
+the trie once and rebuilds it after posts are created, edited or deleted.
+"""
+
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from .cache_namespaces import CATALOG, versions_persist
+from .facets import MIN_REBUILD_INTERVAL, get_facet_index
+from .keyword_extractor import FIELD_MAPS, SHAPE_OPTIONS, PATTERN_OPTIONS, SIZE_OPTIONS, COLOR_OPTIONS, \
+    _normalize_text, extract_nail_keywords
+
+TITLE_TOKEN_RE = re.compile(r'[a-z]{3,}')
+
+# Title words that say nothing about a design
+TITLE_STOPWORDS = frozenset({
+    'and', 'the', 'for', 'with', 'nail', 'nails', 'design', 'designs', 'art', 'idea', 'ideas',
+    'this', 'that', 'your', 'you', 'are', 'from', 'look', 'style', 'manicure',
+})
+
+# A suggestion: (text, weight, structured filter as posts/filter/ query params)
+Suggestion = Tuple[str, int, Dict[str, str]]
+
+
+def _config(name: str, default):
+    return getattr(settings, 'SEARCH_SUGGESTIONS', {}).get(name, default)
+
+
+def filters_for(text: str) -> Dict[str, str]:
+    """The posts/filter/ query params a search for `text` amounts to."""
+    keywords, remaining_query = extract_nail_keywords(text)
+    params = {field: keywords[field] for field in ('shape', 'pattern', 'size') if keywords[field]}
+    if keywords['colors']:
+        params['color'] = ','.join(keywords['colors'])
+    if remaining_query:
+        params['q'] = remaining_query
+    return params
+
+
+def _facet_count(filters: Dict[str, str]) -> int:
+    """Number of posts matching the structured part of `filters`."""
+    constraints = [(field, {filters[field]}) for field in ('shape', 'pattern', 'size') if field in filters]
+    if 'color' in filters:
+        constraints.extend(('color', {color}) for color in filters['color'].split(','))
+    return get_facet_index().match(constraints).bit_count()
+
+
+def _filter_key(filters: Dict[str, str]) -> tuple:
+    return tuple(sorted(filters.items()))
+
+
+class _Node:
+    __slots__ = ('children', 'top')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.top: List[int] = []
+
+
+class SuggestionTrie:
+    """Character trie whose nodes store the indexes of their top completions."""
+
+    def __init__(self, suggestions: List[Suggestion], max_completions: int, version: Optional[int] = None):
+        # Best first, so each node's list fills in rank order
+        self.suggestions = sorted(suggestions, key=lambda suggestion: (-suggestion[1], len(suggestion[0]),
+                                                                       suggestion[0]))
+        self.max_completions = max_completions
+        self.root = _Node()
+        # Synonyms select the same filter; only the best of them is kept per node
+        node_filters: Dict[_Node, set] = {}
+        for index, (text, _, filters) in enumerate(self.suggestions):
+            key = _filter_key(filters)
+            node = self.root
+            for char in text:
+                node = node.children.setdefault(char, _Node())
+                seen = node_filters.setdefault(node, set())
+                if len(node.top) < max_completions and key not in seen:
+                    node.top.append(index)
+                    seen.add(key)
+        self.version = version
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def load(cls) -> 'SuggestionTrie':
+        from .models import Post
+
+        version = CATALOG.version()
+        index = get_facet_index()
+        counts = {field: {value: bitmap.bit_count() for value, bitmap in bitmaps.items()}
+                  for field, bitmaps in index.bitmaps.items()}
+
+        # Filter options and their synonyms, weighted by posts per canonical value
+        entries: Dict[str, Suggestion] = {}
+        for field, options in (('shape', SHAPE_OPTIONS), ('pattern', PATTERN_OPTIONS), ('size', SIZE_OPTIONS),
+                               ('color', COLOR_OPTIONS)):
+            for option in options:
+                entries[option] = (option, counts[field].get(option, 0), filters_for(option))
+        for field, normalization_map in FIELD_MAPS:
+            for variant, canonical_form in normalization_map.items():
+                text = _normalize_text(variant)
+                entries.setdefault(text, (text, counts[field].get(canonical_form, 0), filters_for(text)))
+
+        # Frequent title words, weighted by the number of posts using them
+        title_counts = Counter()
+        for title in Post.objects.values_list('title', flat=True).iterator(chunk_size=5000):
+            title_counts.update(set(TITLE_TOKEN_RE.findall(title.lower())) - TITLE_STOPWORDS)
+        min_count = _config('MIN_TITLE_COUNT', 2)
+        for token, count in title_counts.most_common(_config('TITLE_TOKENS', 2000)):
+            if count < min_count:
+                break
+            entries.setdefault(token, (token, count, filters_for(token)))
+
+        return cls(list(entries.values()), _config('MAX_LIMIT', 20), version=version)
+
+    def _completions(self, prefix: str, limit: int) -> List[Suggestion]:
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [self.suggestions[index] for index in node.top[:limit]]
+
+    def complete(self, query: str, limit: Optional[int] = None) -> List[dict]:
+        """
+        Best completions of what has been typed. Phrases are completed as a
+        whole ("french t" -> "french tips"); otherwise the last word is
+        completed and the words before it are kept ("short co" -> "short coffin").
+
+        Args:
+            query: What has been typed so far
+            limit: Number of completions (SEARCH_SUGGESTIONS['LIMIT'] by default)
+
+        Returns:
+            [{'text', 'count', 'filters'}] best first, where `filters` are the
+            posts/filter/ query params selecting the suggestion
+        """
+        limit = min(max(limit or _config('LIMIT', 8), 1), self.max_completions)
+        prefix = _normalize_text(query)
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        for text, count, filters in self._completions(prefix, limit):
+            results.append({'text': text, 'count': count, 'filters': filters})
+            seen.add(_filter_key(filters))
+
+        head, _, last_word = prefix.rpartition(' ')
+        if head and last_word and len(results) < limit:
+            for completion, count, _ in self._completions(last_word, limit):
+                text = f"{head} {completion}"
+                filters = filters_for(text)
+                if _filter_key(filters) not in seen:
+                    # Posts matching the combined filters; free text is not
+                    # indexed, so that part is bounded by the word's own count
+                    count = min(count, _facet_count(filters))
+                    results.append({'text': text, 'count': count, 'filters': filters})
+                    seen.add(_filter_key(filters))
+                    if len(results) == limit:
+                        break
+        return results
+
+
+_trie: Optional[SuggestionTrie] = None
+_trie_lock = threading.Lock()
+
+
+def get_suggestion_trie() -> SuggestionTrie:
+    """
+    Return this process's suggestion trie, rebuilding it after any post has
+    been created, edited or deleted (tracked by the CATALOG namespace).
+    """
+    global _trie
+    version = CATALOG.version()
+    if not _is_stale(_trie, version):
+        return _trie
+
+    with _trie_lock:
+        if _is_stale(_trie, version):
+            _trie = SuggestionTrie.load()
+        return _trie
+
+
+def _is_stale(trie: Optional[SuggestionTrie], version: int) -> bool:
+    if trie is None:
+        return True
+    age = time.monotonic() - trie.built_at
+    if not versions_persist():
+        # The version changes on every read without a shared cache; rely on the catalog TTL
+        return age >= getattr(settings, 'RECOMMENDATION_CATALOG_TTL', 300)
+    return trie.version != version and age >= MIN_REBUILD_INTERVAL
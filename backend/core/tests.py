@@ -1,3 +1,990 @@
-from django.test import TestCase
+import datetime
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.db.models import Count
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import catalog_snapshot, collaborative, memberships, suggest, trending
+from .cache_namespaces import CATALOG, POSTS, user_recommendations
+from .catalog_snapshot import CatalogSnapshot, get_snapshot, write_snapshot
+from .collaborative import InteractionMatrix
+from .color_constants import simplify_colors
+from .counters import PostCounterBuffer
+from .facets import MIN_REBUILD_INTERVAL, FacetIndex
+from .interaction_buffer import InteractionBuffer
+from .interests import DECAY_EPOCH, ERA_HALF_LIVES, add_interests, era_of, get_interest_scores
+from .keyword_extractor import (
+    COLOR_OPTIONS, FIELD_MAPS, PATTERN_OPTIONS, SHAPE_OPTIONS, SIZE_OPTIONS, extract_nail_keywords,
+)
+from .management.commands.benchmark_keyword_extraction import _legacy_extract_nail_keywords
+from .models import Collection, InterestProfile, Post, SimilarPosts, TryOn, User, UserInterest
+from .pagination import KeysetPagination
+from .recommendations import RecommendationEngine
+from .renderers import ORJSONRenderer
+from .scoring import PostCatalog
+from .search import search_posts
+from .search_terms import compute_trending_searches, record_searches
+from .seen_filter import mark_seen
+from .shuffle import seeded_shuffle, shuffle_ids
+from .similarity import SimilarityIndex
+from .views import FilteredPostListView, get_filter_constraints
+from .write_behind import PeriodicFlusher
+
+NOW = datetime.datetime(2026, 6, 1, 12, 0, tzinfo=datetime.timezone.utc)
+
+
+def synthetic_posts(size, seed=7):
+    """(id, shape, pattern, size, colors, base_colors, views, saves, created_at) rows, newest first."""
+    rng = random.Random(seed)
+    rows = []
+    for post_id in range(1, size + 1):
+        colors = rng.sample(COLOR_OPTIONS, rng.randint(1, 3))
+        rows.append((
+            post_id, rng.choice(SHAPE_OPTIONS), rng.choice(PATTERN_OPTIONS), rng.choice(SIZE_OPTIONS + [''] * 2),
+            colors, simplify_colors(colors), rng.randint(0, 5000), rng.randint(0, 500),
+            NOW - datetime.timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+        ))
+    rows.sort(key=lambda row: (row[8], row[0]), reverse=True)
+    return rows
+
+
+class CatalogSnapshotTests(SimpleTestCase):
+    """The mapped snapshot must rank and filter exactly like the per-process structures."""
+
+    TAG_SCORES = {'almond': 6.4, 'coffin': 1.2, 'french': 4.8, 'glossy': 0.9, 'short': 2.5, 'pink': 5.3}
+    CONSTRAINT_SETS = [
+        [],
+        [('shape', {'almond'})],
+        [('shape', {'coffin', 'square'}), ('color', {'pink', 'white'})],
+        [('pattern', {'french'}), ('size', {'short'}), ('color', {'red'})],
+    ]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def assert_matches_per_process_build(self, rows):
+        snapshot = CatalogSnapshot(write_snapshot(self.directory.name, rows, catalog_version=1))
+        catalog = PostCatalog.from_rows((*row[:5], *row[6:]) for row in rows)
+        index = FacetIndex((*row[:4], row[5], row[8]) for row in rows)
+
+        self.assertEqual(len(snapshot), len(rows))
+        for tag_scores in (self.TAG_SCORES, {}):
+            self.assertEqual(snapshot.catalog.top_n(tag_scores, 50, now=NOW), catalog.top_n(tag_scores, 50, now=NOW))
+        for constraints in self.CONSTRAINT_SETS:
+            self.assertEqual(
+                snapshot.facet_index.post_ids(snapshot.facet_index.match(constraints)),
+                index.post_ids(index.match(constraints)),
+            )
+        self.assertEqual(snapshot.facet_index.counts([]), index.counts([]))
+
+    def test_matches_per_process_build(self):
+        self.assert_matches_per_process_build(synthetic_posts(500))
+
+    def test_single_post(self):
+        self.assert_matches_per_process_build(synthetic_posts(1))
+
+    def test_empty_catalog(self):
+        self.assert_matches_per_process_build([])
+
+    def test_publish_replaces_current(self):
+        first = write_snapshot(self.directory.name, synthetic_posts(10), catalog_version=1)
+        second = write_snapshot(self.directory.name, synthetic_posts(20), catalog_version=2)
+        self.assertEqual(catalog_snapshot._read_pointer(self.directory.name), os.path.basename(second))
+        self.assertEqual(CatalogSnapshot(first).catalog_version, 1)
+        self.assertEqual(len(CatalogSnapshot(second)), 20)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_dummy_cache_does_not_force_rebuilds(self):
+        snapshot = CatalogSnapshot(write_snapshot(self.directory.name, synthetic_posts(5), catalog_version=1))
+        snapshot.built_at -= MIN_REBUILD_INTERVAL + 1
+        self.assertFalse(snapshot.is_stale())
+
+
+class CatalogSnapshotRefreshTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        catalog_snapshot._snapshot = None
+        self.addCleanup(setattr, catalog_snapshot, '_snapshot', None)
+
+    def test_unreadable_current_snapshot_is_rebuilt(self):
+        broken = os.path.join(self.directory.name, 'catalog-1.bin')
+        with open(broken, 'wb') as broken_file:
+            broken_file.write(b'not a snapshot')
+        catalog_snapshot._write_pointer(self.directory.name, 'catalog-1.bin')
+        Post.objects.create(title='Almond', image_url='https://example.com/1.jpg', width=1, height=1,
+                            shape='almond', colors=['pink'])
+
+        with override_settings(CATALOG_SNAPSHOT={'ENABLED': True, 'DIR': self.directory.name}):
+            snapshot = get_snapshot()
+
+        self.assertIsNotNone(snapshot)
+        self.assertNotEqual(os.path.basename(snapshot.path), 'catalog-1.bin')
+        self.assertEqual(len(snapshot), 1)
+
+    def test_empty_catalog_snapshot_loads(self):
+        with override_settings(CATALOG_SNAPSHOT={'ENABLED': True, 'DIR': self.directory.name}):
+            snapshot = get_snapshot()
+        self.assertEqual(len(snapshot), 0)
+        self.assertEqual(snapshot.catalog.top_n({'almond': 1.0}, 10, now=timezone.now()), [])
+
+    def test_published_rebuild_is_picked_up(self):
+        snapshot_settings = {'ENABLED': True, 'DIR': self.directory.name, 'CHECK_INTERVAL': 0}
+        version = catalog_snapshot.CATALOG.version()
+        write_snapshot(self.directory.name, synthetic_posts(10), catalog_version=version)
+        with override_settings(CATALOG_SNAPSHOT=snapshot_settings):
+            first = get_snapshot()
+            # Another worker publishes a rebuild
+            second_path = write_snapshot(self.directory.name, synthetic_posts(20), catalog_version=version)
+            second = get_snapshot()
+
+        self.assertEqual(len(first), 10)
+        self.assertEqual(second.path, second_path)
+        self.assertEqual(len(second), 20)
+        # The structures read the mapped pages instead of private copies
+        self.assertFalse(second.arrays['ids'].flags.owndata)
+        self.assertTrue(np.shares_memory(second.catalog.ids, second.arrays['ids']))
+        self.assertTrue(np.shares_memory(second.facet_index.ids, second.arrays['ids']))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ProfileEndpointQueryTests(TestCase):
+    """Profile endpoints run a fixed number of queries however many collections or try-ons a user has."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='saver', email='saver@example.com', password='x-Pass-1234')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.posts = [
+            Post.objects.create(title=f'Post {i}', image_url=f'https://example.com/{i}.jpg', width=1, height=1,
+                                shape='almond', colors=['pink'])
+            for i in range(40)
+        ]
+
+    def add_collections(self, start, stop):
+        for i in range(start, stop):
+            collection = Collection.objects.create(user=self.user, name=f'Collection {i}')
+            memberships.add_posts(self.user, [collection.id], [post.id for post in self.posts[i * 4:i * 4 + 6]])
+            TryOn.objects.create(user=self.user, post=self.posts[i])
+        return collection
+
+    def assert_queries(self, expected, url):
+        # Cold caches, so hydrated posts and saved sets are counted too
+        cache.clear()
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_query_counts_do_not_grow_with_collections(self):
+        for start, stop in ((0, 2), (2, 8)):
+            collection = self.add_collections(start, stop)
+            with self.subTest(collections=stop):
+                # Collections with counts and previews, then the four-post previews in one window query
+                self.assert_queries(2, '/api/auth/collections/')
+                # Collection with post count, first page of memberships, saved set, posts
+                self.assert_queries(4, f'/api/auth/collections/{collection.id}/')
+                # Try-ons joined with their posts, one page
+                response = self.assert_queries(1, '/api/auth/profile/my-try-ons/')
+                self.assertIn('results', response.json())
+
+    def test_try_ons_are_paginated_by_default(self):
+        for post in self.posts[:30]:
+            TryOn.objects.create(user=self.user, post=post)
+
+        first = self.client.get('/api/auth/profile/my-try-ons/').json()
+        self.assertEqual(len(first['results']), 24)
+        self.assertIsNotNone(first['next'])
+        second = self.client.get(first['next']).json()
+        self.assertEqual(len(second['results']), 6)
+        self.assertIsNone(second['next'])
+        seen = [try_on['post']['id'] for try_on in first['results'] + second['results']]
+        self.assertEqual(sorted(seen), sorted(post.id for post in self.posts[:30]))
+
+        single = self.client.get(f'/api/auth/profile/my-try-ons/?post={self.posts[3].id}').json()
+        self.assertEqual([try_on['post']['id'] for try_on in single['results']], [self.posts[3].id])
+
+
+    def test_only_post_lists_render_with_orjson(self):
+        self.add_collections(0, 1)
+        post_list = self.client.get('/api/auth/posts/filter/')
+        self.assertIsInstance(post_list.accepted_renderer, ORJSONRenderer)
+        self.assertEqual(len(post_list.json()['results']), 24)
+        for url in ('/api/auth/collections/', '/api/auth/profile/my-try-ons/'):
+            with self.subTest(url=url):
+                self.assertIsInstance(self.client.get(url).accepted_renderer, JSONRenderer)
+
+
+class SimilarityIndexIncrementalTests(TestCase):
+    """Incremental updates must leave the same neighbour scores as a full rebuild."""
+
+    def setUp(self):
+        rng = random.Random(3)
+        self.posts = [
+            Post.objects.create(title=f'Post {i}', image_url=f'https://example.com/{i}.jpg', width=1, height=1,
+                                shape=rng.choice(SHAPE_OPTIONS[:4]), pattern=rng.choice(PATTERN_OPTIONS[:4]),
+                                size=rng.choice(SIZE_OPTIONS), colors=rng.sample(COLOR_OPTIONS[:8], 2))
+            for i in range(60)
+        ]
+
+    def index_scores(self):
+        return {entry.post_id: entry.scores for entry in SimilarPosts.objects.all()}
+
+    def assert_matches_rebuild(self):
+        incremental = self.index_scores()
+        self.assertFalse(SimilarPosts.objects.filter(stale=True).exists())
+        SimilarityIndex.rebuild(k=10)
+        self.assertEqual(incremental, self.index_scores())
+
+    def test_new_posts_are_indexed_incrementally(self):
+        SimilarityIndex.rebuild(k=10)
+        for i in range(5):
+            Post.objects.create(title=f'New {i}', image_url=f'https://example.com/new{i}.jpg', width=1, height=1,
+                                shape=SHAPE_OPTIONS[i % 4], pattern=PATTERN_OPTIONS[0], colors=[COLOR_OPTIONS[i]])
+        call_command('build_similarity_index', incremental=True, size=10, stdout=StringIO())
+        self.assert_matches_rebuild()
+
+    def test_edited_posts_are_reindexed(self):
+        SimilarityIndex.rebuild(k=10)
+        for post, shape in zip(self.posts[:4], reversed(SHAPE_OPTIONS[:4])):
+            post.shape = shape
+            post.colors = [COLOR_OPTIONS[9]]
+            post.save()
+        self.posts[5].title = 'Renamed'
+        self.posts[5].save(update_fields=['title'])
+        self.assertEqual(SimilarPosts.objects.filter(stale=True).count(), 4)
+
+        call_command('build_similarity_index', incremental=True, size=10, stdout=StringIO())
+        self.assert_matches_rebuild()
+
+
+class InterestDecayTests(TestCase):
+    """Stored interest scores decay lazily and stay bounded across eras."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='fan', email='fan@example.com', password='x-Pass-1234')
+        self.era_days = ERA_HALF_LIVES * 14
+
+    def add(self, deltas, at):
+        with mock.patch('core.interests.timezone.now', return_value=at):
+            add_interests({self.user.id: deltas}, at=at)
+
+    def test_score_halves_every_half_life(self):
+        self.add({'almond': 8.0}, NOW)
+        self.assertAlmostEqual(get_interest_scores(self.user.id, NOW)['almond'], 8.0)
+        self.assertAlmostEqual(get_interest_scores(self.user.id, NOW + datetime.timedelta(days=14))['almond'], 4.0)
+        self.assertNotIn('almond', get_interest_scores(self.user.id, NOW + datetime.timedelta(days=14 * 5)))
+
+    def test_scores_carry_across_an_era_boundary(self):
+        era_start = DECAY_EPOCH + datetime.timedelta(days=self.era_days * era_of(NOW))
+        before = era_start - datetime.timedelta(days=3)
+        after = era_start + datetime.timedelta(days=4)
+        self.add({'almond': 10.0, 'pink': 6.0}, before)
+        self.add({'almond': 5.0}, after)
+
+        interest = UserInterest.objects.get(user=self.user, tag='almond')
+        self.assertEqual(interest.era, era_of(after))
+        scores = get_interest_scores(self.user.id, after)
+        self.assertAlmostEqual(scores['almond'], 10.0 * 2 ** -0.5 + 5.0)
+        # Untouched rows keep their era and still decay correctly
+        self.assertAlmostEqual(scores['pink'], 6.0 * 2 ** -0.5)
+
+    def test_stored_scores_stay_bounded(self):
+        moment = NOW
+        for _ in range(40):  # Ten years of weekly activity, a few times a year
+            self.add({'almond': 1.0}, moment)
+            moment += datetime.timedelta(days=90)
+        interest = UserInterest.objects.get(user=self.user, tag='almond')
+        self.assertLess(interest.score, 40 * 2 ** ERA_HALF_LIVES)
+        self.assertAlmostEqual(
+            get_interest_scores(self.user.id, moment - datetime.timedelta(days=90))['almond'],
+            sum(2 ** (-90 * weeks / 14) for weeks in range(40)),
+        )
+
+    def test_rows_two_eras_old_restart(self):
+        self.add({'almond': 3.0}, NOW)
+        later = NOW + datetime.timedelta(days=self.era_days * 2)
+        self.add({'almond': 2.0}, later)
+        self.assertAlmostEqual(get_interest_scores(self.user.id, later)['almond'], 2.0)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TrendingRefreshTests(SimpleTestCase):
+    """Only the worker holding the refresh lock recomputes a due trending ranking."""
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('core.trending.compute_trending', return_value=[3, 2, 1])
+        self.compute = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def publish(self, post_ids, fresh_for):
+        cache.set(trending.TRENDING_CACHE_KEY, (time.time() + fresh_for, post_ids))
+
+    def test_fresh_ranking_is_served_from_cache(self):
+        self.publish([9, 8], fresh_for=60)
+        self.assertEqual(trending.get_trending_post_ids(1), [9])
+        self.compute.assert_not_called()
+
+    def test_stale_ranking_is_served_while_another_worker_refreshes(self):
+        self.publish([9, 8], fresh_for=-1)
+        cache.add(trending.TRENDING_LOCK_KEY, True)
+        self.assertEqual(trending.get_trending_post_ids(2), [9, 8])
+        self.compute.assert_not_called()
+
+    def test_lock_holder_refreshes_and_releases_the_lock(self):
+        self.publish([9, 8], fresh_for=-1)
+        self.assertEqual(trending.get_trending_post_ids(2), [3, 2])
+        self.assertEqual(trending.get_trending_post_ids(2), [3, 2])
+        self.compute.assert_called_once()
+        self.assertIsNone(cache.get(trending.TRENDING_LOCK_KEY))
+
+    def test_cold_cache_waits_for_the_lock_holder(self):
+        cache.add(trending.TRENDING_LOCK_KEY, True)
+        with mock.patch('core.trending.time.sleep', side_effect=lambda _: self.publish([7], fresh_for=60)):
+            self.assertEqual(trending.get_trending_post_ids(5), [7])
+        self.compute.assert_not_called()
+
+
+class VectorizedScoringEquivalenceTests(SimpleTestCase):
+    """PostCatalog scores and ranks posts exactly like the per-post _calculate_post_score loop it replaced."""
+
+    tag_scores = {'almond': 6.4, 'coffin': 1.2, 'french': 4.8, 'glossy': 0.9, 'short': 2.5,
+                  'pink': 5.3, 'white': 3.1, 'blue': 0.7}
+
+    def setUp(self):
+        rows = [(post_id, shape, pattern, size, colors, views, saves, created_at)
+                for post_id, shape, pattern, size, colors, _, views, saves, created_at in synthetic_posts(2000)]
+        # Copies of existing posts under new IDs tie exactly with the originals
+        rows += [(post_id + 10_000, *rest) for post_id, *rest in rows[::50]]
+        rows.sort(key=lambda row: (row[7], row[0]), reverse=True)
+        self.catalog = PostCatalog.from_rows(rows)
+        self.posts = [
+            SimpleNamespace(id=row[0], shape=row[1], pattern=row[2], size=row[3], colors=row[4],
+                            views_count=row[5], saves_count=row[6], created_at=row[7])
+            for row in rows
+        ]
+
+    def legacy_top_n(self, tag_scores, limit, exclude_ids=()):
+        scored_posts = []
+        for post in self.posts:
+            score = RecommendationEngine._calculate_post_score(post, tag_scores, None)
+            if score > 0 and post.id not in exclude_ids:
+                scored_posts.append((post, score))
+        scored_posts.sort(key=lambda x: x[1], reverse=True)
+        return [post.id for post, score in scored_posts[:limit]]
+
+    def test_scores_match(self):
+        for tag_scores in (self.tag_scores, {}):
+            with self.subTest(tag_scores=tag_scores), mock.patch('django.utils.timezone.now', return_value=NOW):
+                expected = [RecommendationEngine._calculate_post_score(post, tag_scores, None) for post in self.posts]
+                for actual, legacy in zip(self.catalog.score(tag_scores, now=NOW).tolist(), expected):
+                    self.assertAlmostEqual(actual, legacy, places=9)
+
+    def test_rankings_match(self):
+        exclude_ids = {post.id for post in self.posts[::7]}
+        with mock.patch('django.utils.timezone.now', return_value=NOW):
+            for limit in (1, 24, 100, len(self.posts)):
+                with self.subTest(limit=limit):
+                    self.assertEqual(self.catalog.top_n(self.tag_scores, limit, now=NOW),
+                                     self.legacy_top_n(self.tag_scores, limit))
+                    self.assertEqual(self.catalog.top_n(self.tag_scores, limit, now=NOW, exclude_ids=exclude_ids),
+                                     self.legacy_top_n(self.tag_scores, limit, exclude_ids))
+
+
+class CollaborativeEquivalenceTests(TestCase):
+    """
+    The sparse InteractionMatrix finds the same neighbours and candidates as
+    the ORM queries it replaced. Candidates are now ranked by neighbour
+    overlap instead of engagement, so they are compared as sets.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(11)
+        posts = [
+            Post.objects.create(title=f'Post {i}', image_url=f'https://example.com/{i}.jpg', width=1, height=1)
+            for i in range(30)
+        ]
+        cls.users = []
+        for i in range(25):
+            user = User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com')
+            # One non-empty collection each, so the legacy Count over collection posts counts distinct posts
+            collection = Collection.objects.create(user=user, name='Saved')
+            collection.posts.set(rng.sample(posts, rng.randint(0, 8)))
+            cls.users.append(user)
+
+    def setUp(self):
+        self.matrix = InteractionMatrix.from_database()
+
+    @staticmethod
+    def legacy_neighbours(user):
+        user_saved_post_ids = set(Collection.objects.filter(user=user).values_list('posts__id', flat=True)) - {None}
+        similar_users = User.objects.filter(
+            collections__posts__id__in=user_saved_post_ids
+        ).exclude(id=user.id).annotate(
+            common_posts=Count('collections__posts')
+        ).filter(common_posts__gte=2).order_by('-common_posts')
+        return user_saved_post_ids, {other.id: other.common_posts for other in similar_users}
+
+    def test_neighbours_and_candidates_match(self):
+        for user in self.users:
+            with self.subTest(user=user.username):
+                saved, neighbours = self.legacy_neighbours(user)
+                similar, common = self.matrix.similar_users(user.id, limit=len(self.users))
+                self.assertEqual(dict(zip(similar.tolist(), common.tolist())), neighbours)
+
+                candidates = set(
+                    Collection.objects.filter(user_id__in=neighbours).values_list('posts__id', flat=True)
+                ) - saved - {None}
+                self.assertEqual(set(self.matrix.recommend(user.id, limit=1000, neighbours=len(self.users))),
+                                 candidates)
+
+    def test_deltas_match_a_rebuild(self):
+        collection = Collection.objects.get(user=self.users[0], name='Saved')
+        removed = collection.posts.first()
+        added = Post.objects.exclude(collections=collection).first()
+        collection.posts.remove(removed)
+        collection.posts.add(added)
+        self.matrix.discard(self.users[0].id, removed.id)
+        self.matrix.add(self.users[0].id, added.id)
+
+        rebuilt = InteractionMatrix.from_database()
+        for user in self.users:
+            with self.subTest(user=user.username):
+                self.assertEqual(self.matrix.recommend(user.id), rebuilt.recommend(user.id))
+
+
+class InteractionMatrixWarmTests(TestCase):
+    """Requests only ever load the published matrix; building it happens off the request path."""
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='warm', email='warm@example.com')
+        post = Post.objects.create(title='Warm', image_url='https://example.com/w.jpg', width=1, height=1)
+        Collection.objects.get(user=user, name='All Posts').posts.add(post)
+        patcher = mock.patch.object(collaborative, '_matrix', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cold_start_rebuilds_in_the_background(self):
+        with mock.patch.object(collaborative, '_rebuild_in_background') as rebuild, self.assertNumQueries(0):
+            self.assertIsNone(collaborative.get_interaction_matrix())
+        rebuild.assert_called_once_with()
+
+    def test_published_matrix_is_loaded_without_queries(self):
+        call_command('rebuild_interaction_matrix', stdout=StringIO())
+        collaborative._matrix = None
+
+        with mock.patch.object(collaborative, '_rebuild_in_background') as rebuild, self.assertNumQueries(0):
+            matrix = collaborative.get_interaction_matrix()
+        self.assertEqual(matrix.nnz, 1)
+        rebuild.assert_not_called()
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ForYouFeedTests(TestCase):
+    """The For You feed is routed and cursor pages walk its snapshot without repeats."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader', email='reader@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for i in range(30):
+            Post.objects.create(title=f'Post {i}', image_url=f'https://example.com/{i}.jpg', width=1, height=1,
+                                shape='almond' if i % 2 else 'coffin', colors=['pink'])
+        add_interests({self.user.id: {'almond': 3.0}})
+
+    def test_requires_authentication(self):
+        self.assertEqual(APIClient().get('/api/auth/posts/for-you/').status_code, 401)
+
+    def test_cursor_pages_do_not_repeat_posts(self):
+        served = []
+        url = '/api/auth/posts/for-you/?cursor=&page_size=8'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            served.extend(post['id'] for post in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(sorted(served), sorted(Post.objects.values_list('id', flat=True)))
+        first_page = Post.objects.filter(id__in=served[:8])
+        self.assertEqual(set(first_page.values_list('shape', flat=True)), {'almond'})
+
+
+class KeywordExtractionEquivalenceTests(SimpleTestCase):
+    """
+    The single-regex extractor agrees with the per-variant passes it replaced
+    on queries naming each field at most once. It deliberately differs on
+    repeated fields (every color, first mention of the rest) and on variants
+    spelled with "_" or "-", which the old passes could never match.
+    """
+
+    def test_matches_legacy_extractor(self):
+        rng = random.Random(5)
+        variants = {
+            field: sorted(variant for variant in normalization_map if '_' not in variant and '-' not in variant)
+            for field, normalization_map in FIELD_MAPS
+        }
+        filler = ['nails', 'design', 'with', 'for', 'summer', 'cute', 'ideas', 'the', 'look', 'Elegant!']
+        for _ in range(3000):
+            words = rng.sample(filler, rng.randint(0, 4))
+            words += [rng.choice(variants[field]) for field in rng.sample(list(variants), rng.randint(0, 4))]
+            rng.shuffle(words)
+            query = ' '.join(words)
+            with self.subTest(query=query):
+                legacy, legacy_remainder = _legacy_extract_nail_keywords(query)
+                result, remainder = extract_nail_keywords(query)
+                self.assertEqual({field: result[field] for field in legacy}, legacy)
+                self.assertEqual(remainder, legacy_remainder)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class FacetCursorTests(TestCase):
+    """Cursor pages of the newest-first facet listing seek on (created_at, id), not list offsets."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.posts = [self.create_post(i, minutes_ago=100 - i) for i in range(30)]
+        patcher = mock.patch('core.views.get_facet_index', side_effect=FacetIndex.load)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def create_post(number, minutes_ago):
+        post = Post.objects.create(title=f'Post {number}', image_url=f'https://example.com/{number}.jpg',
+                                   width=1, height=1, shape='almond', colors=['pink'])
+        Post.objects.filter(pk=post.pk).update(created_at=NOW - datetime.timedelta(minutes=minutes_ago))
+        return post
+
+    def page(self, url):
+        data = self.client.get(url).json()
+        return [post['id'] for post in data['results']], data['next'], data['previous']
+
+    def test_posts_created_or_deleted_mid_scroll_shift_nothing(self):
+        first, next_url, _ = self.page('/api/auth/posts/filter/?shape=almond&cursor=&page_size=10')
+        newest = self.create_post(100, minutes_ago=0)
+        Post.objects.filter(pk__in=first[:3]).delete()
+        second, next_url, previous_url = self.page(next_url)
+        third, next_url, _ = self.page(next_url)
+
+        newest_first = [post.id for post in reversed(self.posts)]
+        self.assertEqual(first + second + third, newest_first)
+        self.assertIsNone(next_url)
+        # Going back returns what is now before the second page, the new post included
+        back, _, _ = self.page(previous_url)
+        self.assertEqual(back, [newest.id] + first[3:])
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertEqual(self.client.get('/api/auth/posts/filter/?cursor=bm9wZQ').status_code, 404)
+        bad_key = KeysetPagination.encode_cursor({'k': ['yesterday', 1]})
+        self.assertEqual(self.client.get(f'/api/auth/posts/filter/?cursor={bad_key}').status_code, 404)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CacheNamespaceTests(TestCase):
+    """Invalidating a namespace hides its entries, and only its entries."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_invalidate_moves_only_its_own_keys(self):
+        first, second = user_recommendations(1), user_recommendations(2)
+        cache.set(first.key('feed', 100), [1, 2])
+        cache.set(second.key('feed', 100), [3, 4])
+        cache.set(POSTS.key('filtered', 'shape=almond'), [5])
+
+        first.invalidate()
+
+        self.assertIsNone(cache.get(first.key('feed', 100)))
+        self.assertEqual(cache.get(second.key('feed', 100)), [3, 4])
+        self.assertEqual(cache.get(POSTS.key('filtered', 'shape=almond')), [5])
+
+    def test_recreated_counter_is_ahead_of_live_generations(self):
+        namespace = user_recommendations(1)
+        with mock.patch('core.cache_namespaces.time.time', return_value=1_000.0):
+            stale_key = namespace.key('feed', 100)
+        cache.set(stale_key, [1, 2])
+        # The counter is evicted while entries written under it are still live
+        cache.delete(namespace.version_key)
+        namespace.invalidate()
+        self.assertGreater(namespace.version(), 1_000_000)
+        self.assertIsNone(cache.get(namespace.key('feed', 100)))
+
+    def test_post_changes_move_the_catalog_generation(self):
+        before = CATALOG.version()
+        post = Post.objects.create(title='Almond', image_url='https://example.com/a.jpg', width=1, height=1)
+        after_create = CATALOG.version()
+        post.delete()
+        self.assertLess(before, after_create)
+        self.assertLess(after_create, CATALOG.version())
+
+
+class FacetMatchTests(TestCase):
+    """The facet index selects exactly the posts the ORM filter (array overlap on base colors) does."""
+
+    PARAMS = [
+        {},
+        {'shape': 'almond'},
+        {'shape': 'Coffin', 'color': 'red'},
+        {'color': 'pink'},
+        {'color': 'burgundy, white'},
+        {'pattern': 'french', 'size': 'short'},
+        {'q': 'red almond'},
+        {'q': 'pink french', 'color': 'white'},
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        for post_id, shape, pattern, size, colors, _, _, _, created_at in synthetic_posts(120, seed=11):
+            post = Post.objects.create(title=f'Post {post_id}', image_url=f'https://example.com/{post_id}.jpg',
+                                       width=1, height=1, shape=shape.title(), pattern=pattern, size=size,
+                                       colors=colors)
+            Post.objects.filter(pk=post.pk).update(created_at=created_at)
+
+    def test_matches_orm_filter(self):
+        index = FacetIndex.load()
+        for params in self.PARAMS:
+            with self.subTest(params=params):
+                constraints, remaining_query = get_filter_constraints(params)
+                self.assertEqual(remaining_query, '')
+                view = FilteredPostListView()
+                view.request = SimpleNamespace(query_params=params)
+                expected = list(view.get_queryset().values_list('id', flat=True))
+                self.assertEqual(index.post_ids(index.match(constraints)), expected)
+
+
+class SeededShuffleTests(TestCase):
+    """The SQL and numpy shuffles agree, and a seed always gives the same order."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Post.objects.bulk_create([
+            Post(id=post_id, title=f'Post {post_id}', image_url=f'https://example.com/{post_id}.jpg',
+                 width=1, height=1)
+            for post_id in [*range(1, 60), 4_000_000, 2 ** 31 - 1]
+        ])
+
+    def test_sql_and_numpy_orders_agree(self):
+        ids = list(Post.objects.values_list('id', flat=True))
+        for seed in ('1718000000', 'refresh', 42):
+            with self.subTest(seed=seed):
+                self.assertEqual(list(seeded_shuffle(Post.objects.all(), seed).values_list('id', flat=True)),
+                                 shuffle_ids(ids, seed))
+
+    def test_seed_determines_order(self):
+        ids = list(range(1, 500))
+        order = shuffle_ids(ids, 'seed')
+        self.assertEqual(sorted(order), ids)
+        self.assertEqual(shuffle_ids(reversed(ids), 'seed'), order)
+        self.assertNotEqual(shuffle_ids(ids, 'other seed'), order)
+        self.assertEqual(shuffle_ids(ids, 'seed', limit=25), order[:25])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SavedFlagTests(TestCase):
+    """Post lists flag the viewer's saved posts and follow saves and unsaves."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='flagger', email='flagger@example.com')
+        self.collection = Collection.objects.create(user=self.user, name='Nails')
+        self.posts = [
+            Post.objects.create(title=f'Post {i}', image_url=f'https://example.com/{i}.jpg', width=1, height=1,
+                                shape='almond')
+            for i in range(5)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        patcher = mock.patch('core.views.get_facet_index', side_effect=FacetIndex.load)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def saved_flags(self, client):
+        results = client.get('/api/auth/posts/filter/?shape=almond').json()['results']
+        return {post['id'] for post in results if post['is_saved']}
+
+    def toggle(self, collection_id, post):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/auth/collections/{collection_id}/posts/{post.id}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_flags_follow_saves(self):
+        self.assertEqual(self.saved_flags(self.client), set())
+        self.toggle(self.collection.id, self.posts[1])
+        self.toggle(self.collection.id, self.posts[3])
+        self.assertEqual(self.saved_flags(self.client), {self.posts[1].id, self.posts[3].id})
+        # Still saved in "All Posts" until removed from there too
+        self.toggle(self.collection.id, self.posts[1])
+        self.assertEqual(self.saved_flags(self.client), {self.posts[1].id, self.posts[3].id})
+        self.toggle(memberships.default_collection_id(self.user), self.posts[1])
+        self.assertEqual(self.saved_flags(self.client), {self.posts[3].id})
+        self.assertEqual(self.saved_flags(APIClient()), set())
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SuggestionTests(TestCase):
+    """Completions come best first from the trie, with synonyms of one filter collapsed."""
+
+    def setUp(self):
+        cache.clear()
+        for i, (shape, color) in enumerate([('coffin', 'coral'), ('coffin', 'pink'), ('coffin', 'pink'),
+                                            ('almond', 'coral')]):
+            Post.objects.create(title=f'Sunset {i}', image_url=f'https://example.com/{i}.jpg', width=1, height=1,
+                                shape=shape, size='short', colors=[color])
+        for target in ('core.suggest.get_facet_index', 'core.views.get_facet_index'):
+            patcher = mock.patch(target, side_effect=FacetIndex.load)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(suggest, '_trie', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def suggestions(self, query, limit=8):
+        response = self.client.get('/api/auth/posts/suggest/', {'q': query, 'limit': limit})
+        return response.json()['suggestions']
+
+    def test_prefix_completions(self):
+        completions = self.suggestions('co', limit=3)
+        self.assertEqual(completions[0], {'text': 'coffin', 'count': 3, 'filters': {'shape': 'coffin'}})
+        self.assertEqual(len(completions), 3)
+        counts = [completion['count'] for completion in completions]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        # One completion per filter, however many synonyms start with the prefix
+        filters = [tuple(sorted(completion['filters'].items())) for completion in completions]
+        self.assertEqual(len(filters), len(set(filters)))
+
+        self.assertIn({'text': 'sunset', 'count': 4, 'filters': {'q': 'sunset'}}, self.suggestions('sun'))
+        self.assertEqual(self.suggestions('zzz'), [])
+
+    def test_last_word_is_completed_with_combined_counts(self):
+        completions = {completion['text']: completion for completion in self.suggestions('short co')}
+        self.assertEqual(completions['short coffin']['filters'], {'shape': 'coffin', 'size': 'short'})
+        self.assertEqual(completions['short coffin']['count'], 3)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class RefreshOrderTests(TestCase):
+    """A refreshed (cache_bust) listing keeps one order for every page of the scroll."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='scroller', email='scroller@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.posts = [
+            Post.objects.create(title=f'Almond post {i}', image_url=f'https://example.com/{i}.jpg', width=1,
+                                height=1, shape='almond', colors=['pink'])
+            for i in range(100)
+        ]
+        patcher = mock.patch('core.views.get_facet_index', side_effect=FacetIndex.load)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def scroll(self, url, pages):
+        served = []
+        for _ in range(pages):
+            data = self.client.get(url).json()
+            served += [post['id'] for post in data['results']]
+            url = data['next']
+        return served
+
+    def test_pages_of_a_refresh_do_not_repeat(self):
+        for mode, url in (('pages', '/api/auth/posts/filter/?shape=almond&cache_bust=42'),
+                          ('cursor', '/api/auth/posts/filter/?shape=almond&cache_bust=43&cursor='),
+                          ('search', '/api/auth/posts/filter/?q=post&cache_bust=44&cursor=')):
+            with self.subTest(mode=mode):
+                # Posts seen before the refresh are demoted once, when the order is built
+                cache.clear()
+                mark_seen(self.user, [post.id for post in self.posts[:10]])
+                served = self.scroll(url, pages=5)
+                self.assertEqual(len(served), 100)
+                self.assertEqual(len(set(served)), 100)
+                self.assertEqual(set(served[-10:]), {post.id for post in self.posts[:10]})
+
+    def test_seed_changes_the_order(self):
+        first = self.scroll('/api/auth/posts/filter/?shape=almond&cache_bust=1', pages=1)
+        second = self.scroll('/api/auth/posts/filter/?shape=almond&cache_bust=2', pages=1)
+        self.assertNotEqual(first, second)
+
+
+class SearchTests(TestCase):
+    """Free-text title search, with the substring fallback used off Postgres."""
+
+    def setUp(self):
+        titles = ['Pink French Tips', 'French manicure with pink glitter', 'Blue chrome', 'Glittery pink']
+        self.posts = [
+            Post.objects.create(title=title, image_url=f'https://example.com/{i}.jpg', width=1, height=1)
+            for i, title in enumerate(titles)
+        ]
+
+    def titles(self, text):
+        return {post.title for post in search_posts(Post.objects.all(), text)}
+
+    def test_fallback_matches_every_term_case_insensitively(self):
+        self.assertEqual(self.titles('pink FRENCH'), {'Pink French Tips', 'French manicure with pink glitter'})
+        self.assertEqual(self.titles('glitter'), {'French manicure with pink glitter', 'Glittery pink'})
+        self.assertEqual(self.titles('!!'), {post.title for post in self.posts})
+
+    def test_stopword_only_query_keeps_the_attribute_filter(self):
+        queryset = Post.objects.filter(title__icontains='pink')
+        with mock.patch('core.search.full_text_available', return_value=True), \
+                mock.patch('core.search._has_lexemes', return_value=False):
+            self.assertIs(search_posts(queryset, 'the with'), queryset)
+
+    def test_refresh_shuffles_search_results_instead_of_ranking_them(self):
+        view = FilteredPostListView()
+        for cache_bust, expected in ((None, ('-search_rank', '-created_at')), ('7', ('shuffle_rank', 'pk'))):
+            params = {'q': 'pink nails'} if cache_bust is None else {'q': 'pink nails', 'cache_bust': cache_bust}
+            view.request = SimpleNamespace(query_params=params)
+            with self.subTest(cache_bust=cache_bust), \
+                    mock.patch('core.search.full_text_available', return_value=True), \
+                    mock.patch('core.search._has_lexemes', return_value=True):
+                self.assertEqual(tuple(view.get_queryset().query.order_by), expected)
+
+
+class InteractionBufferTests(TestCase):
+    """Buffered interactions survive a failed flush and are applied by the next one."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='clicker', email='clicker@example.com')
+        self.post = Post.objects.create(title='Almond', image_url='https://example.com/a.jpg', width=1, height=1,
+                                        shape='almond', pattern='french', colors=['pink'])
+        self.buffer = InteractionBuffer()
+        self.buffer._flusher = mock.Mock()
+
+    def test_failed_flush_keeps_events(self):
+        self.buffer.record(self.user.id, 'save', post_id=self.post.id)
+        self.buffer.record(self.user.id, 'search', query='short coffin galaxy nails')
+
+        with mock.patch('core.interaction_buffer.add_interests', side_effect=DatabaseError('down')):
+            with self.assertRaises(DatabaseError):
+                self.buffer.flush()
+        self.assertFalse(UserInterest.objects.exists())
+        self.assertFalse(InterestProfile.objects.filter(user=self.user).exclude(search_terms={}).exists())
+
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(set(UserInterest.objects.filter(user=self.user).values_list('tag', flat=True)),
+                         {'almond', 'french', 'pink', 'short', 'coffin'})
+        self.assertIn('galaxy', InterestProfile.objects.get(user=self.user).search_terms)
+        self.assertEqual(self.buffer.flush(), 0)
+
+
+class PostCounterTests(TestCase):
+    """Buffered counter deltas reach the database on flush, and reconcile repairs drift."""
+
+    def setUp(self):
+        self.buffer = PostCounterBuffer()
+        self.buffer._flusher = mock.Mock()
+        self.post = Post.objects.create(title='Counted', image_url='https://example.com/c.jpg', width=1, height=1)
+
+    def test_flush_applies_deltas_once(self):
+        for _ in range(3):
+            self.buffer.increment(self.post.id, 'views_count')
+        self.buffer.increment_many('saves_count', {self.post.id: 2})
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(self.buffer.flush(), 0)
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.views_count, self.post.saves_count), (3, 2))
+
+    def test_failed_flush_keeps_deltas(self):
+        self.buffer.increment(self.post.id, 'views_count', 5)
+        with mock.patch('core.counters.apply_counter_deltas', side_effect=DatabaseError('down')):
+            with self.assertRaises(DatabaseError):
+                self.buffer.flush()
+        self.buffer.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views_count, 5)
+
+    def test_reconcile_needs_a_shared_buffer(self):
+        user = User.objects.create_user(username='saver', email='saver@example.com')
+        Collection.objects.create(user=user, name='Saved').posts.add(self.post)
+        Post.objects.filter(pk=self.post.pk).update(saves_count=7)
+
+        output = StringIO()
+        call_command('reconcile_post_counters', stdout=output)
+        self.assertIn('Skipped', output.getvalue())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.saves_count, 7)
+
+        call_command('reconcile_post_counters', force=True, stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.saves_count, 1)
+
+
+    def test_saves_count_counts_distinct_savers(self):
+        user = User.objects.create_user(username='saver', email='saver@example.com')
+        first, second = (Collection.objects.create(user=user, name=name) for name in ('Nails', 'Ideas'))
+        every_collection = [first.id, second.id, memberships.default_collection_id(user)]
+
+        with mock.patch.object(memberships, 'post_counters', self.buffer), \
+                mock.patch.object(memberships, '_lock_user', wraps=memberships._lock_user) as lock_user:
+            self.assertEqual(memberships.add_posts(user, [first.id], [self.post.id]), [self.post.id])
+            self.assertEqual(memberships.add_posts(user, [second.id], [self.post.id]), [])
+            self.assertEqual(memberships.remove_posts(user, [first.id], [self.post.id]), [])
+            self.buffer.flush()
+            self.post.refresh_from_db()
+            self.assertEqual(self.post.saves_count, 1)
+
+            self.assertEqual(memberships.remove_posts(user, every_collection, [self.post.id]), [self.post.id])
+            self.buffer.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.saves_count, 0)
+        # Every change read the user's saved set under the row lock
+        self.assertEqual(lock_user.call_count, 4)
+
+
+class PeriodicFlusherTests(SimpleTestCase):
+    @override_settings(WRITE_BEHIND={'BACKGROUND_FLUSH': True})
+    def test_exit_hook_is_registered_once(self):
+        flusher = PeriodicFlusher('test-flusher', lambda: 0, interval=60)
+        with mock.patch('core.write_behind.atexit.register') as register, \
+                mock.patch('core.write_behind.threading.Thread') as thread:
+            thread.return_value.is_alive.return_value = False  # Each thread "dies" right away
+            for _ in range(3):
+                flusher.ensure_started()
+        self.assertEqual(thread.call_count, 3)
+        register.assert_called_once_with(flusher._flush_safely)
+
+    @override_settings(WRITE_BEHIND={'BACKGROUND_FLUSH': False})
+    def test_background_flush_can_be_switched_off(self):
+        flusher = PeriodicFlusher('test-flusher', lambda: 0, interval=60)
+        with mock.patch('core.write_behind.atexit.register') as register:
+            flusher.ensure_started()
+        self.assertIsNone(flusher._thread)
+        register.assert_not_called()
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TrendingSearchesTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_buckets_are_read_in_one_round_trip_and_decayed(self):
+        hour = NOW.replace(minute=0)
+        record_searches({
+            hour: Counter({'almond french': 3, 'chrome': 1}),
+            hour - datetime.timedelta(hours=12): Counter({'chrome': 10}),
+        })
+        with mock.patch('core.search_terms.cache', wraps=cache) as search_cache:
+            trending_searches = compute_trending_searches(5, now=NOW)
+        search_cache.get_many.assert_called_once()
+        search_cache.get.assert_not_called()
+        # 10 searches two half-lives ago count as 2.5, plus 1 this hour
+        self.assertEqual(trending_searches, [{'query': 'chrome', 'score': 3.5}, {'query': 'almond french', 'score': 3.0}])
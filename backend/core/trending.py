@@ -0,0 +1,191 @@
+"""
+Trending posts ranked by recent, time-decayed engagement.
+
+The counter and interaction flushers roll engagement up into one
+PostEngagementHourly row per post and hour. A periodic refresh turns the
+rows inside the trending window into a ranked list of post IDs and caches
+it, so every trending fallback is a single cache read plus an in_bulk.
+
+The cached ranking outlives its refresh interval. Once it is due, the
+first request to take the refresh lock (a cache.add) recomputes it while
+every other request keeps serving the stale ranking, so an expiry never
+sends all workers into compute_trending at once. Only a cold cache makes
+requests wait, briefly, for the lock holder's result.
+"""
+
+import heapq
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TRENDING_CACHE_KEY = 'trending:ranking'
+TRENDING_LOCK_KEY = 'trending:refresh_lock'
+TRENDING_SIZE = 500
+
+# Per-event weights of the trending score
+VIEW_WEIGHT = 1.0
+SAVE_WEIGHT = 3.0
+TRY_ON_WEIGHT = 3.0
+
+ROLLUP_FIELDS = ('views', 'saves', 'try_ons')
+
+STALE_INTERVALS = 4  # A ranking is served stale for up to this many refresh intervals
+LOCK_TIMEOUT = 60  # Seconds before a crashed refresher's lock is released
+COLD_WAIT_SECONDS = 5  # How long a cold request waits for another worker's refresh
+COLD_POLL_SECONDS = 0.1
+
+
+def _config(name: str, default):
+    return getattr(settings, 'TRENDING', {}).get(name, default)
+
+
+def truncate_to_hour(moment: Optional[datetime] = None) -> datetime:
+    moment = moment or timezone.now()
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def record_engagement(deltas: Dict[int, Dict[str, int]], hour: Optional[datetime] = None):
+    """
+    Add engagement to the hourly rollups with an atomic upsert.
+
+    Args:
+        deltas: {post_id: {'views': n, 'saves': n, 'try_ons': n}}, missing
+            fields count as zero
+        hour: Bucket to add to (defaults to the current hour)
+    """
+    from .models import Post, PostEngagementHourly
+
+    if not deltas:
+        return
+
+    # Rollup rows reference posts, so skip posts deleted since the event
+    existing = set(Post.objects.filter(pk__in=list(deltas)).values_list('pk', flat=True))
+    hour_value = connection.ops.adapt_datetimefield_value(truncate_to_hour(hour))
+    rows = [
+        (post_id, hour_value, *(fields.get(field, 0) for field in ROLLUP_FIELDS))
+        for post_id, fields in sorted(deltas.items()) if post_id in existing
+    ]
+    if not rows:
+        return
+
+    table = PostEngagementHourly._meta.db_table
+    increments = ', '.join(f"{field} = {table}.{field} + EXCLUDED.{field}" for field in ROLLUP_FIELDS)
+    sql = (
+        f"INSERT INTO {table} (post_id, hour, {', '.join(ROLLUP_FIELDS)}) "
+        f"VALUES (%s, %s, %s, %s, %s) "
+        f"ON CONFLICT (post_id, hour) DO UPDATE SET {increments}"
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def compute_trending(now: Optional[datetime] = None, size: int = TRENDING_SIZE) -> List[int]:
+    """
+    Rank posts by engagement inside the trending window, each hour weighted
+    by 0.5 ** (age / half-life). Posts with no recent engagement are
+    backfilled by lifetime engagement of the last 30 days' posts.
+
+    Returns:
+        Up to `size` post IDs, most trending first
+    """
+    from .models import Post, PostEngagementHourly
+
+    now = now or timezone.now()
+    window_hours = _config('WINDOW_HOURS', 24 * 7)
+    half_life = _config('HALF_LIFE_HOURS', 24)
+
+    scores: Dict[int, float] = defaultdict(float)
+    rows = PostEngagementHourly.objects.filter(
+        hour__gte=truncate_to_hour(now) - timedelta(hours=window_hours)
+    ).values_list('post_id', 'hour', 'views', 'saves', 'try_ons').iterator(chunk_size=5000)
+    for post_id, hour, views, saves, try_ons in rows:
+        age_hours = max((now - hour).total_seconds() / 3600, 0)
+        engagement = views * VIEW_WEIGHT + saves * SAVE_WEIGHT + try_ons * TRY_ON_WEIGHT
+        scores[post_id] += engagement * 0.5 ** (age_hours / half_life)
+
+    ranked = [
+        post_id for post_id, score in
+        heapq.nlargest(size, scores.items(), key=lambda item: (item[1], item[0]))
+        if score > 0
+    ]
+
+    if len(ranked) < size:
+        backfill = Post.objects.filter(
+            created_at__gte=now - timedelta(days=30)
+        ).exclude(pk__in=ranked).annotate(
+            engagement_score=F('views_count') + F('saves_count') * 3
+        ).order_by('-engagement_score', '-id').values_list('id', flat=True)[:size - len(ranked)]
+        ranked.extend(backfill)
+
+    return ranked
+
+
+def refresh_trending() -> List[int]:
+    """Recompute the trending ranking and publish it to the cache."""
+    post_ids = compute_trending()
+    interval = _config('REFRESH_INTERVAL', 60 * 15)
+    cache.set(TRENDING_CACHE_KEY, (time.time() + interval, post_ids), timeout=interval * STALE_INTERVALS)
+    return post_ids
+
+
+def _wait_for_ranking() -> Optional[List[int]]:
+    """Poll for the ranking another worker is computing, None if it doesn't arrive in time."""
+    deadline = time.monotonic() + COLD_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(COLD_POLL_SECONDS)
+        cached = cache.get(TRENDING_CACHE_KEY)
+        if cached is not None:
+            return cached[1]
+    return None
+
+
+def get_trending_post_ids(limit: int) -> List[int]:
+    """
+    Return the top `limit` trending post IDs.
+
+    A due ranking is recomputed by whichever request takes the refresh
+    lock; the rest are served the stale ranking in the meantime.
+    """
+    cached = cache.get(TRENDING_CACHE_KEY)
+    if cached is not None:
+        fresh_until, post_ids = cached
+        if time.time() < fresh_until:
+            return post_ids[:limit]
+
+    locked = cache.add(TRENDING_LOCK_KEY, True, timeout=LOCK_TIMEOUT)
+    if not locked:
+        # Another worker is refreshing: serve the stale ranking, or wait for a cold one
+        post_ids = cached[1] if cached is not None else _wait_for_ranking()
+        if post_ids is not None:
+            return post_ids[:limit]
+
+    try:
+        post_ids = refresh_trending()
+    finally:
+        if locked:
+            cache.delete(TRENDING_LOCK_KEY)
+    return post_ids[:limit]
+
+
+def prune_engagement(now: Optional[datetime] = None) -> int:
+    """
+    Delete rollup rows older than TRENDING['RETENTION_DAYS'].
+
+    Returns:
+        Number of rows deleted
+    """
+    from .models import PostEngagementHourly
+
+    cutoff = (now or timezone.now()) - timedelta(days=_config('RETENTION_DAYS', 30))
+    deleted, _ = PostEngagementHourly.objects.filter(hour__lt=cutoff).delete()
+    return deleted
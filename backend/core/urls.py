@@ -3,9 +3,11 @@ from .views import (
     UserRegistrationView, GoogleLogin, UserProfileView, EmailChangeInitiateView,
     EmailChangeConfirmView, PostListView, ArticleListView, ArticleDetailView,
     PostDetailView, UserDeleteView, MorePostsView, ForYouPostListView,
-    TrackPostClickView, TrackSearchQueryView, TrackTryOnView, CollectionListView,
-    CollectionDetailView, ManagePostInCollectionView, SaveTryOnView, MyTryOnsListView,
+    TrackPostClickView, TrackSearchQueryView, TrackTryOnView, TrendingSearchesView, CollectionListView,
+    CollectionDetailView, CollectionPostsView, BulkCollectionMembershipView, ManagePostInCollectionView,
+    SaveTryOnView, MyTryOnsListView,
     DeleteTryOnView, PasswordResetRequestView, PasswordResetConfirmView, FilteredPostListView, FilterSuggestionsView,
+    SearchSuggestView,
     ActiveSessionsView, RevokeSessionView, RevokeAllSessionsView, LogoutView
 )
 from .chat_gateway import (
@@ -40,6 +42,7 @@ urlpatterns = [
 
     # Posts
     path('posts/', PostListView.as_view(), name='post-list'),
+    path('posts/for-you/', ForYouPostListView.as_view(), name='for-you-posts'),
     path('posts/<int:pk>/', PostDetailView.as_view(), name='post-detail'),
     path('posts/<int:post_id>/more/', MorePostsView.as_view(), name='more-posts'),
     path('posts/<int:post_id>/save-try-on/', SaveTryOnView.as_view(), name='save-try-on'),
@@ -51,6 +54,8 @@ urlpatterns = [
     # Collections
     path('collections/', CollectionListView.as_view(), name='collection-list-create'),
     path('collections/<int:pk>/', CollectionDetailView.as_view(), name='collection-detail'),
+    path('collections/<int:pk>/posts/', CollectionPostsView.as_view(), name='collection-posts'),
+    path('collections/memberships/', BulkCollectionMembershipView.as_view(), name='collection-memberships'),
     path('collections/<int:collection_id>/posts/<int:post_id>/', ManagePostInCollectionView.as_view(),
          name='manage-post-in-collection'),
 
@@ -62,6 +67,8 @@ urlpatterns = [
     # Posts filtering
     path('posts/filter/', FilteredPostListView.as_view(), name='filtered-posts'),
     path('posts/filter-suggestions/', FilterSuggestionsView.as_view(), name='filter-suggestions'),
+    path('posts/suggest/', SearchSuggestView.as_view(), name='posts-suggest'),
+    path('search/trending/', TrendingSearchesView.as_view(), name='trending-searches'),
 
     # Password reset
     path('password/reset/', PasswordResetRequestView.as_view(), name='password-reset-request'),
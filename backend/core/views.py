@@ -1,41 +1,60 @@
 # core/views.py
 
-import random
 import time
 from itertools import chain
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
 from django.core.cache import cache
 from django.core.mail import send_mail
-from django.db.models import Q, Prefetch, F
-from django.db import models
+from django.db.models import Count, Q, Prefetch
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
 from django.utils.encoding import force_bytes, force_str
-from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
+from django.utils.http import urlencode, urlsafe_base64_encode, urlsafe_base64_decode
 from django.views.decorators.cache import cache_page
 from django.utils.decorators import method_decorator
 from rest_framework import generics, status
+from rest_framework.exceptions import ParseError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 from allauth.socialaccount.providers.oauth2.client import OAuth2Client
 from dj_rest_auth.registration.views import SocialLoginView
+from . import memberships
 from .auth_utils import SessionManager
-from .models import User, Post, Article, InterestProfile, Collection, TryOn
+from .cache_namespaces import POSTS
+from .collaborative import record_interaction, remove_interaction
+from .counters import post_counters
+from .facets import FACET_FIELDS, get_facet_index
+from .feed_snapshot import FeedSnapshot
+from .fields import array_overlap
+from .interaction_buffer import interaction_buffer
+from .models import User, Post, Article, Collection, TryOn
+from .pagination import CollectionPostsPagination, CursorPaginationMixin, KeyedIds, KeysetPagination
+from .post_cache import hydrate_posts
+from .saved_posts import SavedPostSet, invalidate_saved
 from .serializers import (
     UserRegistrationSerializer, UserProfileSerializer, UserProfileUpdateSerializer,
     EmailChangeInitiateSerializer, EmailChangeConfirmSerializer, PostSerializer,
     ArticleListSerializer, ArticleDetailSerializer, UserDeleteSerializer, CollectionDetailSerializer,
     CollectionCreateSerializer, CollectionListSerializer, TryOnSerializer, PasswordResetRequestSerializer,
-    PasswordResetConfirmSerializer, UserSessionSerializer
+    PasswordResetConfirmSerializer, UserSessionSerializer, BulkCollectionMembershipSerializer, serialize_posts
 )
 from .keyword_extractor import extract_nail_keywords
+from .search import search_posts
+from .search_terms import trending_searches
+from .seen_filter import SeenFilter, mark_seen
+from .shuffle import seeded_shuffle, shuffle_ids
 from .color_constants import COLOR_SIMPLIFICATION_MAP
 from .recommendations import RecommendationEngine
-from functools import reduce
-import operator
+from .renderers import ORJSONRenderer
+from .similarity import SimilarityIndex
+from .suggest import get_suggestion_trie
 
 
 # --- HELPER FUNCTION ---
@@ -56,6 +75,14 @@ class StandardResultsSetPagination(PageNumberPagination):
     max_page_size = 10000
 
 
+# Post lists are the large responses; everything else keeps DRF's default renderers
+POST_LIST_RENDERERS = [ORJSONRenderer, BrowsableAPIRenderer]
+
+# Per-user post order of a refreshed (cache_bust) explore listing, kept for the scroll
+REFRESH_ORDER_KEY_PREFIX = 'posts:refresh'
+REFRESH_ORDER_TIMEOUT = 60 * 30
+
+
 # --- AUTH & PROFILE VIEWS ---
 
 class UserRegistrationView(generics.CreateAPIView):
@@ -234,135 +261,156 @@ class UserDeleteView(generics.GenericAPIView):
 
 # --- POST & FEED VIEWS ---
 
-class FilteredPostListView(generics.ListAPIView):
+def get_filter_constraints(query_params):
+    """
+    Turn the explore filter parameters into facet constraints.
+
+    Returns:
+        (constraints, remaining_query): (field, values) pairs that must all
+        match (a post matches a pair if it has any of the values), and the
+        free text left over after keyword extraction
+    """
+    constraints = []
+    remaining_query = ''
+
+    query = query_params.get('q', None)
+    if query:
+        # Use the extractor to get structured keywords and any leftover text;
+        # an extracted color matches every variant in its base color family,
+        # and a query naming several colors wants posts with all of them
+        extracted_keywords, remaining_query = extract_nail_keywords(query)
+        for field in FACET_FIELDS:
+            if field == 'color':
+                constraints.extend(('color', {color}) for color in extracted_keywords['colors'])
+            elif extracted_keywords.get(field):
+                constraints.append((field, {extracted_keywords[field]}))
+
+    # This part handles direct filter parameters from the frontend (e.g., ?shape=coffin from a pill click).
+    # These are combined with any filters derived from the text search.
+    for field in ('shape', 'pattern', 'size'):
+        if query_params.get(field, None):
+            constraints.append((field, {query_params[field]}))
+
+    # Color logic to handle multi-select OR queries
+    color_query = query_params.get('color', None)
+    if color_query:
+        colors = [c.strip() for c in color_query.lower().split(',') if c.strip()]
+        base_colors_to_find = {
+            COLOR_SIMPLIFICATION_MAP.get(c.replace(' ', '_'), c.replace(' ', '_')) for c in colors
+        }
+        if base_colors_to_find:
+            constraints.append(('color', base_colors_to_find))
+
+    return constraints, remaining_query
+
+
+class FilteredPostListView(CursorPaginationMixin, generics.ListAPIView):
     serializer_class = PostSerializer
+    renderer_classes = POST_LIST_RENDERERS
     permission_classes = [AllowAny]
     pagination_class = StandardResultsSetPagination
 
+    def list(self, request, *args, **kwargs):
+        # A cache_bust parameter (sent on page refresh) asks for a fresh shuffle seeded by its value
+        cache_bust = request.query_params.get('cache_bust', None)
+        constraints, remaining_query = get_filter_constraints(request.query_params)
+
+        if cache_bust is None and not remaining_query:
+            # Attribute-only filters are answered by the in-memory facet index, newest first
+            index = get_facet_index()
+            post_ids = KeyedIds(*index.listing(index.match(constraints)))
+        else:
+            # Sorted, since next/previous links don't keep the client's parameter order
+            params_for_cache = urlencode(sorted(
+                (param, values) for param, values in request.GET.lists()
+                if param not in ('page', 'page_size', KeysetPagination.cursor_query_param)
+            ), doseq=True)
+            if cache_bust is None:
+                cache_key = POSTS.key('filtered', params_for_cache)
+                timeout = 300  # Cache for 5 minutes
+            else:
+                # One order per refresh and user, built on the first page and served to every
+                # later one, since pages marked seen below would otherwise reorder the rest.
+                # Outside the POSTS namespace so a save mid-scroll doesn't rebuild it either.
+                user_part = request.user.id or 'anon'
+                cache_key = f"{REFRESH_ORDER_KEY_PREFIX}:{user_part}:{params_for_cache}"
+                timeout = REFRESH_ORDER_TIMEOUT
+
+            post_ids = cache.get(cache_key)
+            if post_ids is None:
+                post_ids = self.ordered_ids(constraints, remaining_query, cache_bust)
+                cache.set(cache_key, post_ids, timeout=timeout)
+
+        # Hydrate only the requested page
+        page = self.paginate_queryset(post_ids)
+        mark_seen(request.user, page)
+        return self.get_paginated_response(
+            serialize_posts(hydrate_posts(page), saved=SavedPostSet.for_user(request.user))
+        )
+
+    def ordered_ids(self, constraints, remaining_query, cache_bust):
+        """Matching post IDs for a text search or a refresh, in the order they are served."""
+        if remaining_query:
+            post_ids = list(self.get_queryset().values_list('id', flat=True))
+        else:
+            index = get_facet_index()
+            post_ids = shuffle_ids(index.post_ids(index.match(constraints)), cache_bust)
+        if cache_bust is not None and self.request.user.is_authenticated:
+            # Lead a fresh shuffle with posts the user hasn't seen yet
+            post_ids = SeenFilter.load(self.request.user.id).demote(post_ids)
+        return post_ids
+
     def get_queryset(self):
-        # Check if cache_bust parameter is present (used on page refresh for fresh data)
-        cache_bust_param = self.request.query_params.get('cache_bust', None)
-        should_bypass_cache = cache_bust_param is not None
-        
-        # Build cache key from query parameters (excluding cache_bust itself)
-        params_for_cache = self.request.GET.copy()
-        params_for_cache.pop('cache_bust', None)  # Remove cache_bust from cache key
-        cache_key = f"posts:filtered:{params_for_cache.urlencode()}"
-        
-        # Check cache only if not explicitly bypassed
-        if not should_bypass_cache:
-            cached_result = cache.get(cache_key)
-            if cached_result is not None:
-                return cached_result
+        # Shuffled on page refresh (seeded by cache_bust), newest first otherwise
+        cache_bust = self.request.query_params.get('cache_bust', None)
         
         queryset = Post.objects.all().select_related().only(
             'id', 'title', 'image_url', 'width', 'height', 
             'shape', 'pattern', 'size', 'colors', 'created_at', 'try_on_image_url'
         )
         
-        query = self.request.query_params.get('q', None)
-        shape = self.request.query_params.get('shape', None)
-        pattern = self.request.query_params.get('pattern', None)
-        size = self.request.query_params.get('size', None)
-        color_query = self.request.query_params.get('color', None)
+        constraints, remaining_query = get_filter_constraints(self.request.query_params)
 
         query_filters = Q()
+        for field, values in constraints:
+            if field == 'color':
+                # One GIN-indexed overlap on base colors
+                query_filters &= array_overlap('base_colors', values)
+            else:
+                query_filters &= Q(**{f'{field}__iexact': next(iter(values))})
 
-        if query:
-            # Use the extractor to get structured keywords and any leftover text
-            extracted_keywords, remaining_query = extract_nail_keywords(query)
-
-            # Apply filters based on the keywords extracted from the text query
-            if extracted_keywords.get('shape'):
-                query_filters &= Q(shape__iexact=extracted_keywords['shape'])
-
-            if extracted_keywords.get('pattern'):
-                query_filters &= Q(pattern__iexact=extracted_keywords['pattern'])
-
-            if extracted_keywords.get('size'):
-                query_filters &= Q(size__iexact=extracted_keywords['size'])
-
-            # Special handling for the extracted color to find all its variants
-            if extracted_keywords.get('color'):
-                base_color = extracted_keywords['color']
-                color_q = Q()
-                # Find all variants in the map that belong to the same base color family
-                variants_to_find = {
-                    variant for variant, base in COLOR_SIMPLIFICATION_MAP.items()
-                    if base == base_color
-                }
-                for variant in variants_to_find:
-                    color_q |= Q(colors__icontains=variant)
-                query_filters &= color_q
-
-            # Use the remaining text for a general title search
-            if remaining_query:
-                # This handles leftover words like "nails", "design", "art", etc.
-                for term in remaining_query.split():
-                    query_filters &= Q(title__icontains=term)
-
-        # This part handles direct filter parameters from the frontend (e.g., ?shape=coffin from a pill click).
-        # These are combined with any filters derived from the text search.
-        if shape:
-            query_filters &= Q(shape__iexact=shape)
-        if pattern:
-            query_filters &= Q(pattern__iexact=pattern)
-        if size:
-            query_filters &= Q(size__iexact=size)
-
-        # Color logic to handle multi-select OR queries
-        if color_query:
-            colors = [c.strip() for c in color_query.lower().split(',')]
-            base_colors_to_find = set()
-            for c in colors:
-                base_color = COLOR_SIMPLIFICATION_MAP.get(c.replace(' ', '_'), c)
-                base_colors_to_find.add(base_color)
-
-            color_master_q = Q()
-            if base_colors_to_find:
-                # Find all variants for all the base colors requested
-                variants_to_search = {
-                    variant for variant, base in COLOR_SIMPLIFICATION_MAP.items()
-                    if base in base_colors_to_find
-                }
-                # Also include the base colors themselves
-                variants_to_search.update(base_colors_to_find)
-
-                # Build a single, powerful OR query
-                or_conditions = [Q(colors__icontains=variant) for variant in variants_to_search]
-                if or_conditions:
-                    color_master_q = reduce(operator.or_, or_conditions)
-
-            if color_master_q:
-                query_filters &= color_master_q
-
-        if query_filters:
-            # Use .distinct() to avoid duplicate results if a post matches multiple criteria
-            # Use random order when cache is busted (page refresh), otherwise use created_at
-            order_by_field = '?' if should_bypass_cache else '-created_at'
-            result = queryset.filter(query_filters).distinct().order_by(order_by_field)
-            
-            # Cache the result (unless cache was explicitly bypassed)
-            if not should_bypass_cache:
-                cache.set(cache_key, result, timeout=300)  # Cache for 5 minutes
-            return result
-
-        # If no query or filters were provided, return the default unfiltered list
-        # Use random order when cache is busted (page refresh), otherwise use created_at
-        order_by_field = '?' if should_bypass_cache else '-created_at'
-        result = queryset.order_by(order_by_field)
-        
-        # Cache the result (unless cache was explicitly bypassed)
-        if not should_bypass_cache:
-            cache.set(cache_key, result, timeout=300)
-        return result
+        queryset = queryset.filter(query_filters).order_by('-created_at')
+
+        # Leftover words ("nails", "design", "art", ...) become a full-text title search, best match first
+        if remaining_query:
+            queryset = search_posts(queryset, remaining_query)
+        # A refresh reshuffles whatever matched, overriding the search rank
+        if cache_bust is not None:
+            queryset = seeded_shuffle(queryset, cache_bust)
+        return queryset
 
 
-class ForYouPostListView(generics.ListAPIView):
+class ForYouPostListView(CursorPaginationMixin, generics.ListAPIView):
     serializer_class = PostSerializer
+    renderer_classes = POST_LIST_RENDERERS
     permission_classes = [IsAuthenticated]
     pagination_class = StandardResultsSetPagination
 
+    def list(self, request, *args, **kwargs):
+        # Page numbers need a fixed-size list to count; cursors scroll the open-ended snapshot
+        if not self.uses_cursor_pagination():
+            posts = self.paginate_queryset(self.get_queryset())
+            return self.get_paginated_response(serialize_posts(posts, saved=SavedPostSet.for_user(request.user)))
+
+        # An empty cursor (first page of a fresh scroll) starts a new feed session
+        restart = not request.query_params.get(KeysetPagination.cursor_query_param)
+        snapshot = FeedSnapshot.for_user(request.user, restart=restart)
+        page = self.paginate_queryset(snapshot)
+        mark_seen(request.user, page)
+        return self.get_paginated_response(
+            serialize_posts(hydrate_posts(page), saved=SavedPostSet.for_user(request.user))
+        )
+
     def get_queryset(self):
         user = self.request.user
         
@@ -373,17 +421,23 @@ class ForYouPostListView(generics.ListAPIView):
             )
             return recommended_posts
         except Exception as e:
-            # Fallback to random posts
-            return Post.objects.all().order_by('?')[:100]
+            # Fallback to shuffled posts, reshuffled daily so pages stay consistent
+            return seeded_shuffle(Post.objects.all(), f"{user.id}:{timezone.localdate()}")[:100]
 
 
 class MorePostsView(generics.ListAPIView):
     serializer_class = PostSerializer
+    renderer_classes = POST_LIST_RENDERERS
     permission_classes = [AllowAny]
 
     def get_queryset(self):
         exclude_id = self.kwargs.get('post_id')
         
+        # Precomputed neighbours: a single primary-key lookup
+        similar_ids = SimilarityIndex.lookup(exclude_id, limit=48)
+        if similar_ids is not None:
+            return hydrate_posts(similar_ids)
+        
         try:
             current_post = Post.objects.get(id=exclude_id)
             
@@ -400,8 +454,12 @@ class MorePostsView(generics.ListAPIView):
 
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({'seed': int(time.time()), 'results': serializer.data})
+        if request.user.is_authenticated:
+            # Similar posts the user hasn't seen yet come first
+            posts_by_id = {post.id: post for post in queryset}
+            queryset = [posts_by_id[post_id] for post_id in SeenFilter.load(request.user.id).demote(list(posts_by_id))]
+        results = serialize_posts(queryset, saved=SavedPostSet.for_user(request.user))
+        return Response({'seed': int(time.time()), 'results': results})
 
 
 class PostDetailView(generics.RetrieveAPIView):
@@ -411,24 +469,24 @@ class PostDetailView(generics.RetrieveAPIView):
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        # Increment views count
-        Post.objects.filter(pk=instance.pk).update(views_count=models.F('views_count') + 1)
+        # Increment views count (written to the database by the counter flusher)
+        post_counters.increment(instance.pk, 'views_count')
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
 
 class PostListView(generics.ListAPIView):  # This is likely a legacy/unused view but included for safety
     serializer_class = PostSerializer
+    renderer_classes = POST_LIST_RENDERERS
     permission_classes = [AllowAny]
 
     def list(self, request, *args, **kwargs):
         seed = int(time.time())
-        random.seed(seed)
-        all_posts = list(Post.objects.all())
-        random.shuffle(all_posts)
-        paginated_posts = all_posts[:40]
-        serializer = self.get_serializer(paginated_posts, many=True)
-        return Response({'seed': seed, 'results': serializer.data})
+        # Sample from the facet index's ID list instead of loading every post
+        post_ids = shuffle_ids(get_facet_index().ids, seed, limit=40)
+        paginated_posts = hydrate_posts(post_ids)
+        results = serialize_posts(paginated_posts, saved=SavedPostSet.for_user(request.user))
+        return Response({'seed': seed, 'results': results})
 
 
 # --- TRACKING VIEWS ---
@@ -436,18 +494,12 @@ class PostListView(generics.ListAPIView):  # This is likely a legacy/unused view
 class TrackPostClickView(APIView):
     permission_classes = [AllowAny]
 
-    def post(self, request, post_id):
-        # Update user interests based on view interaction
-        if request.user.is_authenticated:
-            try:
-                post = Post.objects.get(id=post_id)
-                RecommendationEngine.update_user_interests(
-                    request.user, 
-                    post, 
-                    interaction_type='view'
-                )
-            except Post.DoesNotExist:
-                pass
+    def post(self, request, *args, **kwargs):
+        # Update user interests based on view interaction (applied by the buffer flusher)
+        post_id = request.data.get('post_id')
+        if request.user.is_authenticated and str(post_id).isdigit():
+            interaction_buffer.record(request.user.id, 'view', post_id=int(post_id))
+            mark_seen(request.user, [int(post_id)])
 
         return Response({'status': 'tracked'}, status=200)
 
@@ -458,33 +510,33 @@ class TrackSearchQueryView(APIView):
     def post(self, request, *args, **kwargs):
         query = request.data.get('query')
         if not query: return Response({'detail': 'Query is required.'}, status=status.HTTP_400_BAD_REQUEST)
-        user = request.user
-        profile, created = InterestProfile.objects.get_or_create(user=user)
-        score_change = 0.5
-        for term in query.lower().split():
-            profile.tag_scores[term] = profile.tag_scores.get(term, 0) + score_change
-        profile.save()
+        interaction_buffer.record(request.user.id, 'search', query=query)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class TrendingSearchesView(APIView):
+    """Most searched queries of the last day, recent hours weighted higher."""
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            limit = 10
+        return Response({'results': trending_searches(limit)})
+
+
 class TrackTryOnView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
         post_id = request.data.get('post_id')
-        try:
-            post = Post.objects.get(id=post_id)
-            
-            # Update user interests with high weight for try-on
-            RecommendationEngine.update_user_interests(
-                request.user, 
-                post, 
-                interaction_type='try_on'
-            )
-            
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        except Post.DoesNotExist:
-            return Response(status=status.HTTP_404_NOT_FOUND)
+        if not str(post_id).isdigit():
+            return Response({'detail': 'A valid post_id is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Update user interests with high weight for try-on (unknown posts are dropped at flush)
+        interaction_buffer.record(request.user.id, 'try_on', post_id=int(post_id))
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 # --- ARTICLE, COLLECTION, and other specific views ---
@@ -510,20 +562,43 @@ class CollectionListView(generics.ListCreateAPIView):
         return CollectionListSerializer
 
     def get_queryset(self):
-        return self.request.user.collections.prefetch_related(
-            Prefetch('posts', queryset=Post.objects.only('id', 'image_url'))
-        ).all().order_by('-created_at')
+        # Counts are annotated and the 4-post previews come from one sliced prefetch
+        # (a ROW_NUMBER() window per collection), so the query count is fixed
+        return self.request.user.collections.annotate(post_count=Count('posts')).prefetch_related(
+            Prefetch('posts', queryset=Post.objects.only('id', 'image_url').order_by('-id')[:4],
+                     to_attr='preview_posts')
+        ).order_by('-created_at')
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
+def collection_memberships(collection_id):
+    """Through-table rows of a collection; their ids grow in save order."""
+    return Collection.posts.through.objects.filter(collection_id=collection_id).only('id', 'post_id')
+
+
 class CollectionDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = CollectionDetailSerializer
 
     def get_queryset(self):
-        return self.request.user.collections.prefetch_related('posts').all()
+        return self.request.user.collections.annotate(post_count=Count('posts'))
+
+    def retrieve(self, request, *args, **kwargs):
+        # Metadata plus the first page of posts; the rest comes from CollectionPostsView
+        instance = self.get_object()
+        paginator = CollectionPostsPagination()
+        page = paginator.paginate_queryset(collection_memberships(instance.id), request, view=self)
+
+        data = self.get_serializer(instance).data
+        data['posts'] = serialize_posts(
+            hydrate_posts(membership.post_id for membership in page), saved=SavedPostSet.for_user(request.user)
+        )
+        data['next'] = paginator.get_next_link(
+            request.build_absolute_uri(reverse('collection-posts', args=[instance.id]))
+        )
+        return Response(data)
 
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']: return CollectionCreateSerializer
@@ -534,7 +609,26 @@ class CollectionDetailView(generics.RetrieveUpdateDestroyAPIView):
         if instance.name == "All Posts":
             return Response({"detail": "The default 'All Posts' collection cannot be deleted."},
                             status=status.HTTP_400_BAD_REQUEST)
-        return super().destroy(request, *args, **kwargs)
+        response = super().destroy(request, *args, **kwargs)
+        invalidate_saved(request.user.id)
+        return response
+
+
+class CollectionPostsView(generics.ListAPIView):
+    """A collection's posts, most recently saved first, with cursor pagination."""
+    permission_classes = [IsAuthenticated]
+    serializer_class = PostSerializer
+    pagination_class = CollectionPostsPagination
+    renderer_classes = POST_LIST_RENDERERS
+
+    def get_queryset(self):
+        collection = get_object_or_404(self.request.user.collections.only('id'), pk=self.kwargs['pk'])
+        return collection_memberships(collection.id)
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        posts = hydrate_posts(membership.post_id for membership in page)
+        return self.get_paginated_response(serialize_posts(posts, saved=SavedPostSet.for_user(request.user)))
 
 
 class ManagePostInCollectionView(APIView):
@@ -542,29 +636,51 @@ class ManagePostInCollectionView(APIView):
 
     def post(self, request, collection_id, post_id, *args, **kwargs):
         try:
-            collection = request.user.collections.get(id=collection_id)
-            post = Post.objects.get(id=post_id)
-            if post in collection.posts.all():
-                collection.posts.remove(post)
-                Post.objects.filter(pk=post_id).update(saves_count=models.F('saves_count') - 1)
-                message = f'Post removed from {collection.name}.'
-            else:
-                collection.posts.add(post)
-                Post.objects.filter(pk=post_id).update(saves_count=models.F('saves_count') + 1)
-                message = f'Post saved to {collection.name}.'
-            default_collection, _ = request.user.collections.get_or_create(name="All Posts")
-            if default_collection.id != collection.id and post not in default_collection.posts.all():
-                default_collection.posts.add(post)
-            
-            # Invalidate cache
-            cache.delete_pattern('posts:*')
-            
-            return Response({'detail': message}, status=status.HTTP_200_OK)
+            collection = request.user.collections.only('id', 'name').get(id=collection_id)
         except Collection.DoesNotExist:
             return Response({'detail': 'Collection not found.'}, status=status.HTTP_404_NOT_FOUND)
-        except Post.DoesNotExist:
+        if not Post.objects.filter(id=post_id).exists():
             return Response({'detail': 'Post not found.'}, status=status.HTTP_404_NOT_FOUND)
 
+        # Membership is one EXISTS on the through table, not a load of the collection
+        if memberships.is_member(collection.id, post_id):
+            memberships.remove_posts(request.user, [collection.id], [post_id])
+            message = f'Post removed from {collection.name}.'
+        else:
+            # Also files the post in "All Posts"
+            memberships.add_posts(request.user, [collection.id], [post_id])
+            message = f'Post saved to {collection.name}.'
+
+        return Response({'detail': message}, status=status.HTTP_200_OK)
+
+
+class BulkCollectionMembershipView(APIView):
+    """Add or remove many posts across many of the user's collections at once."""
+    permission_classes = [IsAuthenticated]
+    serializer_class = BulkCollectionMembershipSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        collection_ids = set(serializer.validated_data['collection_ids'])
+        post_ids = set(serializer.validated_data['post_ids'])
+
+        owned = set(request.user.collections.filter(id__in=collection_ids).values_list('id', flat=True))
+        if owned != collection_ids:
+            return Response({'detail': 'Collection not found.', 'collection_ids': sorted(collection_ids - owned)},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        if serializer.validated_data['action'] == 'add':
+            existing = set(Post.objects.filter(id__in=post_ids).values_list('id', flat=True))
+            if existing != post_ids:
+                return Response({'detail': 'Post not found.', 'post_ids': sorted(post_ids - existing)},
+                                status=status.HTTP_404_NOT_FOUND)
+            newly_saved = memberships.add_posts(request.user, owned, post_ids)
+            return Response({'detail': 'Posts saved.', 'newly_saved': newly_saved}, status=status.HTTP_200_OK)
+
+        unsaved = memberships.remove_posts(request.user, owned, post_ids)
+        return Response({'detail': 'Posts removed.', 'unsaved': unsaved}, status=status.HTTP_200_OK)
+
 
 class PublicPostDetailView(generics.RetrieveAPIView):
     queryset = Post.objects.all()
@@ -580,6 +696,7 @@ class SaveTryOnView(APIView):
             post = Post.objects.get(id=post_id)
             try_on, created = TryOn.objects.get_or_create(user=request.user, post=post)
             if created:
+                record_interaction(request.user.id, post.id)
                 return Response({'detail': 'Saved to My Try-Ons.'}, status=status.HTTP_201_CREATED)
             else:
                 return Response({'detail': 'Already in My Try-Ons.'}, status=status.HTTP_200_OK)
@@ -590,9 +707,18 @@ class SaveTryOnView(APIView):
 class MyTryOnsListView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = TryOnSerializer
+    # Newest first in cursor pages, seeking on the (user, -created_at, -id) index
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        return self.request.user.try_ons.all()
+        queryset = self.request.user.try_ons.select_related('post')
+        # ?post=<id> looks up the try-on of a single post (the try-on detail page)
+        post_id = self.request.query_params.get('post')
+        if post_id is not None:
+            if not post_id.isdigit():
+                raise ParseError('A valid post ID is required.')
+            queryset = queryset.filter(post_id=int(post_id))
+        return queryset
 
 
 class DeleteTryOnView(APIView):
@@ -602,6 +728,8 @@ class DeleteTryOnView(APIView):
         try:
             try_on = request.user.try_ons.get(id=try_on_id)
             try_on.delete()
+            if not request.user.collections.filter(posts=try_on.post_id).exists():
+                remove_interaction(request.user.id, try_on.post_id)
             return Response({"detail": "Removed from My Try-Ons."}, status=status.HTTP_204_NO_CONTENT)
         except TryOn.DoesNotExist:
             return Response({"detail": "Try-on not found."}, status=status.HTTP_404_NOT_FOUND)
@@ -653,7 +781,7 @@ class PasswordResetConfirmView(APIView):
 
 class FilterSuggestionsView(APIView):
     """
-    Provides a static list of curated filter suggestions for the frontend.
+    Provides the curated filter suggestions for the frontend, with live post counts per option.
     """
     permission_classes = [AllowAny]
 
@@ -665,8 +793,32 @@ class FilterSuggestionsView(APIView):
             "colors": ["red", "pink", "orange", "yellow", "green", "turquoise", "blue", "purple", "cream", "brown",
                        "white", "gray", "black"]
         }
+
+        # Live post counts per option, given the filters currently applied (same params as posts/filter/)
+        constraints, _ = get_filter_constraints(request.query_params)
+        facet_counts = get_facet_index().counts(constraints)
+        suggestions["counts"] = {
+            key: {option: facet_counts[field].get(option, 0) for option in suggestions[key]}
+            for key, field in (("shapes", "shape"), ("patterns", "pattern"), ("sizes", "size"), ("colors", "color"))
+        }
         return Response(suggestions)
 
+class SearchSuggestView(APIView):
+    """
+    Autocomplete for the explore search box: the best completions of `q`,
+    each with the posts/filter/ params it selects. Served from the in-memory
+    suggestion trie, so typing doesn't run a post query per keystroke.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = int(request.query_params['limit'])
+        except (KeyError, ValueError):
+            limit = None
+        query = request.query_params.get('q', '')
+        return Response({'query': query, 'suggestions': get_suggestion_trie().complete(query, limit)})
+
 # --- MULTI-DEVICE SESSION MANAGEMENT ---
 
 class ActiveSessionsView(generics.ListAPIView):
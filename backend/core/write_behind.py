@@ -0,0 +1,88 @@
+"""
+Shared plumbing for write-behind buffers.
+
+Request handlers append to a cheap buffer (this worker's memory, or a Redis
+structure shared by every worker when Redis is the cache backend) and a
+background flusher periodically applies the accumulated changes to the
+database in batches.
+
+Background flushing can be switched off with WRITE_BEHIND['BACKGROUND_FLUSH']
+(it is off under `manage.py test`); buffers then only change the database
+when flush() is called.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+def redis_connection():
+    """
+    Return the raw Redis client behind the default cache, or None when the
+    cache is not django-redis (e.g. DummyCache or LocMemCache in development).
+    """
+    if not hasattr(cache, 'client') or not hasattr(cache.client, 'get_client'):
+        return None
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+    except Exception as e:
+        logger.warning(f"Redis connection unavailable, buffering in process: {e}")
+        return None
+
+
+class PeriodicFlusher:
+    """
+    Runs `flush` every `interval` seconds on a daemon thread, and once more
+    when the process exits.
+
+    The thread is started lazily on first use so it is created inside each
+    gunicorn worker rather than in a pre-fork master. The exit hook is
+    registered with the first thread only, so restarting a dead thread
+    doesn't stack duplicate hooks.
+    """
+
+    def __init__(self, name: str, flush: Callable[[], int], interval: float):
+        self.name = name
+        self.flush = flush
+        self.interval = interval
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._exit_hook_registered = False
+
+    def ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if not getattr(settings, 'WRITE_BEHIND', {}).get('BACKGROUND_FLUSH', True):
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+            if not self._exit_hook_registered:
+                atexit.register(self._flush_safely)
+                self._exit_hook_registered = True
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self._flush_safely()
+
+    def _flush_safely(self):
+        from django.db import close_old_connections
+
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"{self.name} flush failed: {e}", exc_info=True)
+        finally:
+            # The flusher thread owns its own DB connection; don't let it go stale
+            close_old_connections()
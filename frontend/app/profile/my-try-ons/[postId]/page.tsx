@@ -1,7 +1,7 @@
 "use client";
 
 import TryOnPostDetail from "@/components/posts/TryOnPostDetail";
-import { Post, TryOn } from "@/types";
+import { PaginatedTryOnResponse, Post, TryOn } from "@/types";
 import api from "@/utils/api";
 import { notFound } from "next/navigation";
 import { useAuth } from "@/context/AuthContext";
@@ -23,22 +23,26 @@ export default function TryOnPostPage() {
 
   const [post, setPost] = useState<Post | null>(null);
   const [morePosts, setMorePosts] = useState<Post[]>([]);
-  const [tryOns, setTryOns] = useState<TryOn[]>([]); // New state for try-ons
+  const [tryOn, setTryOn] = useState<TryOn | null>(null); // This post's try-on
   const [isLoading, setIsLoading] = useState(true);
 
   const fetchPostData = useCallback(async () => {
     if (user && postId) {
       try {
-        const [postResponse, tryOnsResponse] = await Promise.all([
-          api.get<Post>(`/api/auth/posts/${postId}/`),
-          api.get<TryOn[]>(`/api/auth/profile/my-try-ons/`),
-        ]);
+        const [postResponse, tryOnResponse, tryOnsResponse] =
+          await Promise.all([
+            api.get<Post>(`/api/auth/posts/${postId}/`),
+            api.get<PaginatedTryOnResponse>(
+              `/api/auth/profile/my-try-ons/?post=${postId}`
+            ),
+            api.get<PaginatedTryOnResponse>(`/api/auth/profile/my-try-ons/`),
+          ]);
         setPost(postResponse.data);
-        setTryOns(tryOnsResponse.data); // Store try-ons in state
-        // Filter out the current post from morePosts
+        setTryOn(tryOnResponse.data.results[0] ?? null);
+        // The latest try-ons, without the current post
         setMorePosts(
-          tryOnsResponse.data
-            .map((tryOn) => tryOn.post)
+          tryOnsResponse.data.results
+            .map((item) => item.post)
             .filter((p) => p.id !== Number(postId))
         );
       } catch (error) {
@@ -61,12 +65,9 @@ export default function TryOnPostPage() {
   }, [fetchPostData]);
 
   const handleRemovePost = async (postId: number) => {
-    const tryOnToRemove = tryOns.find(
-      (tryOn: TryOn) => tryOn.post.id === postId
-    );
-    if (!tryOnToRemove) return;
+    if (!tryOn || tryOn.post.id !== postId) return;
 
-    const message = await deleteTryOn(tryOnToRemove.id);
+    const message = await deleteTryOn(tryOn.id);
     if (message) {
       showToastWithMessage(message);
       router.push("/profile/my-try-ons");
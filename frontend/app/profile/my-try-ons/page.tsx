@@ -3,7 +3,7 @@
 import { useEffect, useState, useCallback } from "react";
 import { useAuth } from "@/context/AuthContext";
 import { useRouter } from "next/navigation";
-import { TryOn } from "@/types";
+import { PaginatedTryOnResponse, TryOn } from "@/types";
 import api from "@/utils/api";
 import PostGrid from "@/components/posts/PostGrid";
 import Link from "next/link";
@@ -19,21 +19,42 @@ export default function MyTryOnsPage() {
   } = useAuth();
   const router = useRouter();
   const [tryOns, setTryOns] = useState<TryOn[]>([]);
+  const [nextPage, setNextPage] = useState<string | null>(null);
   const [isLoading, setIsLoading] = useState(true);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
 
   const fetchTryOns = useCallback(async () => {
     if (user) {
       try {
-        const response = await api.get<TryOn[]>(
+        const response = await api.get<PaginatedTryOnResponse>(
           "/api/auth/profile/my-try-ons/"
         );
-        setTryOns(response.data);
+        setTryOns(response.data.results);
+        setNextPage(response.data.next);
       } catch (error) {
         console.error("Failed to fetch try-ons:", error);
       }
     }
   }, [user]);
 
+  const loadMoreTryOns = async () => {
+    if (!nextPage) return;
+    setIsLoadingMore(true);
+    try {
+      // Follow the cursor link through the configured API host
+      const { pathname, search } = new URL(nextPage);
+      const response = await api.get<PaginatedTryOnResponse>(
+        `${pathname}${search}`
+      );
+      setTryOns((prev) => [...prev, ...response.data.results]);
+      setNextPage(response.data.next);
+    } catch (error) {
+      console.error("Failed to load more try-ons:", error);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     if (!isAuthLoading && !tokens) {
       router.push("/login");
@@ -95,12 +116,25 @@ export default function MyTryOnsPage() {
         </h1>
       </header>
       {posts.length > 0 ? (
-        <PostGrid
-          posts={posts}
-          variant="saved"
-          onRemove={handleRemoveTryOn}
-          onPostClick={handlePostClick}
-        />
+        <>
+          <PostGrid
+            posts={posts}
+            variant="saved"
+            onRemove={handleRemoveTryOn}
+            onPostClick={handlePostClick}
+          />
+          {nextPage && (
+            <div className="flex justify-center">
+              <button
+                onClick={loadMoreTryOns}
+                disabled={isLoadingMore}
+                className="bg-[#D98B99] text-white font-bold py-2 px-5 rounded-lg hover:bg-[#C47C8A] transition disabled:opacity-50 disabled:cursor-not-allowed"
+              >
+                {isLoadingMore ? "Loading..." : "Load more"}
+              </button>
+            </div>
+          )}
+        </>
       ) : (
         <div className="text-center py-16 px-6 bg-white rounded-2xl shadow-sm">
           <div className="mx-auto w-16 h-16 flex items-center justify-center bg-gray-100 rounded-full mb-4">
@@ -3,7 +3,7 @@
 import { useEffect, useState, useCallback } from "react";
 import { useParams, useRouter } from "next/navigation";
 import { useAuth } from "@/context/AuthContext";
-import { CollectionDetail, Post } from "@/types";
+import { CollectionDetail, PaginatedPostResponse, Post } from "@/types";
 import api from "@/utils/api";
 import PostGrid from "@/components/posts/PostGrid";
 import Link from "next/link";
@@ -24,6 +24,7 @@ export default function CollectionDetailPage() {
 
   const [collection, setCollection] = useState<CollectionDetail | null>(null);
   const [isLoading, setIsLoading] = useState(true);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [showCollectionsModal, setShowCollectionsModal] = useState(false);
   const [postToSave, setPostToSave] = useState<Post | null>(null);
 
@@ -40,6 +41,31 @@ export default function CollectionDetailPage() {
     }
   }, [user, collectionId]);
 
+  const loadMorePosts = async () => {
+    if (!collection?.next) return;
+    setIsLoadingMore(true);
+    try {
+      // Follow the cursor link through the configured API host
+      const { pathname, search } = new URL(collection.next);
+      const response = await api.get<PaginatedPostResponse>(
+        `${pathname}${search}`
+      );
+      setCollection((prev) =>
+        prev
+          ? {
+              ...prev,
+              posts: [...prev.posts, ...response.data.results],
+              next: response.data.next ?? null,
+            }
+          : prev
+      );
+    } catch (error) {
+      console.error("Failed to load more posts", error);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     if (!isAuthLoading && !tokens) {
       router.push("/login");
@@ -108,13 +134,26 @@ export default function CollectionDetailPage() {
       />
 
       {collection && collection.posts.length > 0 ? (
-        <PostGrid
-          posts={collection.posts}
-          variant="saved"
-          onSave={openSaveModal}
-          onRemove={handleRemovePost}
-          onPostClick={handlePostClick}
-        />
+        <>
+          <PostGrid
+            posts={collection.posts}
+            variant="saved"
+            onSave={openSaveModal}
+            onRemove={handleRemovePost}
+            onPostClick={handlePostClick}
+          />
+          {collection.next && (
+            <div className="flex justify-center">
+              <button
+                onClick={loadMorePosts}
+                disabled={isLoadingMore}
+                className="bg-[#D98B99] text-white font-bold py-2 px-5 rounded-lg hover:bg-[#C47C8A] transition disabled:opacity-50 disabled:cursor-not-allowed"
+              >
+                {isLoadingMore ? "Loading..." : "Load more"}
+              </button>
+            </div>
+          )}
+        </>
       ) : (
         <div className="text-center py-16 px-6 bg-white rounded-2xl shadow-sm mt-8">
           <div className="mx-auto w-16 h-16 flex items-center justify-center bg-gray-100 rounded-full mb-4">
@@ -39,6 +39,7 @@ export interface Post {
   size: string;
   colors: string[];
   try_on_image_url?: string;
+  is_saved?: boolean;
 }
 
 export interface TryOn {
@@ -47,6 +48,12 @@ export interface TryOn {
   created_at: string;
 }
 
+export interface PaginatedTryOnResponse {
+  results: TryOn[]; // Newest first
+  next: string | null; // Cursor URL for the next page
+  previous: string | null;
+}
+
 export interface PaginatedPostResponse {
   seed: string | number;
   results: Post[];
@@ -66,7 +73,9 @@ export interface Collection {
 export interface CollectionDetail {
   id: number;
   name: string;
-  posts: Post[];
+  post_count: number;
+  posts: Post[]; // First page, most recently saved first
+  next: string | null; // Cursor URL for the next page of posts
 }
 
 export interface NavigationState {